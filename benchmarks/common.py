@@ -0,0 +1,126 @@
+"""
+Helpers shared by the benchmarks.
+
+The sources under src/ are installed as a single flat eigen package, so
+the benchmarks lay them out the same way in a temporary directory
+instead of importing them from the source tree.
+"""
+import glob
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIR = os.path.join(REPO_DIR, 'src')
+DATA_DIR = os.path.join(REPO_DIR, 'data')
+
+def build_package(directory):
+    """
+    Lays out the Python sources as the installed eigen package.
+
+    Args:
+        directory (str): Directory to create the package in; it plays the
+                         role of the installed pkgdatadir.
+
+    Returns:
+        str: The directory, to be put on sys.path.
+    """
+    package_dir = os.path.join(directory, 'eigen')
+    os.makedirs(package_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(SOURCE_DIR, '**', '*.py'), recursive=True):
+        target = os.path.join(package_dir, os.path.basename(path))
+        # Every subdirectory installs its own empty __init__.py.
+        if not os.path.lexists(target):
+            os.symlink(path, target)
+    return directory
+
+def build_gtk_data(directory):
+    """
+    Compiles the GResource bundle and the GSettings schema needed to
+    create the application window.
+
+    Args:
+        directory (str): Directory to write the compiled files to.
+
+    Returns:
+        str: Path of the compiled eigen.gresource, or None if the GLib
+             compilers are not installed.
+    """
+    compile_resources = shutil.which('glib-compile-resources')
+    compile_schemas = shutil.which('glib-compile-schemas')
+    if compile_resources is None or compile_schemas is None:
+        return None
+
+    resource = os.path.join(directory, 'eigen.gresource')
+    subprocess.run([
+        compile_resources, '--sourcedir', SOURCE_DIR, '--target', resource,
+        os.path.join(SOURCE_DIR, 'eigen.gresource.xml'),
+    ], check=True)
+
+    schema_dir = os.path.join(directory, 'schemas')
+    os.makedirs(schema_dir, exist_ok=True)
+    shutil.copy(os.path.join(DATA_DIR, 'com.github.elahpeca.Eigen.gschema.xml'), schema_dir)
+    subprocess.run([compile_schemas, schema_dir], check=True)
+    return resource
+
+def run_python(code, env=None, timeout=60):
+    """
+    Runs Python code in a fresh interpreter and returns its output.
+
+    Args:
+        code (str): The code to run.
+        env (dict, optional): Extra environment variables.
+        timeout (float, optional): Seconds to wait before giving up.
+
+    Returns:
+        str: The standard output.
+
+    Raises:
+        subprocess.CalledProcessError: If the interpreter fails.
+    """
+    process = subprocess.run(
+        [sys.executable, '-c', code], env={**os.environ, **(env or {})},
+        capture_output=True, text=True, timeout=timeout, check=True,
+    )
+    return process.stdout
+
+def median_ms(samples):
+    """
+    Returns the median of timings in seconds, in milliseconds.
+
+    Args:
+        samples (list of float): Timings in seconds.
+
+    Returns:
+        float: The median in milliseconds.
+    """
+    return statistics.median(samples) * 1000
+
+def time_call(func, min_time=0.2, max_runs=1000):
+    """
+    Times repeated calls of a function.
+
+    The function is called at least three times, and then until
+    min_time has passed or max_runs calls have been made, so fast calls
+    are sampled often and slow ones only a few times.
+
+    Args:
+        func (callable): Function without arguments to time.
+        min_time (float, optional): Total seconds to spend sampling.
+        max_runs (int, optional): Largest number of calls.
+
+    Returns:
+        list of float: Duration of each call in seconds.
+    """
+    samples = []
+    total = 0.0
+    while len(samples) < 3 or (total < min_time and len(samples) < max_runs):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        total += elapsed
+    return samples
@@ -0,0 +1,205 @@
+"""
+Measures the startup cost of the application.
+
+Reports, as medians over several fresh interpreters:
+
+  * the import time of the modules the window loads at startup,
+  * the time from process start to the first frame of the window, and
+  * the time until the matrix view, which is built after that frame,
+    is on screen.
+
+It also checks that the numeric backend (SciPy's linear algebra, sparse
+and I/O modules) is not imported at startup; it is loaded when the first
+decomposition runs. The frame timings need a display server and the
+GLib resource compilers and are skipped otherwise.
+
+The script exits with status 1 if a budget is exceeded or the numeric
+backend is imported at startup, so it can guard against regressions:
+
+    python3 benchmarks/startup.py --runs 10 --import-budget 300
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import subprocess
+
+from common import build_gtk_data, build_package, median_ms, run_python
+
+# Modules that must not be imported before the first decomposition.
+DEFERRED_MODULES = ('scipy.linalg', 'scipy.sparse', 'scipy.sparse.linalg', 'scipy.io')
+
+# Modules imported by the window that do not need GTK.
+CORE_MODULES = ('eigen.matrix_data', 'eigen.matrix_import', 'eigen.matrix_export', 'eigen.result_cache')
+
+GTK_SETUP = '''
+import gettext
+import gi
+gi.require_version('Gtk', '4.0')
+gi.require_version('Adw', '1')
+from gi.repository import Gio
+Gio.Resource.load({resource!r})._register()
+gettext.install('eigen')
+'''
+
+IMPORT_PROBE = '''
+import sys
+import time
+sys.path.insert(1, {pkgdatadir!r})
+{setup}
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed, 'deferred': [m for m in {deferred!r} if m in sys.modules]}}))
+'''
+
+FRAME_PROBE = '''
+import sys
+import time
+sys.path.insert(1, {pkgdatadir!r})
+{setup}
+from gi.repository import Gio
+from eigen.application import EigenApplication
+
+def report(event):
+    print(event, time.monotonic(), flush=True)
+
+def on_after_paint(clock, window):
+    if not hasattr(window, 'first_frame'):
+        window.first_frame = True
+        report('first-frame')
+    if window.matrix_view is not None and window.matrix_view.get_mapped():
+        report('view-ready')
+        app.quit()
+
+def on_map(window):
+    window.get_frame_clock().connect('after-paint', on_after_paint, window)
+
+app = EigenApplication()
+app.set_flags(app.get_flags() | Gio.ApplicationFlags.NON_UNIQUE)
+app.connect('window-added', lambda app, window: window.connect('map', on_map))
+app.run([])
+'''
+
+def measure_import(pkgdatadir, module, setup, runs):
+    """
+    Measures the import time of a module in fresh interpreters.
+
+    Args:
+        pkgdatadir (str): Directory holding the eigen package.
+        module (str): The module to import.
+        setup (str): Code run before the timed import.
+        runs (int): Number of interpreters to start.
+
+    Returns:
+        tuple: The median import time in milliseconds and the list of
+               deferred modules that were imported.
+    """
+    code = 'import json\n' + IMPORT_PROBE.format(
+        pkgdatadir=pkgdatadir, setup=setup, module=module, deferred=DEFERRED_MODULES
+    )
+    samples = []
+    deferred = set()
+    for _ in range(runs):
+        report = json.loads(run_python(code))
+        samples.append(report['elapsed'])
+        deferred.update(report['deferred'])
+    return median_ms(samples), sorted(deferred)
+
+def measure_frames(pkgdatadir, setup, env, runs):
+    """
+    Measures the time from process start to the first frames of the window.
+
+    Args:
+        pkgdatadir (str): Directory holding the eigen package.
+        setup (str): Code run before the application is imported.
+        env (dict): Extra environment variables.
+        runs (int): Number of launches.
+
+    Returns:
+        dict: Median milliseconds to the 'first-frame' and 'view-ready' events.
+    """
+    code = FRAME_PROBE.format(pkgdatadir=pkgdatadir, setup=setup)
+    samples = {'first-frame': [], 'view-ready': []}
+    for _ in range(runs):
+        start = time.monotonic()
+        process = subprocess.run(
+            [sys.executable, '-c', code], env={**os.environ, **env},
+            capture_output=True, text=True, timeout=60, check=True,
+        )
+        for line in process.stdout.splitlines():
+            event, timestamp = line.split()
+            samples[event].append(float(timestamp) - start)
+    return {event: median_ms(values) for event, values in samples.items() if values}
+
+def has_display():
+    """
+    Returns whether a display server is available.
+
+    Returns:
+        bool: True if GTK can open a window.
+    """
+    return bool(os.environ.get('WAYLAND_DISPLAY') or os.environ.get('DISPLAY'))
+
+def print_row(name, value, budget=None):
+    """
+    Prints one line of the report.
+
+    Args:
+        name (str): Name of the measurement.
+        value (float): The measured time in milliseconds.
+        budget (float, optional): The budget in milliseconds.
+
+    Returns:
+        bool: False if the budget is exceeded.
+    """
+    within = budget is None or value <= budget
+    note = '' if budget is None else f'  (budget {budget:.0f} ms{"" if within else ", EXCEEDED"})'
+    print(f'{name:<32}{value:8.1f} ms{note}')
+    return within
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per measurement')
+    parser.add_argument('--import-budget', type=float, default=500,
+                        help='budget for importing the window module, in ms')
+    parser.add_argument('--frame-budget', type=float, default=1500,
+                        help='budget from process start to the first frame, in ms')
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory(prefix='eigen-bench-') as directory:
+        pkgdatadir = build_package(directory)
+        deferred = set()
+        for module in CORE_MODULES:
+            elapsed, loaded = measure_import(pkgdatadir, module, '', args.runs)
+            deferred.update(loaded)
+            print_row(f'import {module}', elapsed)
+
+        resource = build_gtk_data(directory)
+        if resource is None:
+            print('GLib resource compilers not found; skipping window measurements')
+        else:
+            setup = GTK_SETUP.format(resource=resource)
+            env = {'GSETTINGS_SCHEMA_DIR': os.path.join(directory, 'schemas')}
+            elapsed, loaded = measure_import(pkgdatadir, 'eigen.window', setup, args.runs)
+            deferred.update(loaded)
+            ok &= print_row('import eigen.window', elapsed, args.import_budget)
+
+            if has_display():
+                frames = measure_frames(pkgdatadir, setup, env, args.runs)
+                ok &= print_row('first frame', frames['first-frame'], args.frame_budget)
+                if 'view-ready' in frames:
+                    print_row('matrix view ready', frames['view-ready'])
+            else:
+                print('No display server; skipping frame measurements')
+
+    if deferred:
+        print('Imported at startup but should be deferred: ' + ', '.join(sorted(deferred)))
+        ok = False
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
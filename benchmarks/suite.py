@@ -0,0 +1,387 @@
+"""
+Benchmarks the decomposition engine and the matrix editing hot paths.
+
+Covers every decomposition offered by DecompositionHandler on random,
+symmetric positive definite, ill-conditioned, sparse and wide matrices
+from 1×1 up to thousands of rows, plus MatrixData.resize(), update_value()
+and, when GTK can be initialized, MatrixView.refresh_matrix(). The
+tiled LU, QR and Cholesky factorizations are also timed on 1, 2, 4, ...
+threads up to the number of cores, with their speedup and scaling
+efficiency over one thread.
+
+Record a run as JSON, then compare two runs to find slowdowns:
+
+    python3 benchmarks/suite.py run -o before.json
+    python3 benchmarks/suite.py run -o after.json
+    python3 benchmarks/suite.py compare before.json after.json
+
+compare exits with status 1 if a case got slower than the threshold
+(10% by default) or stopped working.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+
+import numpy as np
+
+from common import build_package, median_ms, time_call
+
+SIZES = (1, 2, 3, 4, 5, 6, 7, 16, 64, 256, 1024, 2048)
+QUICK_SIZES = (1, 2, 3, 4, 5, 6, 7, 16, 64, 256)
+STRUCTURES = ('random', 'spd', 'ill-conditioned', 'sparse', 'wide')
+PARALLEL_SIZES = (1024, 2048)
+QUICK_PARALLEL_SIZES = (512,)
+
+# Must match the keys of DecompositionHandler.
+DECOMPOSITION_NAMES = {
+    0: 'eigen',
+    1: 'svd',
+    2: 'lu',
+    3: 'qr',
+    4: 'cholesky',
+    5: 'truncated-svd',
+    6: 'truncated-eigen',
+}
+
+def make_matrix(structure, n, rng):
+    """
+    Builds a test matrix.
+
+    Args:
+        structure (str): One of STRUCTURES.
+        n (int): Order of the matrix; wide matrices have n rows and 2n columns.
+        rng (numpy.random.Generator): Random number generator.
+
+    Returns:
+        ndarray or scipy.sparse.csr_array: The matrix.
+    """
+    if structure == 'random':
+        return rng.standard_normal((n, n))
+    if structure == 'wide':
+        # Fewer rows than columns, which square-only code paths get wrong.
+        return rng.standard_normal((n, 2 * n))
+    if structure == 'spd':
+        a = rng.standard_normal((n, n))
+        return a @ a.T + n * np.eye(n)
+    if structure == 'ill-conditioned':
+        u, _ = np.linalg.qr(rng.standard_normal((n, n)))
+        v, _ = np.linalg.qr(rng.standard_normal((n, n)))
+        return (u * np.logspace(0, -12, n)) @ v.T
+
+    import scipy.sparse
+
+    # Symmetric and diagonally dominant, so every decomposition applies.
+    a = scipy.sparse.random_array((n, n), density=min(1.0, 8 / n), random_state=rng, format='csr')
+    a = a + a.T
+    return scipy.sparse.csr_array(a + scipy.sparse.diags_array(abs(a).sum(axis=1) + 1.0))
+
+def bench_decompositions(sizes, pattern, min_time):
+    """
+    Times every decomposition on every structure and size.
+
+    Args:
+        sizes (tuple of int): Matrix orders to benchmark.
+        pattern (re.Pattern): Only cases whose name matches are run.
+        min_time (float): Seconds to spend sampling each case.
+
+    Yields:
+        tuple: (case name, result dict).
+    """
+    from eigen.decomposition import DecompositionError, decompose_array
+
+    for structure in STRUCTURES:
+        for n in sizes:
+            # Seeded per case, so filtered runs benchmark the same matrices.
+            matrix = make_matrix(structure, n, np.random.default_rng([STRUCTURES.index(structure), n]))
+            for key, name in DECOMPOSITION_NAMES.items():
+                case = f'decompose/{name}/{structure}/{n}'
+                if not pattern.search(case):
+                    continue
+                try:
+                    samples = time_call(lambda: decompose_array(matrix, key), min_time)
+                except DecompositionError as error:
+                    yield case, {'error': str(error)}
+                    continue
+                yield case, summarize(samples)
+
+def thread_counts():
+    """
+    Returns the thread counts the parallel decompositions are timed with.
+
+    Returns:
+        list of int: Powers of two below the number of cores, then the
+                     number of cores.
+    """
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    if cores > 1:
+        counts.append(cores)
+    return counts
+
+def bench_parallel_scaling(sizes, pattern, min_time):
+    """
+    Times the tiled decompositions on growing numbers of threads.
+
+    Every case after the single-threaded one also records its speedup
+    t₁ / tₚ and its scaling efficiency t₁ / (p tₚ).
+
+    Args:
+        sizes (tuple of int): Matrix orders to benchmark.
+        pattern (re.Pattern): Only cases whose name matches are run.
+        min_time (float): Seconds to spend sampling each case.
+
+    Yields:
+        tuple: (case name, result dict).
+    """
+    from eigen import parallel
+
+    for n in sizes:
+        a = make_matrix('spd', n, np.random.default_rng([len(STRUCTURES), n]))
+        for name in ('lu', 'qr', 'cholesky'):
+            func = getattr(parallel, name)
+            single = None
+            for threads in thread_counts():
+                case = f'parallel/{name}/{n}/threads-{threads}'
+                if not pattern.search(case):
+                    continue
+                result = summarize(time_call(lambda: func(a, threads), min_time))
+                if threads == 1:
+                    single = result['median_ms']
+                elif single is not None:
+                    result['speedup'] = single / result['median_ms']
+                    result['efficiency'] = result['speedup'] / threads
+                yield case, result
+
+def bench_matrix_data(sizes, pattern, min_time):
+    """
+    Times the MatrixData editing hot paths.
+
+    Args:
+        sizes (tuple of int): Matrix orders to benchmark.
+        pattern (re.Pattern): Only cases whose name matches are run.
+        min_time (float): Seconds to spend sampling each case.
+
+    Yields:
+        tuple: (case name, result dict).
+    """
+    from eigen.matrix_data import MatrixData
+
+    for n in sizes:
+        rng = np.random.default_rng(n)
+        case = f'matrix_data/resize/{n}'
+        if pattern.search(case):
+            matrix_data = MatrixData(n, n)
+            matrix_data.load(rng.standard_normal((n, n)))
+
+            def resize():
+                matrix_data.resize(n + 1, n + 1)
+                matrix_data.resize(n, n)
+
+            yield case, summarize(time_call(resize, min_time))
+
+        for storage, density in (('dense', 1.0), ('sparse', 0.01)):
+            case = f'matrix_data/update_value/{storage}/{n}'
+            if not pattern.search(case) or (storage == 'sparse' and n * n < MatrixData.sparse_min_cells):
+                continue
+            matrix_data = MatrixData(n, n)
+            values = rng.standard_normal((n, n)) * (rng.random((n, n)) < density)
+            matrix_data.load(values)
+            cells = rng.integers(0, n, size=(1024, 2))
+            position = iter(range(1 << 62))
+
+            def update_value():
+                row, col = cells[next(position) % len(cells)]
+                matrix_data.update_value(row, col, '1.5')
+
+            yield case, summarize(time_call(update_value, min_time, max_runs=100_000))
+
+def bench_matrix_view(pattern, min_time):
+    """
+    Times MatrixView.refresh_matrix() for every grid size, without a window.
+
+    Args:
+        pattern (re.Pattern): Only cases whose name matches are run.
+        min_time (float): Seconds to spend sampling each case.
+
+    Yields:
+        tuple: (case name, result dict); nothing if GTK is unavailable.
+    """
+    try:
+        import gi
+        gi.require_version('Gtk', '4.0')
+        from gi.repository import Gtk
+    except (ImportError, ValueError):
+        print('GTK 4 not available; skipping MatrixView benchmarks', file=sys.stderr)
+        return
+    if not Gtk.init_check():
+        print('No display; skipping MatrixView benchmarks', file=sys.stderr)
+        return
+
+    from eigen.matrix_data import MatrixData
+    from eigen.matrix_view import MatrixView
+
+    for n in range(1, 8):
+        case = f'matrix_view/refresh_matrix/{n}'
+        if not pattern.search(case):
+            continue
+        matrix_data = MatrixData(n, n)
+        view = MatrixView()
+        view.set_matrix(matrix_data)
+        smaller = max(1, n - 1)
+
+        def refresh():
+            matrix_data.resize(smaller, smaller)
+            view.refresh_matrix()
+            matrix_data.resize(n, n)
+            view.refresh_matrix()
+
+        yield case, summarize(time_call(refresh, min_time))
+
+def summarize(samples):
+    """
+    Reduces timing samples to the values stored in the results file.
+
+    Args:
+        samples (list of float): Duration of each call in seconds.
+
+    Returns:
+        dict: Median and minimum in milliseconds and the number of runs.
+    """
+    return {'median_ms': median_ms(samples), 'min_ms': min(samples) * 1000, 'runs': len(samples)}
+
+def metadata():
+    """
+    Describes the environment of a run.
+
+    Returns:
+        dict: Versions and machine information.
+    """
+    import scipy
+
+    return {
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'machine': platform.machine(),
+        'system': platform.platform(),
+    }
+
+def run(args):
+    """
+    Runs the benchmarks and writes the results file.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: Exit status.
+    """
+    sizes = QUICK_SIZES if args.quick else SIZES
+    parallel_sizes = QUICK_PARALLEL_SIZES if args.quick else PARALLEL_SIZES
+    pattern = re.compile(args.filter or '')
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='eigen-bench-') as directory:
+        sys.path.insert(1, build_package(directory))
+        suites = (
+            bench_decompositions(sizes, pattern, args.min_time),
+            bench_parallel_scaling(parallel_sizes, pattern, args.min_time),
+            bench_matrix_data(sizes, pattern, args.min_time),
+            bench_matrix_view(pattern, args.min_time),
+        )
+        for suite in suites:
+            for case, result in suite:
+                results[case] = result
+                value = result.get('error') or f'{result["median_ms"]:.4f} ms'
+                if 'efficiency' in result:
+                    value += f'  {result["speedup"]:.2f}x speedup, {result["efficiency"]:.0%} efficiency'
+                print(f'{case:<48}{value}', flush=True)
+
+    with open(args.output, 'w', encoding='utf-8') as stream:
+        json.dump({'metadata': metadata(), 'results': results}, stream, indent=1)
+    return 0
+
+def compare(args):
+    """
+    Compares two results files and reports slowdowns.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: 1 if a case got slower than the threshold or stopped working, 0 otherwise.
+    """
+    with open(args.baseline, encoding='utf-8') as stream:
+        baseline = json.load(stream)['results']
+    with open(args.current, encoding='utf-8') as stream:
+        current = json.load(stream)['results']
+
+    regressions = 0
+    for case in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[case], current[case]
+        if 'error' in after and 'error' not in before:
+            print(f'BROKEN    {case}: {after["error"]}')
+            regressions += 1
+            continue
+        if 'error' in before or 'error' in after:
+            continue
+
+        # Cases faster than the timer resolution allows are too noisy to judge.
+        if max(before['median_ms'], after['median_ms']) < args.noise_floor:
+            continue
+
+        ratio = after['median_ms'] / before['median_ms']
+        if ratio > args.threshold:
+            status = 'SLOWER'
+            regressions += 1
+        elif ratio < 1 / args.threshold:
+            status = 'FASTER'
+        elif args.verbose:
+            status = 'same'
+        else:
+            continue
+        print(f'{status:<10}{case:<48}{before["median_ms"]:10.4f} -> {after["median_ms"]:10.4f} ms  ({ratio:.2f}x)')
+
+    missing = sorted(baseline.keys() - current.keys())
+    if args.verbose:
+        for case in missing:
+            print(f'MISSING   {case}')
+
+    print(f'{regressions} regression(s) at a {args.threshold:.2f}x threshold, '
+          f'{len(missing)} baseline case(s) not in the current run')
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('-o', '--output', default='benchmark.json', help='results file to write')
+    run_parser.add_argument('--quick', action='store_true', help='only sizes up to 256')
+    run_parser.add_argument('--filter', help='regular expression selecting cases by name')
+    run_parser.add_argument('--min-time', type=float, default=0.2,
+                            help='seconds to spend sampling each case')
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser('compare', help='compare two results files')
+    compare_parser.add_argument('baseline', help='results of the reference run')
+    compare_parser.add_argument('current', help='results of the run to check')
+    compare_parser.add_argument('--threshold', type=float, default=1.10,
+                                help='slowdown ratio reported as a regression')
+    compare_parser.add_argument('--noise-floor', type=float, default=0.005,
+                                help='ignore cases whose median is below this many ms')
+    compare_parser.add_argument('-v', '--verbose', action='store_true', help='also list unchanged cases')
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -19,6 +19,10 @@ class EigenApplication(Adw.Application):
 
         self.create_action('quit', lambda *_: self.quit(), ['<primary>q'])
         self.create_action('about', self.on_about_action)
+        self.set_accels_for_action('win.toggle-debug-overlay', ['<primary><shift>d'])
+        self.set_accels_for_action('win.toggle-profiling', ['<primary><shift>p'])
+        self.set_accels_for_action('win.undo', ['<primary>z'])
+        self.set_accels_for_action('win.redo', ['<primary><shift>z', '<primary>y'])
         # self.create_action('preferences', self.on_preferences_action)
 
     def do_activate(self):
@@ -0,0 +1,311 @@
+import argparse
+import collections
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse
+
+from . import parallel
+from .decomposition import TRUNCATION_DEFAULTS, DecompositionError, decompose_array
+from .element_types import DEFAULT_ELEMENT_TYPE, ELEMENT_TYPES
+from .matrix_import import MatrixFormatError, parse_text, read_file
+from .matrix_export import result_arrays
+
+DECOMPOSITION_KEYS = {
+    'eigen': 0,
+    'svd': 1,
+    'lu': 2,
+    'qr': 3,
+    'cholesky': 4,
+    'truncated-svd': 5,
+    'truncated-eigen': 6,
+}
+
+# Number of matrices queued per worker process; bounds the memory held
+# by results that are waiting to be written in input order.
+QUEUE_DEPTH = 4
+
+def decompose_source(name, path, text, key, truncation=None, dtype=np.float64):
+    """
+    Reads one matrix and decomposes it.
+
+    Runs in a worker process, so the matrix is read there instead of
+    being sent over from the main process.
+
+    Args:
+        name (str): Name of the matrix in the output.
+        path (str): File to read the matrix from, or None.
+        text (str): Matrix literal to parse if path is None.
+        key (int): Decomposition key.
+        truncation (tuple, optional): (k, tolerance) of a truncated decomposition.
+        dtype (numpy.dtype, optional): Element type the matrix is read as.
+
+    Returns:
+        tuple: (name, DecompositionResult, None) on success,
+               (name, None, str) with an error message if the matrix
+               could not be read or decomposed.
+    """
+    try:
+        matrix = read_file(path, dtype) if path is not None else parse_text(text, dtype)
+        return name, decompose_array(matrix, key, truncation), None
+    except (MatrixFormatError, DecompositionError) as error:
+        return name, None, str(error)
+    except Exception as error:
+        # A failure of one matrix, such as a LinAlgError from a solver,
+        # becomes its error record instead of aborting the whole batch.
+        return name, None, f'{type(error).__name__}: {error}'
+
+def iter_sources(paths, stdin):
+    """
+    Lists the matrices to process.
+
+    Files are read by path; standard input, named by '-' or used when
+    no paths are given, holds one matrix literal such as [[1, 2], [3, 4]]
+    per line.
+
+    Args:
+        paths (list of str): Input files.
+        stdin (file-like): The standard input stream.
+
+    Yields:
+        tuple: (name, path, text) for each matrix.
+    """
+    for path in paths or ['-']:
+        if path != '-':
+            yield path, path, None
+            continue
+
+        for number, line in enumerate(stdin, 1):
+            if line.strip():
+                yield f'<stdin>:{number}', None, line
+
+def iter_results(sources, key, jobs, truncation=None, dtype=np.float64):
+    """
+    Decomposes matrices across a process pool, keeping the input order.
+
+    Only a few matrices per worker are in flight at a time, so inputs
+    of any length are processed in bounded memory. The cores are shared
+    between the workers, so the parallel decompositions of large
+    matrices do not start more threads than there are cores.
+
+    Args:
+        sources (iterable of tuple): (name, path, text) for each matrix.
+        key (int): Decomposition key.
+        jobs (int): Number of worker processes; 1 runs in this process.
+        truncation (tuple, optional): (k, tolerance) of a truncated decomposition.
+        dtype (numpy.dtype, optional): Element type the matrices are read as.
+
+    Yields:
+        tuple: The outcome of decompose_source() for each matrix.
+    """
+    if jobs == 1:
+        for source in sources:
+            yield decompose_source(*source, key, truncation, dtype)
+        return
+
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=parallel.set_thread_count,
+                             initargs=(threads,)) as executor:
+        pending = collections.deque()
+        for source in sources:
+            pending.append(executor.submit(decompose_source, *source, key, truncation, dtype))
+            if len(pending) >= jobs * QUEUE_DEPTH:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def _json_array(array):
+    """
+    Converts an array to a JSON-compatible value.
+
+    Args:
+        array (ndarray or scipy.sparse array): The array to convert.
+
+    Returns:
+        list or dict: Nested lists for real arrays, of strings such as
+                      '-3/4' for rational arrays, an object with real
+                      and imag parts for complex arrays, and an object with
+                      shape, row, col and data for sparse arrays.
+    """
+    if scipy.sparse.issparse(array):
+        coo = array.tocoo()
+        return {
+            'shape': list(coo.shape),
+            'row': coo.row.tolist(),
+            'col': coo.col.tolist(),
+            'data': _json_array(coo.data),
+        }
+    if np.iscomplexobj(array):
+        return {'real': array.real.tolist(), 'imag': array.imag.tolist()}
+    array = np.asarray(array)
+    if array.dtype.hasobject:
+        return array.astype(str).tolist()
+    return array.tolist()
+
+def write_ndjson(stream, results):
+    """
+    Writes results as newline-delimited JSON, one object per matrix.
+
+    Each decomposed matrix has its factors, its diagnostics and the
+    names of the flagged diagnostics; non-finite diagnostics such as
+    the condition number of a singular matrix are written as strings.
+
+    Args:
+        stream (file-like): Binary output stream.
+        results (iterable of tuple): Outcomes of decompose_source().
+
+    Returns:
+        int: Number of matrices that failed.
+    """
+    failures = 0
+    for name, result, error in results:
+        if error is not None:
+            failures += 1
+            record = {'source': name, 'error': error}
+        else:
+            record = {
+                'source': name,
+                'decomposition': result.name,
+                'factors': {label: _json_array(factor) for label, factor in result.factors},
+            }
+            if result.diagnostics is not None:
+                record['diagnostics'] = {name: value if np.isfinite(value) else str(value)
+                                         for name, value in result.diagnostics.values().items()}
+                record['flagged'] = result.diagnostics.flagged()
+        stream.write(json.dumps(record).encode() + b'\n')
+        stream.flush()
+    return failures
+
+def write_npz(stream, results):
+    """
+    Writes results into a single .npz archive as they arrive.
+
+    Each matrix gets a matrix_i/ prefix holding a source array and
+    either an error array or the arrays described in result_arrays().
+
+    Args:
+        stream (file-like): Binary output stream; need not be seekable.
+        results (iterable of tuple): Outcomes of decompose_source().
+
+    Returns:
+        int: Number of matrices that failed.
+    """
+    failures = 0
+    with zipfile.ZipFile(stream, 'w', allowZip64=True) as archive:
+        for index, (name, result, error) in enumerate(results):
+            arrays = {'source': np.array(name)}
+            if error is not None:
+                failures += 1
+                arrays['error'] = np.array(error)
+            else:
+                arrays.update(result_arrays(result))
+
+            for array_name, array in arrays.items():
+                with archive.open(f'matrix_{index}/{array_name}.npy', 'w', force_zip64=True) as entry:
+                    np.lib.format.write_array(entry, array, allow_pickle=False)
+    return failures
+
+WRITERS = {
+    'ndjson': write_ndjson,
+    'npz': write_npz,
+}
+
+def _report_errors(results):
+    """
+    Passes results through, reporting failed matrices on standard error.
+
+    Args:
+        results (iterable of tuple): Outcomes of decompose_source().
+
+    Yields:
+        tuple: The same outcomes.
+    """
+    for name, result, error in results:
+        if error is not None:
+            print(f'eigen: {name}: {error}', file=sys.stderr)
+        yield name, result, error
+
+def build_parser(version):
+    """
+    Builds the command line parser for batch mode.
+
+    Args:
+        version (str): The application version.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog='eigen',
+        description='Decompose matrices from files or standard input without opening a window.',
+    )
+    parser.add_argument('--batch', action='store_true', required=True,
+                        help='run headless batch mode')
+    parser.add_argument('--version', action='version', version=f'%(prog)s {version}')
+    parser.add_argument('-d', '--decomposition', choices=DECOMPOSITION_KEYS, default='eigen',
+                        help='decomposition to compute (default: eigen)')
+    parser.add_argument('-k', '--rank', type=int, default=TRUNCATION_DEFAULTS[0],
+                        help='singular values or eigenvalues computed by the truncated '
+                             f'decompositions (default: {TRUNCATION_DEFAULTS[0]})')
+    parser.add_argument('--tolerance', type=float, default=TRUNCATION_DEFAULTS[1],
+                        help='convergence tolerance of the truncated decompositions '
+                             f'(default: {TRUNCATION_DEFAULTS[1]:g})')
+    parser.add_argument('-t', '--type', choices=ELEMENT_TYPES, default=DEFAULT_ELEMENT_TYPE,
+                        help='element type the matrices are read as; rational matrices get '
+                             f'exact LU and QR factors (default: {DEFAULT_ELEMENT_TYPE})')
+    parser.add_argument('-f', '--format', choices=WRITERS, default='ndjson',
+                        help='output format (default: ndjson)')
+    parser.add_argument('-o', '--output', default='-',
+                        help="output file, or '-' for standard output (default)")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('inputs', nargs='*', metavar='FILE',
+                        help="matrix files (.csv, .tsv, .txt, .npy, .mtx), or '-' for one "
+                             'matrix literal per line on standard input (default)')
+    return parser
+
+def run_batch(argv, version):
+    """
+    Runs batch mode.
+
+    Args:
+        argv (list of str): Command line arguments without the program name.
+        version (str): The application version.
+
+    Returns:
+        int: Exit status; 1 if any matrix failed, 0 otherwise.
+    """
+    parser = build_parser(version)
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if args.rank < 1:
+        parser.error('--rank must be at least 1')
+
+    sources = iter_sources(args.inputs, sys.stdin)
+    key = DECOMPOSITION_KEYS[args.decomposition]
+    results = _report_errors(iter_results(
+        sources, key, args.jobs, (args.rank, args.tolerance), ELEMENT_TYPES[args.type]
+    ))
+    writer = WRITERS[args.format]
+
+    try:
+        if args.output == '-':
+            failures = writer(sys.stdout.buffer, results)
+        else:
+            with open(args.output, 'wb') as stream:
+                failures = writer(stream, results)
+    except BrokenPipeError:
+        # The reader went away, as with `eigen --batch | head`; point
+        # stdout at /dev/null so the interpreter can exit quietly.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except OSError as error:
+        print(f'eigen: {args.output}: {error.strerror}', file=sys.stderr)
+        return 1
+
+    return 1 if failures else 0
@@ -1,7 +1,12 @@
 import sys
 
-from .application import EigenApplication
-
 def main(version):
+    if '--batch' in sys.argv[1:]:
+        # Batch mode never touches Gtk, so it runs without a display server.
+        from .cli import run_batch
+        return run_batch(sys.argv[1:], version)
+
+    from .application import EigenApplication
+
     app = EigenApplication()
     return app.run(sys.argv)
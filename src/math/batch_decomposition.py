@@ -0,0 +1,281 @@
+import numpy as np
+
+from .decomposition import DECOMPOSITIONS, DecompositionError, DecompositionResult, decompose_array
+from .diagnostics import diagnose
+from .element_types import is_exact, working_dtype
+from .sparse_utils import is_sparse
+
+class BatchDecompositionResult:
+    """
+    Represents the decompositions of a stack of same-shaped matrices.
+
+    Holds each factor stacked along a leading axis, so factor i of
+    matrix k is factors[i][1][k]. Matrices that could not be decomposed
+    are marked in failed, and their factors are filled with NaN.
+    """
+    def __init__(self, name, factors, errors, key, stack):
+        """
+        Initializes a BatchDecompositionResult object.
+
+        Args:
+            name (str): Name of the decomposition.
+            factors (list of tuple): Pairs of (label, stacked ndarray).
+            errors (list of str): Error message for each failed matrix,
+                                  None for each decomposed one.
+            key (int): Decomposition key.
+            stack (ndarray): The decomposed matrices, used to compute
+                             the diagnostics of each result.
+        """
+        self.name = name
+        self.factors = factors
+        self.errors = errors
+        self.key = key
+        self.stack = stack
+
+    def __len__(self):
+        """
+        Returns the number of matrices in the stack.
+
+        Returns:
+            int: The number of matrices.
+        """
+        return len(self.errors)
+
+    @property
+    def failed(self):
+        """
+        Returns which matrices could not be decomposed.
+
+        Returns:
+            ndarray: Boolean mask over the stack.
+        """
+        return np.array([error is not None for error in self.errors], dtype=bool)
+
+    @property
+    def nbytes(self):
+        """
+        Returns the memory used by the factors.
+
+        Returns:
+            int: Total size of all stacked factor arrays in bytes.
+        """
+        return sum(factor.nbytes for _, factor in self.factors)
+
+    def result(self, index):
+        """
+        Returns the decomposition of a single matrix of the stack.
+
+        The factors are views into the stacked arrays. Diagnostics are
+        computed on request, as for a single decomposed matrix.
+
+        Args:
+            index (int): Position of the matrix in the stack.
+
+        Returns:
+            DecompositionResult: The factors of the matrix and their
+                                 diagnostics.
+
+        Raises:
+            DecompositionError: If the matrix could not be decomposed.
+        """
+        if self.errors[index] is not None:
+            raise DecompositionError(self.errors[index])
+        factors = [(label, factor[index]) for label, factor in self.factors]
+        return DecompositionResult(self.name, factors, diagnose(self.stack[index], self.key, factors))
+
+def _decompose_each(name, func, stack, errors):
+    """
+    Decomposes the matrices of a stack one at a time.
+
+    Used only after a batched call failed, to find out which matrices
+    caused the failure.
+
+    Args:
+        name (str): Name of the decomposition.
+        func (callable): The decomposition routine.
+        stack (ndarray): The stack of matrices.
+        errors (list of str): Error messages, updated in place for
+                              matrices that fail.
+
+    Returns:
+        list of tuple: Pairs of (label, stacked ndarray).
+
+    Raises:
+        DecompositionError: If no matrix of the stack can be decomposed.
+    """
+    results = [None] * len(stack)
+    for index, a in enumerate(stack):
+        if errors[index] is not None:
+            continue
+        try:
+            results[index] = func(a)
+        except np.linalg.LinAlgError as error:
+            errors[index] = f'{name} decomposition failed: {error}'
+
+    template = next((factors for factors in results if factors is not None), None)
+    if template is None:
+        raise DecompositionError(f'{name} decomposition failed for every matrix')
+
+    stacked = []
+    for position, (label, factor) in enumerate(template):
+        dtype = np.result_type(*(factors[position][1] for factors in results if factors is not None))
+        array = np.full((len(stack),) + factor.shape, np.nan, dtype=dtype)
+        for index, factors in enumerate(results):
+            if factors is not None:
+                array[index] = factors[position][1]
+        stacked.append((label, array))
+    return stacked
+
+def decompose_stack(stack, key):
+    """
+    Runs the decomposition identified by key on a stack of matrices.
+
+    The whole stack is decomposed with a single broadcasting call into
+    LAPACK, so the cost per matrix is not dominated by Python overhead
+    when the matrices are small. Matrices with non-finite values, and
+    asymmetric matrices of a Cholesky batch, are reported as failed
+    without affecting the others; if the batched call fails, for
+    example because one matrix of a Cholesky batch is not positive
+    definite, the stack is decomposed matrix by matrix to isolate the
+    failures.
+
+    Stacks are decomposed in the type given by working_dtype(): float32
+    and complex stacks keep their type, rational stacks are decomposed
+    in float64.
+
+    Args:
+        stack (array_like): A 3-D array of shape (count, rows, cols).
+        key (int): Decomposition key, as returned by
+                   DecompositionHandler.get_selected_key().
+
+    Returns:
+        BatchDecompositionResult: The stacked factors.
+
+    Raises:
+        DecompositionError: If the key is unknown, the stack is not 3-D,
+                            or no matrix can be decomposed.
+    """
+    if key not in DECOMPOSITIONS:
+        raise DecompositionError(f'Unknown decomposition key: {key}')
+
+    stack = np.asarray(stack)
+    stack = stack.astype(working_dtype(stack.dtype), copy=False)
+    if stack.ndim != 3:
+        raise DecompositionError(f'Expected a stack of matrices, got {stack.ndim} dimensions')
+
+    name, func = DECOMPOSITIONS[key]
+    errors = [None] * len(stack)
+    valid = np.isfinite(stack).all(axis=(1, 2))
+    for index in np.flatnonzero(~valid):
+        errors[index] = 'Matrix contains non-finite values'
+    if key == 4 and stack.shape[1] == stack.shape[2]:
+        # The batched Cholesky reads only the lower triangle.
+        symmetric = np.all(np.isclose(stack, stack.conj().swapaxes(-1, -2)), axis=(1, 2))
+        for index in np.flatnonzero(valid & ~symmetric):
+            errors[index] = 'Cholesky decomposition requires a symmetric matrix'
+        valid &= symmetric
+
+    work = stack
+    if not valid.all():
+        # Replace the rejected matrices so that they cannot fail the batched
+        # call; their factors are overwritten with NaN afterwards.
+        work = stack.copy()
+        work[~valid] = np.eye(*stack.shape[1:])
+
+    try:
+        factors = func(work)
+    except np.linalg.LinAlgError:
+        factors = _decompose_each(name, func, work, errors)
+    else:
+        for _, factor in factors:
+            factor[~valid] = np.nan
+
+    return BatchDecompositionResult(name, factors, errors, key, stack)
+
+class DecompositionBatch:
+    """
+    Collects snapshots of several matrices to decompose them together.
+
+    Snapshots of the same shape and element type are stacked and
+    decomposed with one batched call per group. Rational snapshots are
+    decomposed one at a time by decompose_array(), which factors them
+    exactly where it can.
+    """
+    def __init__(self):
+        """
+        Initializes an empty DecompositionBatch object.
+        """
+        self.matrices = []
+
+    def __len__(self):
+        """
+        Returns the number of queued matrices.
+
+        Returns:
+            int: The number of matrices.
+        """
+        return len(self.matrices)
+
+    def add(self, matrix_data):
+        """
+        Queues a snapshot of matrix data in its own element type; later
+        edits do not affect it.
+
+        Args:
+            matrix_data (MatrixData or array_like): The matrix to queue.
+        """
+        if hasattr(matrix_data, 'snapshot'):
+            matrix_data = matrix_data.snapshot()
+        if is_sparse(matrix_data):
+            matrix_data = matrix_data.toarray()
+        self.matrices.append(np.array(matrix_data))
+
+    def clear(self):
+        """
+        Removes all queued matrices.
+        """
+        self.matrices.clear()
+
+    def run(self, key):
+        """
+        Decomposes every queued matrix.
+
+        Args:
+            key (int): Decomposition key.
+
+        Returns:
+            list of tuple: A (result, error) pair per queued matrix, in the
+                           order they were added, where exactly one of the two
+                           is None.
+
+        Raises:
+            DecompositionError: If the key is unknown.
+        """
+        if key not in DECOMPOSITIONS:
+            raise DecompositionError(f'Unknown decomposition key: {key}')
+
+        groups = {}
+        outcomes = [None] * len(self.matrices)
+        for index, matrix in enumerate(self.matrices):
+            if is_exact(matrix.dtype):
+                try:
+                    outcomes[index] = (decompose_array(matrix, key), None)
+                except DecompositionError as error:
+                    outcomes[index] = (None, error)
+                continue
+            groups.setdefault((matrix.shape, working_dtype(matrix.dtype)), []).append(index)
+
+        for indices in groups.values():
+            try:
+                batch = decompose_stack(np.stack([self.matrices[index] for index in indices]), key)
+            except DecompositionError as error:
+                for index in indices:
+                    outcomes[index] = (None, error)
+                continue
+
+            for position, index in enumerate(indices):
+                try:
+                    outcomes[index] = (batch.result(position), None)
+                except DecompositionError as error:
+                    outcomes[index] = (None, error)
+        return outcomes
@@ -0,0 +1,732 @@
+from fractions import Fraction
+from functools import partial
+
+import numpy as np
+import scipy.linalg
+import scipy.sparse
+import scipy.sparse.linalg
+
+from . import out_of_core, parallel
+from .diagnostics import diagnose
+from .element_types import is_exact, working_dtype
+from .instrumentation import timed
+from .structure import analyze
+
+# Number of eigenpairs or singular triplets computed for sparse matrices.
+SPARSE_TOP_K = 6
+
+# Largest number of cells a sparse matrix may have to be densified for
+# decompositions that have no sparse algorithm.
+SPARSE_DENSE_LIMIT = 1 << 22
+
+# Number of eigenpairs or singular triplets approximated for matrices
+# stored out of core.
+OUT_OF_CORE_TOP_K = 6
+
+# Default (k, tolerance) of the truncated decompositions: the number of
+# singular triplets or eigenpairs computed, and the relative tolerance
+# at which their iterative solvers stop.
+TRUNCATION_DEFAULTS = (6, 1e-6)
+
+# Largest order of rational matrices decomposed exactly; larger ones,
+# and decompositions without an exact algorithm, run in float64.
+EXACT_MAX_SIZE = 64
+
+# Oversampling and largest number of power iterations of the randomized
+# SVD; the power iterations stop early once the tolerance is met.
+RANDOMIZED_OVERSAMPLING = 10
+RANDOMIZED_POWER_ITERATIONS = 8
+
+class DecompositionError(Exception):
+    """
+    Raised when a decomposition cannot be computed for the given matrix.
+    """
+
+class DecompositionResult:
+    """
+    Represents the outcome of a matrix decomposition.
+
+    Holds the decomposition name, its factors as an ordered list of
+    (label, ndarray) pairs, and the accuracy measures of the factors.
+    """
+    def __init__(self, name, factors, diagnostics=None):
+        """
+        Initializes a DecompositionResult object.
+
+        Args:
+            name (str): Name of the decomposition.
+            factors (list of tuple): Pairs of (label, ndarray).
+            diagnostics (Diagnostics, optional): Accuracy measures, as
+                                                 computed by diagnose().
+        """
+        self.name = name
+        self.factors = factors
+        self.diagnostics = diagnostics
+
+    @property
+    def nbytes(self):
+        """
+        Returns the memory used by the factors.
+
+        Returns:
+            int: Total size of all factor arrays in bytes.
+        """
+        return sum(_nbytes(factor) for _, factor in self.factors)
+
+    def to_text(self, precision=4):
+        """
+        Formats the factors as human-readable text.
+
+        Args:
+            precision (int, optional): Number of digits after the decimal point.
+
+        Returns:
+            str: The formatted factors.
+        """
+        blocks = []
+        for label, factor in self.factors:
+            if scipy.sparse.issparse(factor):
+                shape = '×'.join(map(str, factor.shape))
+                blocks.append(f'{label} = sparse {shape}, {factor.nnz} nonzeros')
+                continue
+            # Rationals are shown exactly, as fractions.
+            array = np.array2string(
+                factor, precision=precision, suppress_small=True, formatter={'object': str}
+            )
+            blocks.append(f'{label} =\n{array}')
+        return '\n\n'.join(blocks)
+
+def _nbytes(factor):
+    """
+    Returns the memory used by a dense or sparse factor.
+
+    Args:
+        factor (ndarray or scipy.sparse array): The factor.
+
+    Returns:
+        int: Size of the factor's arrays in bytes.
+    """
+    if scipy.sparse.issparse(factor):
+        parts = (getattr(factor, name, None) for name in ('data', 'indices', 'indptr', 'row', 'col'))
+        return sum(part.nbytes for part in parts if isinstance(part, np.ndarray))
+    return factor.nbytes
+
+def _require_square(a, name):
+    """
+    Raises DecompositionError if the matrix is not square.
+
+    Args:
+        a (ndarray): The matrix, or a stack of matrices along the first axis.
+        name (str): Name of the decomposition, used in the error message.
+    """
+    if a.shape[-2] != a.shape[-1]:
+        raise DecompositionError(f'{name} decomposition requires a square matrix')
+
+def _eigen(a):
+    _require_square(a, 'Eigen')
+    eigenvalues, eigenvectors = np.linalg.eig(a)
+    return [('λ', eigenvalues), ('V', eigenvectors)]
+
+def _svd(a):
+    u, s, vt = np.linalg.svd(a)
+    return [('U', u), ('Σ', s), ('Vᵀ', vt)]
+
+def _lu(a):
+    p, l, u = scipy.linalg.lu(a)
+    return [('P', p), ('L', l), ('U', u)]
+
+def _qr(a):
+    q, r = np.linalg.qr(a)
+    return [('Q', q), ('R', r)]
+
+def _cholesky(a):
+    _require_square(a, 'Cholesky')
+    return [('L', np.linalg.cholesky(a))]
+
+def _symmetric_eigen(a):
+    eigenvalues, eigenvectors = np.linalg.eigh(a)
+    return [('λ', eigenvalues), ('V', eigenvectors)]
+
+def _banded_symmetric_eigen(a, bandwidth):
+    n = a.shape[0]
+    # Lower band storage: band[k, j] holds a[j + k, j].
+    band = np.zeros((bandwidth + 1, n), dtype=a.dtype)
+    for k in range(bandwidth + 1):
+        band[k, :n - k] = np.diagonal(a, -k)
+    eigenvalues, eigenvectors = scipy.linalg.eig_banded(band, lower=True, check_finite=False)
+    return [('λ', eigenvalues), ('V', eigenvectors)]
+
+def _diagonal_eigen(a):
+    return [('λ', np.diagonal(a).copy()), ('V', np.eye(a.shape[0]))]
+
+def _diagonal_svd(a):
+    diagonal = np.diagonal(a)
+    order = np.argsort(-np.abs(diagonal), kind='stable')
+    identity = np.eye(a.shape[0])
+    singular_values = np.abs(diagonal[order])
+    # Signs, or phases of complex entries, go into U.
+    phases = diagonal[order] / np.where(singular_values == 0.0, 1.0, singular_values)
+    phases[singular_values == 0.0] = 1.0
+    return [('U', identity[:, order] * phases), ('Σ', singular_values), ('Vᵀ', identity[order])]
+
+def _triangular_lu(a, structure):
+    n = a.shape[0]
+    if structure.upper_triangular:
+        return [('P', np.eye(n)), ('L', np.eye(n)), ('U', a.copy())]
+
+    # A lower triangular matrix with a nonzero diagonal d factors
+    # without pivoting as (A D⁻¹) D.
+    diagonal = np.diagonal(a)
+    return [('P', np.eye(n)), ('L', a / diagonal), ('U', np.diag(diagonal))]
+
+def _banded_lu(a, lower, upper):
+    n = a.shape[0]
+    # General band storage with room for the fill-in of row interchanges:
+    # band[lower + upper + i - j, j] holds a[i, j].
+    band = np.zeros((2 * lower + upper + 1, n), dtype=a.dtype)
+    for k in range(-upper, lower + 1):
+        row = lower + upper + k
+        if k >= 0:
+            band[row, :n - k] = np.diagonal(a, -k)
+        else:
+            band[row, -k:] = np.diagonal(a, -k)
+
+    gbtrf, = scipy.linalg.get_lapack_funcs(('gbtrf',), (band,))
+    lu, pivots, info = gbtrf(band, lower, upper)
+    if info < 0:
+        raise np.linalg.LinAlgError(f'Illegal value in argument {-info} of {gbtrf.typecode}gbtrf')
+
+    # gbtrf applies each row interchange only to the multipliers of later
+    # columns; replay them on the earlier columns to get A = P L U.
+    l = np.eye(n, dtype=a.dtype)
+    permutation = np.arange(n)
+    for j in range(n):
+        pivot = pivots[j]
+        if pivot != j:
+            l[[j, pivot], :j] = l[[pivot, j], :j]
+            permutation[[j, pivot]] = permutation[[pivot, j]]
+        count = min(lower, n - j - 1)
+        l[j + 1:j + 1 + count, j] = lu[lower + upper + 1:lower + upper + 1 + count, j]
+
+    u = np.zeros((n, n), dtype=a.dtype)
+    for k in range(min(lower + upper + 1, n)):
+        index = np.arange(n - k)
+        u[index, index + k] = lu[lower + upper - k, k:]
+
+    p = np.zeros((n, n))
+    p[permutation, np.arange(n)] = 1.0
+    return [('P', p), ('L', l), ('U', u)]
+
+def _triangular_qr(a):
+    rows, cols = a.shape
+    k = min(rows, cols)
+    return [('Q', np.eye(rows, k)), ('R', a[:k].copy())]
+
+def _diagonal_cholesky(a):
+    return [('L', np.diag(np.sqrt(np.diagonal(a))))]
+
+def _banded_cholesky(a, bandwidth):
+    n = a.shape[0]
+    band = np.zeros((bandwidth + 1, n), dtype=a.dtype)
+    for k in range(bandwidth + 1):
+        band[k, :n - k] = np.diagonal(a, -k)
+    factor = scipy.linalg.cholesky_banded(band, lower=True, check_finite=False)
+
+    l = np.zeros((n, n), dtype=a.dtype)
+    for k in range(min(bandwidth + 1, n)):
+        index = np.arange(n - k)
+        l[index + k, index] = factor[k, :n - k]
+    return [('L', l)]
+
+def _exact_lu(a):
+    # Gaussian elimination in rational arithmetic. Any nonzero pivot is
+    # exact, so the first one in each column is taken.
+    rows, cols = a.shape
+    k = min(rows, cols)
+    u = a.copy()
+    l = np.zeros((rows, k), dtype=object)
+    permutation = np.arange(rows)
+    for j in range(k):
+        nonzero = np.flatnonzero(u[j:, j])
+        if len(nonzero) > 0:
+            pivot = j + nonzero[0]
+            u[[j, pivot]] = u[[pivot, j]]
+            l[[j, pivot], :j] = l[[pivot, j], :j]
+            permutation[[j, pivot]] = permutation[[pivot, j]]
+            l[j + 1:, j] = u[j + 1:, j] / u[j, j]
+            u[j + 1:, j:] -= np.outer(l[j + 1:, j], u[j, j:])
+        l[j, j] = Fraction(1)
+
+    p = np.zeros((rows, rows), dtype=object)
+    p.fill(Fraction(0))
+    p[permutation, np.arange(rows)] = Fraction(1)
+    return [('P', p), ('L', l + Fraction(0)), ('U', u[:k])]
+
+def _exact_qr(a):
+    # Normalizing Q takes square roots, which are not rational; Gram-Schmidt
+    # without normalization gives A = Q R exactly, with orthogonal columns
+    # in Q and a unit upper triangular R.
+    rows, cols = a.shape
+    q = np.zeros((rows, cols), dtype=object)
+    r = np.zeros((cols, cols), dtype=object) + Fraction(0)
+    norms = []
+    for j in range(cols):
+        column = a[:, j].copy()
+        for i, norm in enumerate(norms):
+            if norm != 0:
+                r[i, j] = q[:, i].dot(a[:, j]) / norm
+                column -= r[i, j] * q[:, i]
+        q[:, j] = column
+        norms.append(column.dot(column))
+        r[j, j] = Fraction(1)
+    return [('Q', q), ('R', r)]
+
+# Exact counterparts of LU and QR for rational matrices of order up to
+# EXACT_MAX_SIZE.
+EXACT_DECOMPOSITIONS = {
+    2: _exact_lu,
+    3: _exact_qr,
+}
+
+def _require_positive_definite(structure):
+    """
+    Raises DecompositionError if the matrix cannot be positive definite.
+
+    Only checks the conditions that are cheap to test; matrices passing
+    them may still fail during the factorization.
+
+    Args:
+        structure (MatrixStructure): Structure of the matrix.
+    """
+    if not structure.symmetric:
+        raise DecompositionError('Cholesky decomposition requires a symmetric matrix')
+    if not structure.positive_diagonal:
+        raise DecompositionError(
+            'Cholesky decomposition requires a positive definite matrix, '
+            'but the diagonal has entries that are not positive'
+        )
+
+def _structured_routine(a, key):
+    """
+    Picks the cheapest correct algorithm for the structure of a dense matrix.
+
+    Args:
+        a (ndarray): A 2-D matrix.
+        key (int): Decomposition key.
+
+    Returns:
+        callable: A function taking the matrix and returning its factors,
+                  or None to use the general algorithm.
+
+    Raises:
+        DecompositionError: If Cholesky is requested for a matrix that
+                            cannot be positive definite.
+    """
+    structure = analyze(a)
+    if key == 4:
+        _require_square(a, 'Cholesky')
+        _require_positive_definite(structure)
+        if structure.diagonal:
+            return _diagonal_cholesky
+        if structure.banded:
+            return lambda a: _banded_cholesky(a, structure.lower_bandwidth)
+        return None
+
+    if not structure.square:
+        if key == 3 and structure.upper_triangular:
+            return _triangular_qr
+        return None
+
+    if key == 0:
+        if structure.diagonal:
+            return _diagonal_eigen
+        if structure.symmetric and structure.banded:
+            return lambda a: _banded_symmetric_eigen(a, structure.lower_bandwidth)
+        if structure.symmetric:
+            return _symmetric_eigen
+    elif key == 1:
+        if structure.diagonal:
+            return _diagonal_svd
+    elif key == 2:
+        if structure.upper_triangular or (structure.lower_triangular and np.all(np.diagonal(a) != 0.0)):
+            return lambda a: _triangular_lu(a, structure)
+        if structure.banded:
+            return lambda a: _banded_lu(a, structure.lower_bandwidth, structure.upper_bandwidth)
+    elif key == 3:
+        if structure.upper_triangular:
+            return _triangular_qr
+    return None
+
+def _is_symmetric(a, tolerance=1e-12):
+    """
+    Checks whether a sparse matrix is symmetric, or Hermitian if it is
+    complex, up to a relative tolerance.
+
+    Args:
+        a (scipy.sparse array): A square matrix.
+        tolerance (float, optional): Allowed relative asymmetry.
+
+    Returns:
+        bool: True if the matrix is symmetric or Hermitian.
+    """
+    difference = abs(a - a.T.conj())
+    if difference.nnz == 0:
+        return True
+    return difference.max() <= tolerance * abs(a).max()
+
+def _permutation(rows, cols, n):
+    """
+    Builds a sparse permutation matrix.
+
+    Args:
+        rows (ndarray): Row indices of the ones.
+        cols (ndarray): Column indices of the ones.
+        n (int): Order of the matrix.
+
+    Returns:
+        scipy.sparse.csr_array: The permutation matrix.
+    """
+    return scipy.sparse.csr_array((np.ones(n), (rows, cols)), shape=(n, n))
+
+def _sparse_eigen(a):
+    _require_square(a, 'Eigen')
+    k = min(SPARSE_TOP_K, a.shape[0] - 2)
+    if _is_symmetric(a):
+        eigenvalues, eigenvectors = scipy.sparse.linalg.eigsh(a, k=k, which='LM')
+    else:
+        eigenvalues, eigenvectors = scipy.sparse.linalg.eigs(a, k=k, which='LM')
+
+    order = np.argsort(-np.abs(eigenvalues))
+    return [('λ', eigenvalues[order]), ('V', eigenvectors[:, order])]
+
+def _sparse_svd(a):
+    k = min(SPARSE_TOP_K, min(a.shape) - 1)
+    u, s, vt = scipy.sparse.linalg.svds(a, k=k)
+    order = np.argsort(-s)
+    return [('U', u[:, order]), ('Σ', s[order]), ('Vᵀ', vt[order])]
+
+def _sparse_lu(a):
+    _require_square(a, 'Sparse LU')
+    n = a.shape[0]
+    try:
+        lu = scipy.sparse.linalg.splu(a.tocsc())
+    except RuntimeError as error:
+        # SuperLU stops at an exactly zero pivot; dense LU does not.
+        return _densify_after_failure(_lu, 'LU', a, error)
+    arange = np.arange(n)
+    # SuperLU factors Pr A Pc = L U; the factors are returned as A = P L U Q.
+    p = _permutation(arange, lu.perm_r, n)
+    q = _permutation(lu.perm_c, arange, n)
+    return [('P', p), ('L', lu.L.tocsr()), ('U', lu.U.tocsr()), ('Q', q)]
+
+def _sparse_cholesky(a):
+    _require_square(a, 'Cholesky')
+    if not _is_symmetric(a):
+        raise DecompositionError('Cholesky decomposition requires a symmetric matrix')
+
+    # Without pivoting and with a symmetric ordering, SuperLU computes
+    # Pᵀ A P = L D Lᵀ for symmetric positive-definite input.
+    try:
+        lu = scipy.sparse.linalg.splu(
+            a.tocsc(),
+            permc_spec='MMD_AT_PLUS_A',
+            diag_pivot_thresh=0.0,
+            options={'SymmetricMode': True}
+        )
+    except RuntimeError as error:
+        return _densify_after_failure(_cholesky, 'Cholesky', a, error)
+    diagonal = lu.U.diagonal()
+    if not np.array_equal(lu.perm_r, lu.perm_c) or np.any(diagonal.real <= 0.0):
+        # Let the dense factorization decide, so that sparse and dense
+        # input of the same matrix give the same outcome.
+        return _densify_after_failure(_cholesky, 'Cholesky', a, 'Matrix is not positive definite')
+
+    n = a.shape[0]
+    p = _permutation(np.arange(n), lu.perm_c, n)
+    l = (lu.L @ scipy.sparse.diags_array(np.sqrt(diagonal))).tocsr()
+    return [('P', p), ('L', l)]
+
+def _densify_after_failure(func, name, a, error):
+    """
+    Decomposes sparse input densely after the sparse algorithm failed.
+
+    Args:
+        func (callable): The dense decomposition.
+        name (str): Name of the decomposition, used in the error message.
+        a (scipy.sparse array): The matrix.
+        error (Exception or str): Why the sparse algorithm failed.
+
+    Returns:
+        list of tuple: The dense factors.
+
+    Raises:
+        DecompositionError: If the matrix is too large to densify.
+    """
+    if a.shape[0] * a.shape[1] > SPARSE_DENSE_LIMIT:
+        raise DecompositionError(f'{name} decomposition failed: {error}')
+    return func(a.toarray())
+
+def _sparse_dense_fallback(func, name):
+    """
+    Wraps a dense decomposition for sparse input that is small enough to densify.
+
+    Args:
+        func (callable): The dense decomposition.
+        name (str): Name of the decomposition, used in the error message.
+
+    Returns:
+        callable: The wrapped decomposition.
+    """
+    def wrapper(a):
+        if a.shape[0] * a.shape[1] > SPARSE_DENSE_LIMIT:
+            raise DecompositionError(f'{name} decomposition is not available for sparse matrices of this size')
+        return func(a.toarray())
+    return wrapper
+
+# The dense routines broadcast over leading axes, so they also
+# decompose stacks of matrices in a single call.
+DECOMPOSITIONS = {
+    0: ('Eigen', _eigen),
+    1: ('SVD', _svd),
+    2: ('LU', _lu),
+    3: ('QR', _qr),
+    4: ('Cholesky', _cholesky),
+}
+
+# Sparse counterparts: top-k eigenpairs and singular triplets via ARPACK,
+# LU and Cholesky via SuperLU. QR has no sparse algorithm in SciPy.
+SPARSE_DECOMPOSITIONS = {
+    0: _sparse_eigen,
+    1: _sparse_svd,
+    2: _sparse_lu,
+    3: _sparse_dense_fallback(_qr, 'QR'),
+    4: _sparse_cholesky,
+}
+
+def _out_of_core_eigen(a):
+    _require_square(a, 'Eigen')
+    if not out_of_core.is_symmetric(a):
+        raise DecompositionError('Eigen decomposition of matrices this large requires a symmetric matrix')
+    eigenvalues, eigenvectors = out_of_core.randomized_eigh(a, OUT_OF_CORE_TOP_K)
+    return [('λ', eigenvalues), ('V', eigenvectors)]
+
+def _out_of_core_svd(a):
+    u, s, vt = out_of_core.randomized_svd(a, OUT_OF_CORE_TOP_K)
+    return [('U', u), ('Σ', s), ('Vᵀ', vt)]
+
+def _out_of_core_qr(a):
+    rows, cols = a.shape
+    if rows < cols or cols * cols * 8 > out_of_core.MEMORY_LIMIT:
+        raise DecompositionError(
+            'QR decomposition of matrices this large is only available for tall matrices '
+            'whose R factor fits in memory'
+        )
+    q, r = out_of_core.tiled_qr(a)
+    return [('Q', q), ('R', r)]
+
+def _out_of_core_unavailable(name):
+    """
+    Builds a decomposition that reports it cannot run out of core.
+
+    Args:
+        name (str): Name of the decomposition, used in the error message.
+
+    Returns:
+        callable: The decomposition.
+    """
+    def unavailable(a):
+        raise DecompositionError(f'{name} decomposition is not available for matrices this large')
+    return unavailable
+
+# Counterparts for memory-mapped matrices, which read the matrix in row
+# blocks: top-k eigenpairs (symmetric input only) and singular triplets
+# via randomized range finding, QR via TSQR. LU and Cholesky need the
+# whole matrix in memory.
+OUT_OF_CORE_DECOMPOSITIONS = {
+    0: _out_of_core_eigen,
+    1: _out_of_core_svd,
+    2: _out_of_core_unavailable('LU'),
+    3: _out_of_core_qr,
+    4: _out_of_core_unavailable('Cholesky'),
+}
+
+def _parallel_lu(a):
+    p, l, u = parallel.lu(a)
+    return [('P', p), ('L', l), ('U', u)]
+
+def _parallel_qr(a):
+    q, r = parallel.qr(a)
+    return [('Q', q), ('R', r)]
+
+def _parallel_cholesky(a):
+    return [('L', parallel.cholesky(a))]
+
+# Tiled counterparts for large dense matrices, which run their tile
+# tasks on parallel.thread_count() threads. Cholesky input has already
+# been checked by _structured_routine().
+PARALLEL_DECOMPOSITIONS = {
+    2: _parallel_lu,
+    3: _parallel_qr,
+    4: _parallel_cholesky,
+}
+
+def _row_block_operator(a):
+    """
+    Wraps a memory-mapped matrix as a linear operator that multiplies
+    vectors one row block at a time.
+
+    Args:
+        a (numpy.memmap): A 2-D matrix.
+
+    Returns:
+        scipy.sparse.linalg.LinearOperator: The operator.
+    """
+    def matvec(x):
+        return np.concatenate([block @ x for _, _, block in out_of_core.iter_row_blocks(a)])
+    return scipy.sparse.linalg.LinearOperator(a.shape, matvec=matvec, dtype=a.dtype)
+
+def _truncated_svd(a, k, tolerance):
+    u, s, vt = out_of_core.randomized_svd(
+        a, k,
+        oversampling=RANDOMIZED_OVERSAMPLING,
+        power_iterations=RANDOMIZED_POWER_ITERATIONS,
+        tolerance=tolerance
+    )
+    return [('U', u), ('Σ', s), ('Vᵀ', vt)]
+
+def _truncated_eigen(a, k, tolerance):
+    _require_square(a, 'Truncated Eigen')
+    n = a.shape[0]
+    if scipy.sparse.issparse(a):
+        symmetric = _is_symmetric(a)
+    else:
+        symmetric = out_of_core.is_symmetric(a)
+
+    if k >= n - 1:
+        # ARPACK needs k < n - 1; such small matrices are decomposed densely.
+        dense = a.toarray() if scipy.sparse.issparse(a) else np.asarray(a)
+        eigenvalues, eigenvectors = (np.linalg.eigh if symmetric else np.linalg.eig)(dense)
+    else:
+        # Lanczos for symmetric matrices, Arnoldi otherwise.
+        operator = _row_block_operator(a) if out_of_core.is_file_backed(a) else a
+        solver = scipy.sparse.linalg.eigsh if symmetric else scipy.sparse.linalg.eigs
+        eigenvalues, eigenvectors = solver(operator, k=k, which='LM', tol=tolerance)
+
+    order = np.argsort(-np.abs(eigenvalues))[:k]
+    return [('λ', eigenvalues[order]), ('V', eigenvectors[:, order])]
+
+# Truncated counterparts of Eigen and SVD returning only the k dominant
+# eigenpairs or singular triplets, for dense, sparse and memory-mapped
+# input alike. They take (a, k, tolerance) and do not broadcast.
+TRUNCATED_DECOMPOSITIONS = {
+    5: ('Truncated SVD', _truncated_svd),
+    6: ('Truncated Eigen', _truncated_eigen),
+}
+
+@timed('factorization')
+def decompose_array(a, key, truncation=None):
+    """
+    Runs the decomposition identified by key on an array.
+
+    Dense matrices are analyzed first and routed to the cheapest correct
+    algorithm for their structure: symmetric or banded eigensolvers,
+    banded LU and Cholesky, and no factoring at all for diagonal or
+    triangular input. Sparse input is decomposed with sparse algorithms;
+    Eigen and SVD then return only the SPARSE_TOP_K largest eigenpairs
+    or singular triplets. Memory-mapped input is decomposed out of core,
+    one row block at a time, with OUT_OF_CORE_TOP_K eigenpairs or
+    singular triplets. Large general matrices get tiled LU, QR and
+    Cholesky factorizations that run on several threads.
+
+    Every result carries the accuracy measures computed by diagnose()
+    from its factors.
+
+    The truncated decompositions compute the k dominant singular triplets
+    with a randomized SVD, or eigenpairs with Lanczos or Arnoldi iteration,
+    in a fraction of the time of the full decompositions.
+
+    float32 and complex input is decomposed in its own type, other
+    numeric input in float64. Rational (object) matrices of order up to
+    EXACT_MAX_SIZE get exact LU and QR factors; their other
+    decompositions run in float64.
+
+    Args:
+        a (array_like, numpy.memmap or scipy.sparse array): The matrix to decompose.
+        key (int): Decomposition key, as returned by
+                   DecompositionHandler.get_selected_key().
+        truncation (tuple, optional): (k, tolerance) of a truncated decomposition.
+                                      Defaults to TRUNCATION_DEFAULTS.
+
+    Returns:
+        DecompositionResult: The computed factors.
+
+    Raises:
+        DecompositionError: If the key is unknown or the decomposition fails.
+    """
+    truncated = key in TRUNCATED_DECOMPOSITIONS
+    if truncated:
+        name, func = TRUNCATED_DECOMPOSITIONS[key]
+        k, tolerance = truncation or TRUNCATION_DEFAULTS
+        if k < 1:
+            raise DecompositionError(f'{name} decomposition requires k of at least 1')
+        func = partial(func, k=k, tolerance=tolerance)
+    elif key in DECOMPOSITIONS:
+        name, func = DECOMPOSITIONS[key]
+    else:
+        raise DecompositionError(f'Unknown decomposition key: {key}')
+
+    errors = (np.linalg.LinAlgError, RuntimeError, scipy.sparse.linalg.ArpackError)
+    if out_of_core.is_file_backed(a) and a.ndim == 2:
+        if not out_of_core.all_finite(a):
+            raise DecompositionError('Matrix contains non-finite values')
+        try:
+            factors = (func if truncated else OUT_OF_CORE_DECOMPOSITIONS[key])(a)
+        except errors as error:
+            raise DecompositionError(f'{name} decomposition failed: {error}') from error
+        return DecompositionResult(name, factors, diagnose(a, key, factors))
+
+    if scipy.sparse.issparse(a) and (truncated or min(a.shape) > SPARSE_TOP_K + 1):
+        a = scipy.sparse.csr_array(a, dtype=working_dtype(a.dtype))
+        values = a.data
+        if not truncated:
+            func = SPARSE_DECOMPOSITIONS[key]
+    else:
+        a = np.asarray(a.toarray() if scipy.sparse.issparse(a) else a)
+        if is_exact(a.dtype) and key in EXACT_DECOMPOSITIONS and a.ndim == 2 and max(a.shape) <= EXACT_MAX_SIZE:
+            factors = EXACT_DECOMPOSITIONS[key](a)
+            return DecompositionResult(name, factors, diagnose(a, key, factors))
+        a = values = a.astype(working_dtype(a.dtype), copy=False)
+
+    if not np.all(np.isfinite(values)):
+        raise DecompositionError('Matrix contains non-finite values')
+
+    if not truncated and not scipy.sparse.issparse(a) and a.ndim == 2:
+        structured = _structured_routine(a, key)
+        if structured is not None:
+            func = structured
+        elif key in PARALLEL_DECOMPOSITIONS and parallel.is_worthwhile(a):
+            func = PARALLEL_DECOMPOSITIONS[key]
+
+    try:
+        factors = func(a)
+    except errors as error:
+        raise DecompositionError(f'{name} decomposition failed: {error}') from error
+
+    return DecompositionResult(name, factors, diagnose(a, key, factors))
+
+def decompose(matrix_data, key, truncation=None):
+    """
+    Runs the decomposition identified by key on matrix data.
+
+    Args:
+        matrix_data (MatrixData): The matrix data.
+        key (int): Decomposition key, as returned by
+                   DecompositionHandler.get_selected_key().
+        truncation (tuple, optional): (k, tolerance) of a truncated decomposition.
+
+    Returns:
+        DecompositionResult: The computed factors.
+    """
+    if matrix_data.is_sparse or matrix_data.is_file_backed:
+        return decompose_array(matrix_data.snapshot(), key, truncation)
+    return decompose_array(matrix_data.data, key, truncation)
@@ -0,0 +1,381 @@
+import numpy as np
+
+from . import out_of_core
+from .instrumentation import timed
+from .sparse_utils import is_sparse
+
+# Number of random probe vectors the residual and orthogonality errors
+# are estimated with. Each costs a few matrix-vector products, so the
+# estimates take O(n²) time instead of the O(n³) of forming A - factors.
+PROBES = 8
+
+# Names of the measures, in the order they are shown.
+MEASURES = ('residual', 'condition', 'orthogonality', 'pivot_growth')
+
+class Diagnostics:
+    """
+    Represents the accuracy measures of a decomposition result.
+
+    Every measure is None when it does not apply to the decomposition:
+
+    - residual: ‖A − factors‖_F / ‖A‖_F, or for eigenpairs and singular
+      triplets ‖AV − VΛ‖_F / ‖A‖_F and ‖AV − UΣ‖_F / ‖A‖_F, estimated
+      with random probe vectors.
+    - condition: Condition number of the matrix, exact from singular
+      values or eigenvalues of Hermitian matrices, otherwise a LAPACK
+      1-norm estimate from the triangular factors.
+    - orthogonality: ‖QᴴQ − I‖_F of the factors that should have
+      orthonormal columns or rows, estimated with probe vectors.
+    - pivot_growth: max |U| / max |A| of an LU factorization.
+
+    A measure is flagged when the error it implies exceeds the square root
+    of the unit roundoff, that is when about half of the digits are lost.
+    """
+    def __init__(self, eps, residual=None, condition=None, orthogonality=None, pivot_growth=None):
+        """
+        Initializes a Diagnostics object.
+
+        Args:
+            eps (float): Unit roundoff of the type the factors were computed in.
+            residual (float, optional): Relative reconstruction residual.
+            condition (float, optional): Condition number estimate.
+            orthogonality (float, optional): Orthogonality error.
+            pivot_growth (float, optional): Pivot growth factor of LU.
+        """
+        self.eps = eps
+        self.residual = residual
+        self.condition = condition
+        self.orthogonality = orthogonality
+        self.pivot_growth = pivot_growth
+
+    def values(self):
+        """
+        Returns the measures that apply to the decomposition.
+
+        Returns:
+            dict: Mapping of measure names from MEASURES to floats.
+        """
+        values = {}
+        for name in MEASURES:
+            value = getattr(self, name)
+            if value is not None:
+                values[name] = value
+        return values
+
+    def flagged(self):
+        """
+        Returns the measures that indicate an inaccurate result.
+
+        The pivot growth g scales the backward error of LU as g eps,
+        and the condition number κ bounds the relative forward error
+        by about κ eps.
+
+        Returns:
+            list of str: Names of the flagged measures, in MEASURES order.
+        """
+        limit = np.sqrt(self.eps)
+        bounds = {
+            'residual': self.residual,
+            'condition': None if self.condition is None else self.condition * self.eps,
+            'orthogonality': self.orthogonality,
+            'pivot_growth': None if self.pivot_growth is None else self.pivot_growth * self.eps,
+        }
+        # NaN measures come from non-finite factors and are flagged too.
+        return [name for name, bound in bounds.items() if bound is not None and not bound <= limit]
+
+    def to_text(self, precision=3):
+        """
+        Formats the measures as one 'name = value' line each.
+
+        Args:
+            precision (int, optional): Number of significant digits.
+
+        Returns:
+            str: The formatted measures, flagged ones marked as such.
+        """
+        flagged = self.flagged()
+        lines = []
+        for name, value in self.values().items():
+            mark = ' (inaccurate)' if name in flagged else ''
+            lines.append(f'{name} = {value:.{precision}g}{mark}')
+        return '\n'.join(lines)
+
+def _numeric(array):
+    """
+    Converts rational factors to float64 so they can be measured.
+
+    Args:
+        array (ndarray or scipy.sparse array): A matrix or factor.
+
+    Returns:
+        ndarray or scipy.sparse array: The array, as float64 if it held objects.
+    """
+    return array.astype(np.float64) if array.dtype.hasobject else array
+
+def _product(a, x):
+    """
+    Computes a @ x, over row blocks for memory-mapped matrices.
+
+    Args:
+        a (ndarray, numpy.memmap or scipy.sparse array): A 2-D matrix.
+        x (ndarray): A 2-D array.
+
+    Returns:
+        ndarray: The product.
+    """
+    if out_of_core.is_file_backed(a):
+        return np.concatenate([block @ x for _, _, block in out_of_core.iter_row_blocks(a)])
+    return a @ x
+
+def _adjoint_product(a, y):
+    """
+    Computes aᴴ @ y, over row blocks for memory-mapped matrices.
+
+    Args:
+        a (ndarray, numpy.memmap or scipy.sparse array): A 2-D matrix.
+        y (ndarray): A 2-D array with as many rows as a.
+
+    Returns:
+        ndarray: The product.
+    """
+    if not out_of_core.is_file_backed(a):
+        return a.T.conj() @ y
+    result = np.zeros((a.shape[1], y.shape[1]), dtype=np.result_type(a.dtype, y.dtype))
+    for start, stop, block in out_of_core.iter_row_blocks(a):
+        result += block.T.conj() @ y[start:stop]
+    return result
+
+def _frobenius(a):
+    """
+    Returns the Frobenius norm of a dense, sparse or memory-mapped matrix.
+
+    Args:
+        a (ndarray, numpy.memmap or scipy.sparse array): A 2-D matrix.
+
+    Returns:
+        float: The norm.
+    """
+    if is_sparse(a):
+        return float(np.linalg.norm(a.tocsr().data))
+    if out_of_core.is_file_backed(a):
+        return float(np.sqrt(sum(np.linalg.norm(block) ** 2 for _, _, block in out_of_core.iter_row_blocks(a))))
+    return float(np.linalg.norm(a))
+
+def _max_abs(a):
+    """
+    Returns the largest magnitude in a dense or sparse matrix.
+
+    Args:
+        a (ndarray or scipy.sparse array): A 2-D matrix.
+
+    Returns:
+        float: The largest magnitude, 0 for empty matrices.
+    """
+    values = a.tocsr().data if is_sparse(a) else np.asarray(a)
+    return float(np.abs(values).max()) if values.size else 0.0
+
+def _probe_norm(residuals):
+    """
+    Estimates ‖E‖_F from E X for a Gaussian probe matrix X with PROBES
+    columns, since E‖E X‖²_F = PROBES ‖E‖²_F.
+
+    Args:
+        residuals (ndarray): The product E X.
+
+    Returns:
+        float: The estimate.
+    """
+    return float(np.linalg.norm(residuals) / np.sqrt(PROBES))
+
+def _orthogonality(q, rng, rows=False):
+    """
+    Estimates ‖QᴴQ − I‖_F, or ‖QQᴴ − I‖_F for orthonormal rows.
+
+    Args:
+        q (ndarray or numpy.memmap): The factor.
+        rng (numpy.random.Generator): Source of the probe vectors.
+        rows (bool, optional): Whether the rows rather than the columns
+                               should be orthonormal.
+
+    Returns:
+        float: The estimated orthogonality error.
+    """
+    if rows:
+        x = rng.standard_normal((q.shape[0], PROBES))
+        return _probe_norm(_product(q, _adjoint_product(q, x)) - x)
+    x = rng.standard_normal((q.shape[1], PROBES))
+    return _probe_norm(_adjoint_product(q, _product(q, x)) - x)
+
+def _reciprocal_condition(name, factor, *args, **kwargs):
+    """
+    Runs a LAPACK condition number estimator on a triangular factor.
+
+    Args:
+        name (str): Name of the routine without its type prefix,
+                    such as 'gecon'.
+        factor (ndarray): The factor, in the layout the routine expects.
+        *args: Further arguments of the routine.
+        **kwargs: Keyword arguments of the routine.
+
+    Returns:
+        float: Estimated condition number, inf for singular matrices.
+    """
+    import scipy.linalg
+
+    routine, = scipy.linalg.get_lapack_funcs((name,), (factor,))
+    rcond, info = routine(factor, *args, **kwargs)
+    if info != 0 or rcond == 0.0:
+        return float('inf')
+    return float(1.0 / rcond)
+
+def _is_hermitian(a):
+    """
+    Checks whether a square matrix equals its conjugate transpose.
+
+    Args:
+        a (ndarray, numpy.memmap or scipy.sparse array): A square 2-D matrix.
+
+    Returns:
+        bool: True if the matrix is Hermitian.
+    """
+    if is_sparse(a):
+        return _max_abs(a - a.T.conj()) <= 1e-12 * _max_abs(a)
+    return out_of_core.is_symmetric(a)
+
+def _spectral_condition(values):
+    """
+    Returns the ratio of the largest to the smallest magnitude of
+    singular values, or eigenvalues of a Hermitian matrix.
+
+    Args:
+        values (ndarray): The values.
+
+    Returns:
+        float: The 2-norm condition number, inf for singular matrices.
+    """
+    magnitudes = np.abs(values)
+    smallest = magnitudes.min()
+    return float(magnitudes.max() / smallest) if smallest > 0 else float('inf')
+
+def _eigen(a, factors, rng):
+    eigenvalues, eigenvectors = (factor for _, factor in factors)
+    x = rng.standard_normal((len(eigenvalues), PROBES))
+    residual = _product(a, eigenvectors @ x) - eigenvectors @ (eigenvalues[:, None] * x)
+    measures = {'residual': _probe_norm(residual)}
+
+    # Solvers for Hermitian matrices return real eigenvalues and
+    # orthonormal eigenvectors; general eigenvectors are not orthogonal.
+    if not np.iscomplexobj(eigenvalues) and _is_hermitian(a):
+        measures['orthogonality'] = _orthogonality(eigenvectors, rng)
+        if len(eigenvalues) == a.shape[0]:
+            measures['condition'] = _spectral_condition(eigenvalues)
+    return measures
+
+def _svd(a, factors, rng):
+    u, s, vt = (factor for _, factor in factors)
+    k = len(s)
+    x = rng.standard_normal((k, PROBES))
+    residual = _product(a, vt[:k].T.conj() @ x) - u[:, :k] @ (s[:, None] * x)
+    measures = {
+        'residual': _probe_norm(residual),
+        'orthogonality': max(_orthogonality(u, rng), _orthogonality(vt, rng, rows=True)),
+    }
+    if k == min(a.shape):
+        measures['condition'] = _spectral_condition(s)
+    return measures
+
+def _lu(a, factors, rng):
+    factors = dict(factors)
+    p, l, u = factors['P'], factors['L'], factors['U']
+    x = rng.standard_normal((a.shape[1], PROBES))
+    # Sparse LU also permutes the columns: A = P L U Q.
+    y = factors['Q'] @ x if 'Q' in factors else x
+    measures = {'residual': _probe_norm(_product(a, x) - p @ (l @ (u @ y)))}
+
+    largest = _max_abs(a)
+    measures['pivot_growth'] = _max_abs(u) / largest if largest > 0 else 1.0
+    if not is_sparse(u) and l.shape == u.shape and a.shape[0] == a.shape[1]:
+        anorm = float(np.abs(a).sum(axis=0).max())
+        measures['condition'] = _reciprocal_condition('gecon', np.tril(l, -1) + u, anorm, norm='1')
+    return measures
+
+def _qr(a, factors, rng):
+    q, r = (factor for _, factor in factors)
+    x = rng.standard_normal((a.shape[1], PROBES))
+    measures = {
+        'residual': _probe_norm(_product(a, x) - _product(q, r @ x)),
+        'orthogonality': _orthogonality(q, rng),
+    }
+    # κ(A) = κ(R) when R is square, that is for square and tall matrices.
+    if r.shape[0] == r.shape[1] == a.shape[1]:
+        measures['condition'] = _reciprocal_condition('trcon', np.asarray(r), norm='1', uplo='U')
+    return measures
+
+def _cholesky(a, factors, rng):
+    factors = dict(factors)
+    l = factors['L']
+    x = rng.standard_normal((a.shape[1], PROBES))
+    if 'P' in factors:
+        # Sparse Cholesky factors Pᵀ A P = L Lᴴ.
+        p = factors['P']
+        reconstruction = p @ (l @ (l.T.conj() @ (p.T @ x)))
+    else:
+        reconstruction = l @ (l.T.conj() @ x)
+    measures = {'residual': _probe_norm(_product(a, x) - reconstruction)}
+    if not is_sparse(l):
+        anorm = float(np.abs(a).sum(axis=0).max())
+        measures['condition'] = _reciprocal_condition('pocon', l, anorm, uplo='L')
+    return measures
+
+# Measures of each decomposition key; the truncated decompositions
+# share those of Eigen and SVD.
+_ROUTINES = {
+    0: _eigen,
+    1: _svd,
+    2: _lu,
+    3: _qr,
+    4: _cholesky,
+    5: _svd,
+    6: _eigen,
+}
+
+@timed('diagnostics')
+def diagnose(a, key, factors):
+    """
+    Computes the accuracy measures of a decomposition from its factors.
+
+    No decomposition is recomputed: residuals and orthogonality errors
+    are estimated from products of the factors with PROBES random
+    vectors, condition numbers come from the computed singular values
+    or eigenvalues or from LAPACK estimators on the triangular factors.
+    Memory-mapped matrices are read in row blocks.
+
+    Args:
+        a (ndarray, numpy.memmap or scipy.sparse array): The decomposed matrix.
+        key (int): Decomposition key.
+        factors (list of tuple): The factors, as returned by the decomposition.
+
+    Returns:
+        Diagnostics: The measures, or None for stacks of matrices and
+                     unknown keys.
+    """
+    if a.ndim != 2 or key not in _ROUTINES or 0 in a.shape:
+        return None
+
+    exact = any(factor.dtype.hasobject for _, factor in factors)
+    a = _numeric(a)
+    factors = [(label, _numeric(factor)) for label, factor in factors]
+    dtype = np.result_type(*(factor.dtype for _, factor in factors))
+    eps = float(np.finfo(dtype).eps)
+
+    # A fixed seed makes the estimates reproducible for the same matrix.
+    with np.errstate(all='ignore'):
+        measures = _ROUTINES[key](a, factors, np.random.default_rng(0))
+        scale = _frobenius(a)
+        measures['residual'] /= scale if scale > 0 else 1.0
+    if exact and key == 3:
+        # Exact QR leaves the columns of Q unnormalized, so neither is Q
+        # orthonormal nor does R share the condition number of A.
+        del measures['orthogonality']
+        measures.pop('condition', None)
+    return Diagnostics(eps, **measures)
@@ -0,0 +1,197 @@
+from fractions import Fraction
+
+import numpy as np
+
+# Element types a matrix can hold, by name. Rationals are exact and
+# stored as Python Fraction objects in object arrays, so they are meant
+# for small matrices only.
+ELEMENT_TYPES = {
+    'float64': np.dtype(np.float64),
+    'float32': np.dtype(np.float32),
+    'complex128': np.dtype(np.complex128),
+    'rational': np.dtype(object),
+}
+
+DEFAULT_ELEMENT_TYPE = 'float64'
+
+def element_dtype(element_type):
+    """
+    Returns the NumPy dtype of an element type.
+
+    Args:
+        element_type (str or numpy.dtype): A name from ELEMENT_TYPES,
+                                           or one of their dtypes.
+
+    Returns:
+        numpy.dtype: The dtype.
+
+    Raises:
+        ValueError: If the element type is not supported.
+    """
+    if element_type in ELEMENT_TYPES:
+        return ELEMENT_TYPES[element_type]
+    dtype = np.dtype(element_type)
+    if dtype not in ELEMENT_TYPES.values():
+        raise ValueError(f'Unsupported element type: {element_type}')
+    return dtype
+
+def element_type_name(dtype):
+    """
+    Returns the name of the element type with the given dtype.
+
+    Args:
+        dtype (numpy.dtype): One of the dtypes of ELEMENT_TYPES.
+
+    Returns:
+        str: The name.
+    """
+    return next(name for name, element in ELEMENT_TYPES.items() if element == dtype)
+
+def is_exact(dtype):
+    """
+    Returns whether a dtype holds exact rationals.
+
+    Args:
+        dtype (numpy.dtype): The dtype.
+
+    Returns:
+        bool: True for object arrays of Fraction values.
+    """
+    return dtype == np.dtype(object)
+
+def zero(dtype):
+    """
+    Returns the zero of an element type.
+
+    Args:
+        dtype (numpy.dtype): The dtype.
+
+    Returns:
+        object: A NumPy scalar, or Fraction(0) for rationals.
+    """
+    return Fraction(0) if is_exact(dtype) else dtype.type(0)
+
+def working_dtype(dtype):
+    """
+    Returns the dtype a numeric matrix is decomposed in.
+
+    Single precision and complex matrices keep their type, so LAPACK
+    runs its single precision or complex routines; everything else is
+    decomposed in double precision.
+
+    Args:
+        dtype (numpy.dtype): dtype of the matrix.
+
+    Returns:
+        numpy.dtype: float32, complex128 or float64.
+    """
+    if dtype.kind == 'c':
+        return np.dtype(np.complex128)
+    if dtype == np.float32:
+        return dtype
+    return np.dtype(np.float64)
+
+def parse_value(text, dtype):
+    """
+    Parses the text of a cell as a value of the given element type.
+
+    Complex values are written as 1.5-2j or 1.5-2i; rationals as
+    integers, decimals or fractions such as -3/4.
+
+    Args:
+        text (str): The text; empty text is zero.
+        dtype (numpy.dtype): The element type.
+
+    Returns:
+        object: The value.
+
+    Raises:
+        ValueError: If the text is not a value of the element type.
+    """
+    text = text.strip()
+    if not text:
+        return zero(dtype)
+    if is_exact(dtype):
+        try:
+            return Fraction(text)
+        except ZeroDivisionError as error:
+            raise ValueError(str(error)) from error
+    if dtype.kind == 'c':
+        # Only a trailing i marks the imaginary unit; inf and nan keep theirs.
+        if text.endswith('i'):
+            text = text[:-1] + 'j'
+        return dtype.type(complex(text))
+    return dtype.type(float(text))
+
+def _to_fraction(value):
+    """
+    Converts a scalar to a Fraction.
+
+    Floats are converted through their shortest decimal representation,
+    so 0.1 becomes 1/10 rather than the exact binary value.
+
+    Args:
+        value (object): An integer, float, Fraction or numeric string.
+
+    Returns:
+        Fraction: The value.
+
+    Raises:
+        ValueError: If the value is complex or not finite.
+    """
+    if isinstance(value, (int, Fraction, str)):
+        return Fraction(value)
+    if isinstance(value, (complex, np.complexfloating)):
+        if value.imag != 0:
+            raise ValueError('Complex values cannot be represented as rationals')
+        value = value.real
+    return Fraction(str(value))
+
+_to_fractions = np.frompyfunc(_to_fraction, 1, 1)
+
+def convert(values, dtype):
+    """
+    Converts dense values to an element type.
+
+    Numeric conversions are single vectorized casts; conversions to
+    rationals go through every value and are meant for small matrices.
+
+    Args:
+        values (ndarray): The values.
+        dtype (numpy.dtype): The element type to convert to.
+
+    Returns:
+        ndarray: The converted values; values itself if no conversion is needed.
+
+    Raises:
+        ValueError: If complex values would lose their imaginary part,
+                    or values cannot be represented as rationals.
+    """
+    if values.dtype == dtype:
+        return values
+    if is_exact(dtype):
+        return np.asarray(_to_fractions(values), dtype=object)
+    if np.iscomplexobj(values) and dtype.kind != 'c':
+        if np.any(values.imag != 0):
+            raise ValueError('The matrix has complex values')
+        values = values.real
+    return values.astype(dtype)
+
+def promoted_dtype(values_dtype, dtype):
+    """
+    Returns the element type values are stored in when loaded into a
+    matrix of the given element type.
+
+    Complex values loaded into a real matrix make it complex, rather
+    than losing their imaginary parts.
+
+    Args:
+        values_dtype (numpy.dtype): dtype of the values.
+        dtype (numpy.dtype): Element type of the matrix.
+
+    Returns:
+        numpy.dtype: The element type to store the values in.
+    """
+    if values_dtype.kind == 'c' and dtype.kind == 'f':
+        return ELEMENT_TYPES['complex128']
+    return dtype
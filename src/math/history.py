@@ -0,0 +1,302 @@
+import contextlib
+
+import numpy as np
+
+from .out_of_core import MEMORY_LIMIT, is_file_backed
+from .sparse_utils import is_sparse
+
+class CellPatch:
+    """
+    Represents edits of individual cells: their positions and their
+    values before and after the edit.
+    """
+    def __init__(self, rows, cols, before, after):
+        """
+        Initializes a CellPatch object.
+
+        Args:
+            rows (ndarray): Row index of each edited cell.
+            cols (ndarray): Column index of each edited cell.
+            before (ndarray): Values before the edit, in edit order.
+            after (ndarray): Values after the edit, in edit order.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.before = before
+        self.after = after
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.cols.nbytes + self.before.nbytes + self.after.nbytes
+
+    def undo(self, matrix_data):
+        # A cell edited twice gets the value from before its first edit.
+        matrix_data._write_cells(self.rows[::-1], self.cols[::-1], self.before[::-1])
+
+    def redo(self, matrix_data):
+        matrix_data._write_cells(self.rows, self.cols, self.after)
+
+class BandChange:
+    """
+    Represents a resize: the old and new shapes, and the row and column
+    bands that shrinking dropped.
+    """
+    def __init__(self, old_shape, new_shape, bands):
+        """
+        Initializes a BandChange object.
+
+        Args:
+            old_shape (tuple of int): Shape before the resize.
+            new_shape (tuple of int): Shape after the resize.
+            bands (list of tuple): (row, col, block) of each dropped band,
+                                   where block is a dense copy, or a COO
+                                   array of its nonzeros in sparse storage.
+        """
+        self.old_shape = old_shape
+        self.new_shape = new_shape
+        self.bands = bands
+
+    @property
+    def nbytes(self):
+        return sum(band_nbytes(block) for _, _, block in self.bands)
+
+    def undo(self, matrix_data):
+        matrix_data._resize(*self.old_shape)
+        for row, col, block in self.bands:
+            matrix_data._write_block(row, col, block)
+
+    def redo(self, matrix_data):
+        matrix_data._resize(*self.new_shape)
+
+class StorageSnapshot:
+    """
+    Represents a bulk operation, such as clearing, loading or converting
+    the matrix, by the storage it replaced.
+
+    Bulk operations write into fresh storage rather than over the old
+    one, so the snapshot takes the old buffer over instead of copying
+    it. Undoing or redoing swaps the held storage with the current one,
+    which is instant however large the matrix is.
+    """
+    def __init__(self, storage):
+        """
+        Initializes a StorageSnapshot object.
+
+        Args:
+            storage (tuple): The replaced storage, as returned by
+                             MatrixData._take_storage().
+        """
+        self.storage = storage
+
+    @property
+    def nbytes(self):
+        """
+        Returns the memory held by the snapshot.
+
+        File-backed buffers live on disk and are not counted.
+
+        Returns:
+            int: Size in bytes.
+        """
+        buffer, sparse = self.storage[:2]
+        if sparse is not None:
+            # A dictionary of keys takes roughly 100 bytes per nonzero.
+            return sparse.nnz * 100
+        if buffer is None or is_file_backed(buffer):
+            return 0
+        return buffer.nbytes
+
+    def undo(self, matrix_data):
+        self.storage = matrix_data._swap_storage(self.storage)
+
+    redo = undo
+
+class EditHistory:
+    """
+    Undo and redo stacks of matrix edits.
+
+    Every step is a delta: CellPatch for cell edits, BandChange for
+    resizes and StorageSnapshot for bulk operations. Cell edits made
+    inside group() form a single step.
+
+    The steps are kept within max_steps and max_bytes by evicting the
+    oldest ones first. A step larger than max_bytes on its own clears
+    the history, since older steps cannot be undone without it.
+    """
+    def __init__(self, max_steps=100, max_bytes=MEMORY_LIMIT // 2):
+        """
+        Initializes an EditHistory object.
+
+        Args:
+            max_steps (int, optional): Largest number of undoable steps.
+            max_bytes (int, optional): Largest memory held by all steps, in
+                                       bytes. Defaults to half the size of
+                                       the largest buffer kept in memory.
+        """
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+        self.undo_steps = []
+        self.redo_steps = []
+        self.nbytes = 0
+        self._depth = 0
+        self._cells = None
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_steps)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_steps)
+
+    def clear(self):
+        """
+        Forgets every step.
+        """
+        self.undo_steps = []
+        self.redo_steps = []
+        self.nbytes = 0
+
+    @contextlib.contextmanager
+    def group(self):
+        """
+        Collects the cell edits made inside the block into one step.
+        """
+        if self._depth == 0:
+            self._cells = []
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                cells, self._cells = self._cells, None
+                if cells:
+                    self.push(self._cell_patch(cells))
+
+    def record_cell(self, row, col, before, after):
+        """
+        Records the edit of one cell.
+
+        Args:
+            row (int): Row index.
+            col (int): Column index.
+            before (object): Value before the edit.
+            after (object): Value after the edit.
+        """
+        if self._cells is not None:
+            self._cells.append((row, col, before, after))
+        else:
+            self.push(self._cell_patch([(row, col, before, after)]))
+
+    @staticmethod
+    def _cell_patch(cells):
+        """
+        Packs recorded cell edits into arrays.
+
+        Args:
+            cells (list of tuple): (row, col, before, after) of each edit.
+
+        Returns:
+            CellPatch: The patch.
+        """
+        rows, cols, before, after = zip(*cells)
+        # Object arrays keep rationals exact; other values keep their type.
+        dtype = np.result_type(*(np.asarray(value).dtype for value in before + after))
+        return CellPatch(
+            np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32),
+            np.array(before, dtype=dtype), np.array(after, dtype=dtype)
+        )
+
+    def push(self, delta):
+        """
+        Adds an undoable step and forgets the redoable ones.
+
+        Bulk operations and resizes end a running group, so that undoing
+        them never interleaves with the cell edits around them.
+
+        Args:
+            delta (CellPatch, BandChange or StorageSnapshot): The step.
+        """
+        if self._cells and not isinstance(delta, CellPatch):
+            cells, self._cells = self._cells, []
+            self.push(self._cell_patch(cells))
+
+        for step in self.redo_steps:
+            self.nbytes -= step.nbytes
+        self.redo_steps = []
+        self.undo_steps.append(delta)
+        self.nbytes += delta.nbytes
+        self._evict()
+
+    def _evict(self):
+        """
+        Drops the oldest steps until the history is within its limits.
+        """
+        while self.undo_steps and (len(self.undo_steps) > self.max_steps or self.nbytes > self.max_bytes):
+            self.nbytes -= self.undo_steps.pop(0).nbytes
+        if self.nbytes > self.max_bytes:
+            self.clear()
+
+    def undo(self, matrix_data):
+        """
+        Reverts the last step.
+
+        Args:
+            matrix_data (MatrixData): The matrix the step was recorded on.
+
+        Returns:
+            bool: False if there was nothing to undo.
+        """
+        if not self.undo_steps:
+            return False
+        delta = self.undo_steps.pop()
+        self.nbytes -= delta.nbytes
+        delta.undo(matrix_data)
+        self.redo_steps.append(delta)
+        # Swapping storage may change how much memory the step holds.
+        self.nbytes += delta.nbytes
+        self._evict_redo()
+        return True
+
+    def redo(self, matrix_data):
+        """
+        Reapplies the last undone step.
+
+        Args:
+            matrix_data (MatrixData): The matrix the step was recorded on.
+
+        Returns:
+            bool: False if there was nothing to redo.
+        """
+        if not self.redo_steps:
+            return False
+        delta = self.redo_steps.pop()
+        self.nbytes -= delta.nbytes
+        delta.redo(matrix_data)
+        self.undo_steps.append(delta)
+        self.nbytes += delta.nbytes
+        self._evict()
+        return True
+
+    def _evict_redo(self):
+        """
+        Drops the redoable steps furthest from the current state if the
+        history holds more than max_bytes.
+        """
+        while self.redo_steps and self.nbytes > self.max_bytes:
+            self.nbytes -= self.redo_steps.pop(0).nbytes
+
+def band_nbytes(block):
+    """
+    Returns the memory held by a dropped band.
+
+    Args:
+        block (ndarray or scipy.sparse.coo_array): The band.
+
+    Returns:
+        int: Size in bytes.
+    """
+    if is_sparse(block):
+        return block.data.nbytes + block.row.nbytes + block.col.nbytes
+    return block.nbytes
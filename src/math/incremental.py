@@ -0,0 +1,318 @@
+import threading
+
+import numpy as np
+import scipy.linalg
+import scipy.sparse
+
+from .decomposition import TRUNCATED_DECOMPOSITIONS, DecompositionError, DecompositionResult, decompose_array
+from .diagnostics import diagnose
+from .element_types import is_exact, working_dtype
+from .out_of_core import is_file_backed
+
+def cholesky_rank_one(l, x, downdate=False):
+    """
+    Updates a Cholesky factor in place to factor L Lᵀ ± x xᵀ.
+
+    Args:
+        l (ndarray): Lower triangular Cholesky factor, modified in place.
+        x (ndarray): Update vector, modified in place.
+        downdate (bool, optional): Subtract x xᵀ instead of adding it.
+
+    Returns:
+        bool: False if a downdate would lose positive-definiteness.
+    """
+    sign = -1.0 if downdate else 1.0
+    nonzero = np.flatnonzero(x)
+    if nonzero.size == 0:
+        return True
+
+    for k in range(nonzero[0], len(x)):
+        diagonal = l[k, k]
+        squared = diagonal * diagonal + sign * x[k] * x[k]
+        if squared <= 0.0:
+            return False
+
+        r = np.sqrt(squared)
+        c = r / diagonal
+        s = x[k] / diagonal
+        l[k, k] = r
+        l[k + 1:, k] = (l[k + 1:, k] + sign * s * x[k + 1:]) / c
+        x[k + 1:] = c * x[k + 1:] - s * l[k + 1:, k]
+    return True
+
+def lu_rank_one(l, u, x, y):
+    """
+    Updates an unpivoted LU factorization in place to factor L U + x yᵀ.
+
+    Uses Bennett's algorithm, which keeps the existing pivot order.
+
+    Args:
+        l (ndarray): Unit lower triangular factor, modified in place.
+        u (ndarray): Upper triangular factor, modified in place.
+        x (ndarray): Left update vector, modified in place.
+        y (ndarray): Right update vector, modified in place.
+
+    Returns:
+        bool: False if a pivot vanished during the update.
+    """
+    for k in range(len(x)):
+        u[k, k] += x[k] * y[k]
+        if u[k, k] == 0.0:
+            return False
+
+        u[k, k + 1:] += x[k] * y[k + 1:]
+        x[k + 1:] -= x[k] * l[k + 1:, k]
+        y[k + 1:] -= (y[k] / u[k, k]) * u[k, k + 1:]
+        l[k + 1:, k] += x[k + 1:] * (y[k] / u[k, k])
+    return True
+
+def _update_lu(factors, a, row, col, delta):
+    p, l, u = (factor.copy() for _, factor in factors)
+    if l.shape[0] != u.shape[1]:
+        return None
+
+    x = delta * p[row].copy()
+    y = np.zeros(u.shape[1])
+    y[col] = 1.0
+    if not lu_rank_one(l, u, x, y):
+        return None
+
+    # Without re-pivoting, element growth is the only thing that can make
+    # the updated factors unreliable, so bound it against the input.
+    if np.abs(u).max() > _MAX_PIVOT_GROWTH * max(np.abs(a).max(), 1.0):
+        return None
+    return [('P', p), ('L', l), ('U', u)]
+
+def _update_qr(factors, a, row, col, delta):
+    q, r = (factor for _, factor in factors)
+    u = np.zeros(q.shape[0])
+    u[row] = delta
+    v = np.zeros(r.shape[1])
+    v[col] = 1.0
+    try:
+        q, r = scipy.linalg.qr_update(q, r, u, v, check_finite=False)
+    except (ValueError, np.linalg.LinAlgError):
+        return None
+    return [('Q', q), ('R', r)]
+
+def _update_cholesky(factors, a, row, col, delta):
+    # Called with the lower cell of an edit of a cell and its mirror.
+    l = factors[0][1].copy()
+    scale = np.sqrt(abs(delta) / (1.0 if row == col else 2.0))
+    up = np.zeros(l.shape[0])
+    down = np.zeros(l.shape[0])
+    if row == col:
+        (up if delta > 0 else down)[row] = scale
+    else:
+        plus, minus = (up, down) if delta > 0 else (down, up)
+        plus[[row, col]] = scale
+        minus[row], minus[col] = scale, -scale
+
+    # Apply the update before the downdate to stay positive-definite.
+    if not cholesky_rank_one(l, up) or not cholesky_rank_one(l, down, downdate=True):
+        return None
+    return [('L', l)]
+
+def _reconstruct_probe(key, factors, x):
+    """
+    Applies the product of the factors to a probe vector in O(n²).
+
+    Args:
+        key (int): Decomposition key.
+        factors (list of tuple): Factors of the decomposition.
+        x (ndarray): Probe vector.
+
+    Returns:
+        ndarray: The product of the factors with x.
+    """
+    arrays = [factor for _, factor in factors]
+    if key == 4:
+        l = arrays[0]
+        return l @ (l.T @ x)
+
+    for factor in reversed(arrays):
+        x = factor @ x
+    return x
+
+def _probe_matrix(key, a, x):
+    """
+    Applies the matrix the factors are expected to reproduce to a probe vector.
+
+    Args:
+        key (int): Decomposition key.
+        a (ndarray): The input matrix.
+        x (ndarray): Probe vector.
+
+    Returns:
+        ndarray: The product of the effective input matrix with x.
+    """
+    if key == 4:
+        lower = np.tril(a)
+        return lower @ x + np.tril(a, -1).T @ x
+    return a @ x
+
+def _symmetric_edit(a, changed):
+    """
+    Checks that edits of a symmetric matrix kept it symmetric.
+
+    The stored matrix was symmetric, so comparing the edited cells with
+    their mirrors is enough, and rejects the same matrices as the full
+    factorization does, instead of factoring only their lower triangle.
+
+    Args:
+        a (ndarray): The new matrix.
+        changed (ndarray): (row, col) of each edited cell.
+
+    Returns:
+        ndarray: The edited cell on or below the diagonal, as a symmetric
+                 edit of a cell and its mirror is one rank-two update.
+
+    Raises:
+        DecompositionError: If an edited cell differs from its mirror.
+    """
+    rows, cols = changed.T
+    values, mirrors = a[rows, cols], a[cols, rows]
+    if np.all(np.isfinite(values)) and np.any(
+            np.abs(values - mirrors) > 1e-12 * np.maximum(np.abs(values), np.abs(mirrors))):
+        raise DecompositionError('Cholesky decomposition requires a symmetric matrix')
+    return changed[rows >= cols]
+
+_UPDATES = {
+    2: _update_lu,
+    3: _update_qr,
+    4: _update_cholesky,
+}
+
+_MAX_PIVOT_GROWTH = 1e8
+
+def _is_double(dtype):
+    """
+    Returns whether a matrix is decomposed in double precision real arithmetic.
+
+    Args:
+        dtype (numpy.dtype): dtype of the matrix.
+
+    Returns:
+        bool: True if the updates, which assume float64 factors, apply.
+    """
+    return not is_exact(dtype) and working_dtype(dtype) == np.float64
+
+class IncrementalDecomposer:
+    """
+    Keeps the last factorization and updates it for single-cell edits.
+
+    A single changed cell is a rank-one modification of the matrix, so LU,
+    QR and Cholesky factors can be updated in O(n²) instead of being
+    recomputed in O(n³). Every updated factorization is verified with a
+    random probe vector; if the residual exceeds the tolerance, or the
+    edit is not a single-cell change, the decomposition is recomputed
+    from scratch.
+    """
+    def __init__(self, tolerance=1e-9):
+        """
+        Initializes an IncrementalDecomposer object.
+
+        Args:
+            tolerance (float, optional): Largest accepted relative probe residual
+                                         for an updated factorization.
+        """
+        self.tolerance = tolerance
+        self.key = None
+        self.matrix = None
+        self.result = None
+        self.lock = threading.Lock()
+        self.rng = np.random.default_rng()
+
+    def reset(self):
+        """
+        Forgets the stored factorization.
+        """
+        with self.lock:
+            self.key = None
+            self.matrix = None
+            self.result = None
+
+    def update(self, a, key, truncation=None):
+        """
+        Decomposes a matrix, reusing the stored factorization when possible.
+
+        Args:
+            a (array_like): The matrix to decompose.
+            key (int): Decomposition key.
+            truncation (tuple, optional): (k, tolerance) of a truncated decomposition.
+
+        Returns:
+            DecompositionResult: The computed factors.
+
+        Raises:
+            DecompositionError: If the decomposition fails.
+        """
+        if (scipy.sparse.issparse(a) or is_file_backed(a) or key in TRUNCATED_DECOMPOSITIONS
+                or not _is_double(np.asarray(a).dtype)):
+            # Sparse, out-of-core, truncated and single precision, complex
+            # or rational factorizations are not updated in place.
+            self.reset()
+            return decompose_array(a, key, truncation)
+
+        a = np.array(a, dtype=np.float64)
+        with self.lock:
+            result = self._try_update(a, key)
+            if result is None:
+                result = decompose_array(a, key)
+
+            self.key = key
+            self.matrix = a
+            self.result = result
+            return result
+
+    def _try_update(self, a, key):
+        """
+        Attempts a rank-one update of the stored factorization.
+
+        Args:
+            a (ndarray): The new matrix.
+            key (int): Decomposition key.
+
+        Returns:
+            DecompositionResult: The updated result, or None if a full
+                                 recomputation is required.
+
+        Raises:
+            DecompositionError: If a Cholesky edit left the matrix asymmetric.
+        """
+        if self.result is None or key != self.key or a.shape != self.matrix.shape:
+            return None
+
+        changed = np.argwhere(a != self.matrix)
+        if len(changed) == 0:
+            return self.result
+        if key == 4 and len(changed) <= 2:
+            changed = _symmetric_edit(a, changed)
+        if len(changed) != 1 or key not in _UPDATES:
+            return None
+
+        row, col = changed[0]
+        delta = a[row, col] - self.matrix[row, col]
+        factors = _UPDATES[key](self.result.factors, a, row, col, delta)
+        if factors is None or not self._is_accurate(key, a, factors):
+            return None
+
+        return DecompositionResult(self.result.name, factors, diagnose(a, key, factors))
+
+    def _is_accurate(self, key, a, factors):
+        """
+        Checks updated factors against the matrix with a random probe vector.
+
+        Args:
+            key (int): Decomposition key.
+            a (ndarray): The new matrix.
+            factors (list of tuple): The updated factors.
+
+        Returns:
+            bool: True if the relative residual is within tolerance.
+        """
+        x = self.rng.standard_normal(a.shape[1])
+        expected = _probe_matrix(key, a, x)
+        residual = np.linalg.norm(_reconstruct_probe(key, factors, x) - expected)
+        scale = max(np.linalg.norm(a) * np.linalg.norm(x), np.finfo(np.float64).tiny)
+        return bool(np.all(np.isfinite(factors[-1][1]))) and residual <= self.tolerance * scale
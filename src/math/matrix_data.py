@@ -1,21 +1,231 @@
+import hashlib
+import itertools
+import weakref
+
+import numpy as np
+
+from .element_types import convert, element_dtype, is_exact, parse_value, promoted_dtype, zero
+from .history import BandChange, EditHistory, StorageSnapshot
+from .out_of_core import allocate, copy_rows, is_file_backed, iter_row_blocks
+from .sparse_utils import is_sparse
+
+_instance_tokens = itertools.count()
+
 class MatrixData:
     """
     Represents matrix data.
 
-    Stores the matrix in a 2D list and provides methods
-    for updating cell values.
+    Stores the matrix in a preallocated contiguous buffer whose
+    capacity grows geometrically, so resizing only changes the view
+    onto the buffer instead of reallocating it. The buffer holds one
+    of the element types of element_types.ELEMENT_TYPES: float64 by
+    default, float32 for half the memory and bandwidth, complex128,
+    or exact rationals.
+
+    Large matrices that are loaded, converted or grown with a density of
+    nonzeros below sparse_density are switched to a sparse
+    dictionary-of-keys representation, so memory scales with the number
+    of nonzeros; they switch back once they fill up. Matrices of zeros,
+    such as new ones, stay dense, as their untouched buffer costs nothing.
+
+    Dense buffers larger than out_of_core.MEMORY_LIMIT are memory-mapped
+    from a temporary file, so matrices that do not fit in RAM can still
+    be edited, resized and read block by block through get_block().
+    Rational matrices are always dense and held in memory.
+
+    Edits are recorded in an EditHistory, so they can be undone and
+    redone: cell edits and resizes as deltas, bulk operations by keeping
+    the storage they replaced instead of copying it.
     """
-    def __init__(self, rows, cols):
+    # Largest fraction of nonzero cells kept in sparse storage. A matrix
+    # returns to dense storage at twice this density, so single edits
+    # around the threshold do not flip the representation back and forth.
+    sparse_density = 0.05
+
+    # Smallest number of cells for which sparse storage is considered.
+    sparse_min_cells = 256 * 256
+
+    def __init__(self, rows, cols, dtype=np.float64):
         """
         Initializes a MatrixData object.
 
         Args:
             rows (int): Number of rows in the matrix.
             cols (int): Number of columns in the matrix.
+            dtype (str or numpy.dtype, optional): Element type, as accepted by
+                                                  element_types.element_dtype().
+                                                  Defaults to float64.
         """
         self.rows = rows
         self.cols = cols
-        self.data = [[0.0] * cols for _ in range(rows)]
+        self.dtype = element_dtype(dtype)
+        self.nnz = 0
+        self._buffer = allocate((rows, cols), dtype=self.dtype)
+        self._sparse = None
+        self._content_hash = None
+        self._token = next(_instance_tokens)
+        self._version = 0
+        self._snapshots = []
+        self.history = EditHistory()
+        self._update_storage()
+
+    @property
+    def is_sparse(self):
+        """
+        Returns whether the matrix is held in sparse storage.
+
+        Returns:
+            bool: True if the values are stored sparsely.
+        """
+        return self._sparse is not None
+
+    @property
+    def is_file_backed(self):
+        """
+        Returns whether the dense buffer is memory-mapped from a file.
+
+        Returns:
+            bool: True if the values are stored out of core.
+        """
+        return self._sparse is None and is_file_backed(self._buffer)
+
+    @property
+    def data(self):
+        """
+        Returns the matrix values as a dense array.
+
+        In dense storage this is a zero-copy, writable view onto the buffer,
+        memory-mapped for file-backed matrices. In sparse storage it is a
+        dense copy, so large sparse matrices should be read through
+        get_block() or snapshot() instead.
+
+        Returns:
+            ndarray: A (rows, cols) array.
+        """
+        if self._sparse is not None:
+            return self._sparse.toarray()
+        return self._buffer[:self.rows, :self.cols]
+
+    @property
+    def capacity(self):
+        """
+        Returns the allocated shape of the underlying dense buffer.
+
+        Returns:
+            tuple of int: The (rows, cols) capacity, (0, 0) in sparse storage.
+        """
+        if self._sparse is not None:
+            return (0, 0)
+        return self._buffer.shape
+
+    def get_block(self, row_start, row_stop, col_start, col_stop):
+        """
+        Returns a dense block of the matrix without densifying the rest.
+
+        Args:
+            row_start (int): First row of the block.
+            row_stop (int): Row after the last row of the block.
+            col_start (int): First column of the block.
+            col_stop (int): Column after the last column of the block.
+
+        Returns:
+            ndarray: The block; a view in dense storage, a copy in sparse storage.
+        """
+        if self._sparse is not None:
+            return self._sparse[row_start:row_stop, col_start:col_stop].toarray()
+        return self.data[row_start:row_stop, col_start:col_stop]
+
+    def get_value(self, row, col):
+        """
+        Returns the value of a single cell without densifying the matrix.
+
+        Args:
+            row (int): Row index.
+            col (int): Column index.
+
+        Returns:
+            object: The value, of the element type.
+        """
+        if self._sparse is not None:
+            return self._sparse[row, col]
+        return self._buffer[row, col]
+
+    def snapshot(self):
+        """
+        Returns an independent copy of the matrix values.
+
+        File-backed matrices are too large to copy on every call, so their
+        snapshot is a read-only view of the buffer, and the buffer is copied
+        on the next write only if a snapshot is still alive by then.
+
+        Returns:
+            ndarray or scipy.sparse.csr_array: A (rows, cols) copy that later
+                                               edits do not affect; sparse in
+                                               sparse storage, memory-mapped
+                                               for file-backed matrices.
+        """
+        if self._sparse is not None:
+            return self._sparse.tocsr()
+        if self.is_file_backed:
+            snapshot = self.data
+            snapshot.flags.writeable = False
+            self._snapshots = [ref for ref in self._snapshots if ref() is not None]
+            self._snapshots.append(weakref.ref(snapshot))
+            return snapshot
+        return self.data.copy()
+
+    def content_hash(self):
+        """
+        Returns a digest of the matrix shape and values.
+
+        The digest is computed once and reused until the next
+        update_value() or resize() invalidates it. File-backed matrices
+        are too large to read on every change, so their digest covers
+        the identity of this object and a modification counter instead
+        of the values; it still changes with every edit, but equal
+        contents no longer share a digest.
+
+        Returns:
+            bytes: A 16-byte BLAKE2b digest.
+        """
+        if self._content_hash is None:
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(np.array((self.rows, self.cols), dtype=np.int64).tobytes())
+            digest.update(self.dtype.str.encode())
+            if self._sparse is not None:
+                csr = self._sparse.tocsr()
+                csr.sort_indices()
+                for part in (csr.indptr, csr.indices, csr.data):
+                    digest.update(np.ascontiguousarray(part).data)
+            elif self.is_file_backed:
+                digest.update(np.array((self._token, self._version), dtype=np.int64).tobytes())
+            elif is_exact(self.dtype):
+                # Object arrays hold pointers; hash the values instead.
+                digest.update(' '.join(map(str, self.data.flat)).encode())
+            else:
+                for _, _, block in iter_row_blocks(self.data):
+                    digest.update(np.ascontiguousarray(block).data)
+            self._content_hash = digest.digest()
+        return self._content_hash
+
+    def _unshare(self):
+        """
+        Copies a file-backed buffer that live snapshots still read from,
+        so that the following write leaves them unchanged.
+        """
+        shared = any(ref() is not None for ref in self._snapshots)
+        self._snapshots = []
+        if shared and self.is_file_backed:
+            buffer = allocate(self._buffer.shape, file_backed=True, dtype=self.dtype)
+            copy_rows(buffer[:self.rows, :self.cols], self.data)
+            self._buffer = buffer
+
+    def _invalidate(self):
+        """
+        Forgets the content digest after the values or the shape changed.
+        """
+        self._content_hash = None
+        self._version += 1
 
     def update_value(self, row, col, value):
         """
@@ -24,31 +234,404 @@ class MatrixData:
         Args:
             row (int): Row index.
             col (int): Column index.
-            value (str): New value for the cell.
+            value (str): New value for the cell, parsed as the element type;
+                         text that does not parse is stored as zero.
         """
         try:
-            self.data[row][col] = float(value)
+            value = parse_value(value, self.dtype)
         except ValueError:
-            self.data[row][col] = 0.0
+            value = zero(self.dtype)
+
+        self.history.record_cell(row, col, self.get_value(row, col), value)
+        self._write_cells((row,), (col,), (value,))
+
+    def _write_cells(self, rows, cols, values):
+        """
+        Writes values to cells in order, without recording the edit.
+
+        Args:
+            rows (iterable of int): Row index of each cell.
+            cols (iterable of int): Column index of each cell.
+            values (iterable): The values, of the element type.
+        """
+        self._invalidate()
+        self._unshare()
+        if self._sparse is not None:
+            for row, col, value in zip(rows, cols, values):
+                self._sparse[row, col] = value
+            self.nnz = self._sparse.nnz
+        else:
+            for row, col, value in zip(rows, cols, values):
+                self.nnz += int(value != 0) - int(self._buffer[row, col] != 0)
+                self._buffer[row, col] = value
+        self._update_storage()
+
+    def _write_block(self, row, col, block):
+        """
+        Writes a block of values without recording the edit.
+
+        Args:
+            row (int): Row of the top-left cell of the block.
+            col (int): Column of the top-left cell of the block.
+            block (ndarray or scipy.sparse.coo_array): The values; the
+                                                      nonzeros of sparse
+                                                      blocks are written.
+        """
+        if self._sparse is not None or is_sparse(block):
+            if is_sparse(block):
+                rows, cols, values = block.row, block.col, block.data
+            else:
+                rows, cols = np.nonzero(block)
+                values = block[rows, cols]
+            self._write_cells(rows + row, cols + col, values)
+            return
+
+        self._invalidate()
+        self._unshare()
+        target = self._buffer[row:row + block.shape[0], col:col + block.shape[1]]
+        self.nnz += np.count_nonzero(block) - np.count_nonzero(target)
+        target[...] = block
+        self._update_storage()
+
+    def _take_storage(self):
+        """
+        Hands the storage over to the history before a bulk operation
+        replaces it.
+
+        Returns:
+            tuple: (buffer, sparse, rows, cols, dtype, nnz, snapshots).
+        """
+        storage = (self._buffer, self._sparse, self.rows, self.cols, self.dtype, self.nnz, self._snapshots)
+        self._snapshots = []
+        return storage
+
+    def _swap_storage(self, storage):
+        """
+        Replaces the storage with one taken by _take_storage().
+
+        Args:
+            storage (tuple): The storage to restore.
+
+        Returns:
+            tuple: The storage that was replaced.
+        """
+        self._invalidate()
+        current = self._take_storage()
+        (self._buffer, self._sparse, self.rows, self.cols,
+         self.dtype, self.nnz, self._snapshots) = storage
+        return current
+
+    def undo(self):
+        """
+        Reverts the last recorded edit.
+
+        Returns:
+            bool: False if there was nothing to undo.
+        """
+        return self.history.undo(self)
+
+    def redo(self):
+        """
+        Reapplies the last undone edit.
+
+        Returns:
+            bool: False if there was nothing to redo.
+        """
+        return self.history.redo(self)
+
+    def load(self, values):
+        """
+        Replaces the matrix with the given values, adopting their shape.
+
+        Dense values are copied into a fresh buffer block by block, so
+        memory-mapped input is never read into memory as a whole, and
+        cast to the element type as they are copied; sparse values are
+        adopted without being densified if they are sparse enough.
+        Complex values make a real matrix complex. The replaced storage
+        is kept for undo rather than overwritten.
+
+        Args:
+            values (array_like or scipy.sparse matrix): A 2-D array of values.
+
+        Raises:
+            ValueError: If the values cannot be represented as rationals.
+        """
+        self._invalidate()
+        if is_sparse(values) and is_exact(self.dtype):
+            values = values.toarray()
+        if not is_sparse(values) and not is_file_backed(values):
+            values = np.asarray(values)
+        dtype = promoted_dtype(values.dtype, self.dtype)
+
+        if is_sparse(values):
+            import scipy.sparse
+
+            storage = self._take_storage()
+            self.rows, self.cols = values.shape
+            self.dtype = dtype
+            self._sparse = scipy.sparse.dok_array(values, dtype=dtype)
+            self._buffer = None
+            self.nnz = self._sparse.nnz
+        else:
+            if is_exact(dtype):
+                values = convert(values, dtype)
+            rows, cols = values.shape
+            storage = self._take_storage()
+            self._buffer = allocate((rows, cols), dtype=dtype)
+            self.dtype = dtype
+            self._sparse = None
+            self.rows, self.cols = rows, cols
+            self.nnz = copy_rows(self.data, values)
+        self.history.push(StorageSnapshot(storage))
+        self._update_storage(sparsify=True)
+
+    def set_dtype(self, dtype):
+        """
+        Converts the matrix to another element type.
+
+        Numeric conversions are vectorized casts over row blocks, so
+        file-backed matrices are converted without being read into
+        memory as a whole.
+
+        Args:
+            dtype (str or numpy.dtype): The element type, as accepted by
+                                        element_types.element_dtype().
+
+        Raises:
+            ValueError: If complex values would lose their imaginary parts,
+                        values cannot be represented as rationals, or the
+                        matrix is too large to hold rationals.
+        """
+        dtype = element_dtype(dtype)
+        if dtype == self.dtype:
+            return
+        if is_exact(dtype) and self.is_file_backed:
+            raise ValueError('Matrices this large cannot hold rational values')
+
+        self._invalidate()
+        if self._sparse is not None and not is_exact(dtype):
+            import scipy.sparse
+
+            values = self._sparse.tocoo()
+            values.data = convert(values.data, dtype)
+            storage = self._take_storage()
+            self._sparse = scipy.sparse.dok_array(values)
+        else:
+            values = self._sparse.toarray() if self._sparse is not None else self.data
+            buffer = allocate(
+                (self.rows, self.cols) if self._sparse is not None else self._buffer.shape,
+                file_backed=self.is_file_backed, dtype=dtype
+            )
+            nonzeros = 0
+            for start, stop, block in iter_row_blocks(values):
+                block = convert(block, dtype)
+                buffer[start:stop, :self.cols] = block
+                nonzeros += np.count_nonzero(block)
+            storage = self._take_storage()
+            self._buffer = buffer
+            self._sparse = None
+            self.nnz = nonzeros
+        self.dtype = dtype
+        self.history.push(StorageSnapshot(storage))
+        self._update_storage(sparsify=True)
+
+    def clear(self):
+        """
+        Sets every cell of the matrix to zero.
+
+        The matrix moves to fresh storage, which is zero without being
+        written: untouched pages in memory, holes in a file. The old
+        storage is kept for undo, so clearing never copies the matrix.
+        """
+        self._invalidate()
+        file_backed = self.is_file_backed
+        storage = self._take_storage()
+        if self._sparse is not None:
+            self._sparse = type(self._sparse)((self.rows, self.cols), dtype=self.dtype)
+        else:
+            self._buffer = allocate(self._buffer.shape, file_backed=file_backed, dtype=self.dtype)
+        self.nnz = 0
+        self.history.push(StorageSnapshot(storage))
+        self._update_storage()
 
     def resize(self, new_rows, new_cols):
         """
         Resizes the matrix data, preserving existing values.
 
+        Cells dropped by shrinking are zeroed so that growing the
+        matrix again exposes zeros, as a freshly created matrix would.
+        The dropped bands are recorded for undo; bands larger than the
+        history can hold make the resize, and the edits before it,
+        irreversible.
+
+        Args:
+            new_rows (int): New number of rows.
+            new_cols (int): New number of columns.
+        """
+        if (new_rows, new_cols) != (self.rows, self.cols):
+            bands = self._dropped_bands(new_rows, new_cols)
+            if bands is None:
+                self.history.clear()
+            else:
+                self.history.push(BandChange((self.rows, self.cols), (new_rows, new_cols), bands))
+        self._resize(new_rows, new_cols)
+
+    def _dropped_bands(self, new_rows, new_cols):
+        """
+        Copies the cells a resize would drop.
+
         Args:
             new_rows (int): New number of rows.
             new_cols (int): New number of columns.
+
+        Returns:
+            list of tuple: (row, col, block) of each band, as expected by
+                           BandChange, or None if the bands are larger
+                           than the history can hold.
+        """
+        if self._sparse is not None:
+            import scipy.sparse
+
+            coo = self._sparse.tocoo()
+            dropped = (coo.row >= new_rows) | (coo.col >= new_cols)
+            band = scipy.sparse.coo_array(
+                (coo.data[dropped], (coo.row[dropped], coo.col[dropped])), shape=coo.shape
+            )
+            return [(0, 0, band)]
+
+        regions = []
+        if new_rows < self.rows:
+            regions.append((new_rows, 0, self.rows, self.cols))
+        if new_cols < self.cols:
+            regions.append((0, new_cols, min(new_rows, self.rows), self.cols))
+        cells = sum((stop_row - row) * (stop_col - col) for row, col, stop_row, stop_col in regions)
+        if cells * self.dtype.itemsize > self.history.max_bytes:
+            return None
+        return [(row, col, np.array(self.data[row:stop_row, col:stop_col]))
+                for row, col, stop_row, stop_col in regions]
+
+    def _resize(self, new_rows, new_cols):
         """
-        if new_rows > self.rows:
-            self.data.extend([[0.0] * self.cols for _ in range(new_rows - self.rows)])
-        elif new_rows < self.rows:
-            self.data = self.data[:new_rows]
+        Resizes the matrix data without recording the change.
 
-        for row in self.data:
-            if new_cols > self.cols:
-                row.extend([0.0] * (new_cols - self.cols))
-            elif new_cols < self.cols:
-                row[:] = row[:new_cols]
+        Args:
+            new_rows (int): New number of rows.
+            new_cols (int): New number of columns.
+        """
+        self._invalidate()
+        self._unshare()
+        if self._sparse is None:
+            if new_rows < self.rows:
+                self._buffer[new_rows:self.rows, :self.cols] = 0
+            if new_cols < self.cols:
+                self._buffer[:self.rows, new_cols:self.cols] = 0
+            if new_rows < self.rows or new_cols < self.cols:
+                self.rows, self.cols = min(new_rows, self.rows), min(new_cols, self.cols)
+                self.nnz = np.count_nonzero(self.data)
+            if self._is_sparse_enough(new_rows * new_cols):
+                # Convert before growing, while the nonzeros to gather
+                # are confined to the kept cells.
+                self._to_sparse()
 
+        if self._sparse is not None:
+            self._sparse.resize((new_rows, new_cols))
+            self.nnz = self._sparse.nnz
+        else:
+            capacity_rows, capacity_cols = self._buffer.shape
+            if new_rows > capacity_rows or new_cols > capacity_cols:
+                self._grow(max(new_rows, capacity_rows), max(new_cols, capacity_cols))
         self.rows = new_rows
         self.cols = new_cols
+        self._update_storage()
+
+    def _grow(self, min_rows, min_cols):
+        """
+        Reallocates the buffer with at least the requested capacity.
+
+        Capacity is doubled along each axis that has to grow, which
+        keeps the cost of repeated growth amortized constant per cell.
+        Buffers beyond the memory limit are allocated in a file.
+
+        Args:
+            min_rows (int): Minimum number of rows required.
+            min_cols (int): Minimum number of columns required.
+        """
+        capacity_rows, capacity_cols = self._buffer.shape
+        if min_rows > capacity_rows:
+            capacity_rows = max(min_rows, 2 * capacity_rows)
+        if min_cols > capacity_cols:
+            capacity_cols = max(min_cols, 2 * capacity_cols)
+
+        buffer = allocate((capacity_rows, capacity_cols), dtype=self.dtype)
+        copy_rows(buffer[:self.rows, :self.cols], self.data)
+        self._buffer = buffer
+
+    def _is_sparse_enough(self, cells):
+        """
+        Returns whether the nonzeros would be best kept in sparse storage.
+
+        Args:
+            cells (int): Number of cells of the matrix.
+
+        Returns:
+            bool: True for large non-rational matrices that have nonzeros,
+                  but fewer than sparse_density of their cells.
+        """
+        return (cells >= self.sparse_min_cells and not is_exact(self.dtype)
+                and 0 < self.nnz < self.sparse_density * cells)
+
+    def _update_storage(self, sparsify=False):
+        """
+        Switches between dense and sparse storage based on size and density.
+        Rational matrices stay dense.
+
+        Dense storage is only made sparse when sparsify is set, by the bulk
+        operations that have just written every value anyway; single edits
+        never scan the whole buffer.
+
+        Args:
+            sparsify (bool, optional): Whether dense storage may turn sparse.
+        """
+        cells = self.rows * self.cols
+        if cells < self.sparse_min_cells or is_exact(self.dtype):
+            if self._sparse is not None:
+                self._to_dense()
+            return
+
+        if self._sparse is None:
+            if sparsify and self._is_sparse_enough(cells):
+                self._to_sparse()
+        elif self.nnz > 2 * self.sparse_density * cells:
+            self._to_dense()
+
+    def _to_sparse(self):
+        """
+        Moves the values from the dense buffer into sparse storage.
+
+        The nonzeros are gathered block by block, so memory-mapped buffers
+        are never read into memory as a whole.
+        """
+        # Imported here so that small matrices never load SciPy.
+        import scipy.sparse
+
+        rows, cols, values = [], [], []
+        for start, _, block in iter_row_blocks(self.data):
+            block_rows, block_cols = np.nonzero(block)
+            rows.append(block_rows + start)
+            cols.append(block_cols)
+            values.append(block[block_rows, block_cols])
+        coo = scipy.sparse.coo_array(
+            (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(self.rows, self.cols), dtype=self.dtype
+        )
+        self._sparse = scipy.sparse.dok_array(coo)
+        self._buffer = None
+
+    def _to_dense(self):
+        """
+        Moves the values from sparse storage into a fresh dense buffer.
+        """
+        coo = self._sparse.tocoo()
+        self._buffer = allocate(coo.shape, dtype=self.dtype)
+        self._buffer[coo.row, coo.col] = coo.data
+        self._sparse = None
@@ -0,0 +1,427 @@
+import io
+
+import numpy as np
+
+from .instrumentation import timed
+from .sparse_utils import is_sparse
+
+class MatrixExportError(Exception):
+    """
+    Raised when data cannot be exported in the requested format.
+    """
+
+# Number of cells formatted per chunk; bounds the memory and the time
+# spent per chunk when exports are streamed.
+CHUNK_CELLS = 1 << 16
+
+TEXT_FORMATS = {
+    'csv': ('CSV', '.csv'),
+    'tsv': ('TSV', '.tsv'),
+    'latex': ('LaTeX', '.tex'),
+    'numpy': ('NumPy', '.txt'),
+}
+
+BINARY_FORMATS = {
+    'npy': ('NumPy Binary', '.npy'),
+    'mtx': ('Matrix Market', '.mtx'),
+}
+
+def format_label(fmt):
+    """
+    Returns the display name of an export format.
+
+    Args:
+        fmt (str): Export format identifier.
+
+    Returns:
+        str: The display name.
+    """
+    return {**TEXT_FORMATS, **BINARY_FORMATS}[fmt][0]
+
+def file_extension(fmt, multiple=False):
+    """
+    Returns the file extension used for an export format.
+
+    Args:
+        fmt (str): Export format identifier.
+        multiple (bool, optional): Whether several arrays are exported,
+                                   which turns .npy into .npz.
+
+    Returns:
+        str: The extension including the leading dot.
+    """
+    if fmt == 'npy' and multiple:
+        return '.npz'
+    return {**TEXT_FORMATS, **BINARY_FORMATS}[fmt][1]
+
+def _format_cells(block, precision):
+    """
+    Formats a block of values as strings in a single vectorized pass.
+
+    Args:
+        block (ndarray): A 2-D block of values.
+        precision (int): Number of significant digits.
+
+    Returns:
+        ndarray: Array of formatted strings with the shape of block.
+    """
+    spec = f'%.{precision}g'
+    if block.dtype.hasobject:
+        # Rationals are written exactly, as fractions such as -3/4.
+        return block.astype(str)
+    if not np.iscomplexobj(block):
+        return np.char.mod(spec, block)
+
+    real = np.char.mod(spec, block.real)
+    imag = np.char.mod(f'%+.{precision}g', block.imag)
+    return np.char.add(np.char.add(real, imag), 'j')
+
+def _row_blocks(array):
+    """
+    Splits a 2-D array into blocks of whole rows of about CHUNK_CELLS cells.
+
+    Args:
+        array (ndarray or scipy.sparse.csr_array): The array to split.
+
+    Yields:
+        ndarray: Consecutive dense row blocks; views for dense input.
+    """
+    step = max(1, CHUNK_CELLS // max(1, array.shape[1]))
+    for start in range(0, array.shape[0], step):
+        block = array[start:start + step]
+        yield block.toarray() if is_sparse(block) else block
+
+def _iter_delimited(array, precision, delimiter):
+    """
+    Streams a 2-D array as delimiter-separated rows.
+
+    Args:
+        array (ndarray): The array to export.
+        precision (int): Number of significant digits.
+        delimiter (str): Column delimiter.
+
+    Yields:
+        str: Consecutive chunks of the text.
+    """
+    for block in _row_blocks(array):
+        cells = _format_cells(block, precision)
+        yield ''.join(delimiter.join(row) + '\n' for row in cells)
+
+def _iter_latex(array, precision):
+    """
+    Streams a 2-D array as a LaTeX bmatrix environment.
+
+    Args:
+        array (ndarray): The array to export.
+        precision (int): Number of significant digits.
+
+    Yields:
+        str: Consecutive chunks of the text.
+    """
+    yield '\\begin{bmatrix}\n'
+    last = array.shape[0] - 1
+    start = 0
+    for block in _row_blocks(array):
+        cells = _format_cells(block, precision)
+        if np.iscomplexobj(block):
+            cells = np.char.replace(cells, 'j', 'i')
+        lines = []
+        for offset, row in enumerate(cells):
+            ending = '' if start + offset == last else ' \\\\'
+            lines.append('  ' + ' & '.join(row) + ending + '\n')
+        start += len(block)
+        yield ''.join(lines)
+    yield '\\end{bmatrix}\n'
+
+def _iter_numpy(array, precision):
+    """
+    Streams a 2-D array as a nested list literal accepted by numpy.array().
+
+    Args:
+        array (ndarray): The array to export.
+        precision (int): Number of significant digits.
+
+    Yields:
+        str: Consecutive chunks of the text.
+    """
+    last = array.shape[0] - 1
+    start = 0
+    for block in _row_blocks(array):
+        cells = _format_cells(block, precision)
+        lines = []
+        for offset, row in enumerate(cells):
+            index = start + offset
+            opening = '[[' if index == 0 else ' ['
+            closing = ']]' if index == last else '],'
+            lines.append(opening + ', '.join(row) + closing + '\n')
+        start += len(block)
+        yield ''.join(lines)
+
+def _iter_text(array, fmt, precision):
+    """
+    Streams a 2-D array as text in one of the text formats.
+
+    Args:
+        array (ndarray): The array to export.
+        fmt (str): One of the TEXT_FORMATS identifiers.
+        precision (int): Number of significant digits.
+
+    Yields:
+        str: Consecutive chunks of the text.
+    """
+    if fmt == 'csv':
+        return _iter_delimited(array, precision, ',')
+    if fmt == 'tsv':
+        return _iter_delimited(array, precision, '\t')
+    if fmt == 'latex':
+        return _iter_latex(array, precision)
+    return _iter_numpy(array, precision)
+
+def _iter_npy(array):
+    """
+    Streams a 2-D array in the NumPy .npy format.
+
+    Rationals are written as strings such as '-3/4', since .npy files
+    cannot hold Python objects without pickling.
+
+    Args:
+        array (ndarray or scipy.sparse.csr_array): The array to export.
+
+    Yields:
+        bytes: The header followed by the raw data in row blocks.
+    """
+    if array.dtype.hasobject:
+        array = array.astype(str)
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, {
+        'descr': np.lib.format.dtype_to_descr(array.dtype),
+        'fortran_order': False,
+        'shape': array.shape,
+    })
+    yield header.getvalue()
+    for block in _row_blocks(array):
+        yield np.ascontiguousarray(block).tobytes()
+
+def _iter_mtx(array, precision):
+    """
+    Streams a 2-D array in the Matrix Market format.
+
+    Dense arrays use the array format, sparse arrays the coordinate
+    format, so only their nonzeros are written.
+
+    Args:
+        array (ndarray or scipy.sparse.csr_array): The array to export.
+        precision (int): Number of significant digits.
+
+    Yields:
+        bytes: Consecutive chunks of the file.
+    """
+    field = 'complex' if np.iscomplexobj(array) else 'real'
+    spec = f'%.{precision}g'
+
+    def format_values(values):
+        if field == 'real':
+            return np.char.mod(spec, values)
+        return np.char.add(np.char.add(np.char.mod(spec, values.real), ' '),
+                           np.char.mod(spec, values.imag))
+
+    if is_sparse(array):
+        coo = array.tocoo()
+        yield (f'%%MatrixMarket matrix coordinate {field} general\n'
+               f'{array.shape[0]} {array.shape[1]} {coo.nnz}\n').encode()
+        for start in range(0, coo.nnz, CHUNK_CELLS):
+            stop = start + CHUNK_CELLS
+            positions = np.char.add(np.char.add(np.char.mod('%d', coo.row[start:stop] + 1), ' '),
+                                    np.char.mod('%d', coo.col[start:stop] + 1))
+            cells = np.char.add(np.char.add(positions, ' '), format_values(coo.data[start:stop]))
+            yield ('\n'.join(cells) + '\n').encode()
+        return
+
+    yield f'%%MatrixMarket matrix array {field} general\n{array.shape[0]} {array.shape[1]}\n'.encode()
+
+    # The array format lists values column by column.
+    for block in _row_blocks(array.T):
+        yield ('\n'.join(format_values(block.ravel())) + '\n').encode()
+
+def _as_2d(array):
+    """
+    Returns an array as 2-D, turning 1-D arrays into a single row.
+
+    Args:
+        array (array_like or scipy.sparse array): A 1-D or 2-D array.
+
+    Returns:
+        ndarray or scipy.sparse.csr_array: The 2-D array; sparse input stays sparse.
+    """
+    if is_sparse(array):
+        import scipy.sparse
+
+        return scipy.sparse.csr_array(array)
+    array = np.asarray(array)
+    return array.reshape(1, -1) if array.ndim == 1 else array
+
+def iter_matrix(array, fmt, precision=6):
+    """
+    Streams a matrix in the given format.
+
+    Args:
+        array (array_like or scipy.sparse array): A 1-D or 2-D array; 1-D arrays
+                                                  are exported as a single row.
+        fmt (str): Export format identifier.
+        precision (int, optional): Number of significant digits for text output.
+
+    Yields:
+        bytes: Consecutive chunks of the encoded output.
+    """
+    array = _as_2d(array)
+    if fmt == 'npy':
+        yield from _iter_npy(array)
+    elif fmt == 'mtx':
+        yield from _iter_mtx(array, precision)
+    elif fmt in TEXT_FORMATS:
+        for chunk in _iter_text(array, fmt, precision):
+            yield chunk.encode()
+    else:
+        raise MatrixExportError(f'Unknown export format: {fmt}')
+
+def _section_header(label, fmt):
+    """
+    Returns the line that introduces a factor in a multi-factor text export.
+
+    Args:
+        label (str): Label of the factor.
+        fmt (str): One of the TEXT_FORMATS identifiers.
+
+    Returns:
+        str: The header line.
+    """
+    if fmt in ('csv', 'tsv'):
+        return f'# {label}\n'
+    if fmt == 'latex':
+        return f'{label} =\n'
+    return f'# {label} =\n'
+
+def _diagnostics_comment(diagnostics, fmt):
+    """
+    Formats the diagnostics of a result as comment lines.
+
+    Args:
+        diagnostics (Diagnostics): The diagnostics.
+        fmt (str): One of the TEXT_FORMATS identifiers.
+
+    Returns:
+        str: The lines, commented out so that the factors still load.
+    """
+    prefix = '% ' if fmt == 'latex' else '# '
+    lines = ['diagnostics:', *diagnostics.to_text().splitlines()]
+    return ''.join(prefix + line + '\n' for line in lines)
+
+def result_arrays(result):
+    """
+    Returns the factors of a decomposition result as named arrays.
+
+    The names follow the layout of exported .npz archives: a labels
+    array, and factor_i for each factor. Sparse factors are stored as
+    factor_i_shape, factor_i_row, factor_i_col and factor_i_data.
+    Rational factors are stored as strings such as '-3/4'. Diagnostics
+    are stored as diagnostics_names, diagnostics_values and diagnostics_eps.
+
+    Args:
+        result (DecompositionResult): The result to convert.
+
+    Returns:
+        dict: Mapping of array names to ndarrays.
+    """
+    arrays = {'labels': np.array([label for label, _ in result.factors])}
+    if result.diagnostics is not None:
+        values = result.diagnostics.values()
+        arrays['diagnostics_names'] = np.array(list(values), dtype=str)
+        arrays['diagnostics_values'] = np.array(list(values.values()), dtype=np.float64)
+        arrays['diagnostics_eps'] = np.array(result.diagnostics.eps)
+    for index, (_, factor) in enumerate(result.factors):
+        if is_sparse(factor):
+            coo = factor.tocoo()
+            arrays[f'factor_{index}_shape'] = np.array(coo.shape)
+            arrays[f'factor_{index}_row'] = coo.row
+            arrays[f'factor_{index}_col'] = coo.col
+            arrays[f'factor_{index}_data'] = coo.data
+        elif factor.dtype.hasobject:
+            arrays[f'factor_{index}'] = factor.astype(str)
+        else:
+            arrays[f'factor_{index}'] = np.asarray(factor)
+    return arrays
+
+def iter_result(result, fmt, precision=6):
+    """
+    Streams the factors of a decomposition result in the given format.
+
+    Text formats write the factors one after another, each preceded by
+    its label, followed by the diagnostics as comment lines. The npy
+    format writes an .npz archive laid out as described in
+    result_arrays(). Matrix Market files hold a single matrix, so
+    results cannot be exported in that format.
+
+    Args:
+        result (DecompositionResult): The result to export.
+        fmt (str): Export format identifier.
+        precision (int, optional): Number of significant digits for text output.
+
+    Yields:
+        bytes: Consecutive chunks of the encoded output.
+
+    Raises:
+        MatrixExportError: If the format cannot hold several matrices.
+    """
+    if fmt == 'mtx':
+        raise MatrixExportError('Matrix Market files can only hold a single matrix')
+
+    if fmt == 'npy':
+        archive = io.BytesIO()
+        np.savez(archive, **result_arrays(result))
+        yield archive.getvalue()
+        return
+
+    for index, (label, factor) in enumerate(result.factors):
+        if index:
+            yield b'\n'
+        yield _section_header(label, fmt).encode()
+        yield from iter_matrix(factor, fmt, precision)
+
+    if result.diagnostics is not None:
+        yield ('\n' + _diagnostics_comment(result.diagnostics, fmt)).encode()
+
+@timed('export_text')
+def export_text(source, fmt, precision=6):
+    """
+    Exports a matrix or a decomposition result as a single string.
+
+    Intended for clipboard-sized data; large exports should be
+    streamed to a file instead.
+
+    Args:
+        source (ndarray or DecompositionResult): The data to export.
+        fmt (str): One of the TEXT_FORMATS identifiers.
+        precision (int, optional): Number of significant digits.
+
+    Returns:
+        str: The exported text.
+    """
+    if fmt not in TEXT_FORMATS:
+        raise MatrixExportError(f'{format_label(fmt)} is not a text format')
+    return b''.join(iter_export(source, fmt, precision)).decode()
+
+def iter_export(source, fmt, precision=6):
+    """
+    Streams a matrix or a decomposition result in the given format.
+
+    Args:
+        source (ndarray or DecompositionResult): The data to export.
+        fmt (str): Export format identifier.
+        precision (int, optional): Number of significant digits for text output.
+
+    Returns:
+        iterator of bytes: Consecutive chunks of the encoded output.
+    """
+    if hasattr(source, 'factors'):
+        return iter_result(source, fmt, precision)
+    return iter_matrix(source, fmt, precision)
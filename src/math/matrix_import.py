@@ -0,0 +1,251 @@
+import io
+import os
+import re
+
+import numpy as np
+
+from .element_types import convert, is_exact, parse_value, promoted_dtype
+from .instrumentation import timed
+from .out_of_core import MEMORY_LIMIT, allocate, copy_rows, is_file_backed
+from .sparse_utils import is_sparse
+
+class MatrixFormatError(Exception):
+    """
+    Raised when input cannot be parsed as a matrix.
+    """
+
+_BRACKETED_ROW = re.compile(r'\[([^\[\]]*)\]')
+
+def _as_matrix(array, dtype=np.float64):
+    """
+    Validates parsed input and shapes it as a 2-D matrix of an element type.
+
+    Complex input read for a real element type stays complex.
+
+    Args:
+        array (ndarray): The parsed values.
+        dtype (numpy.dtype, optional): The element type. Defaults to float64.
+
+    Returns:
+        ndarray: A 2-D array.
+
+    Raises:
+        MatrixFormatError: If the input is empty, has more than two dimensions,
+                           or cannot be represented in the element type.
+    """
+    if array.ndim > 2:
+        raise MatrixFormatError(f'Expected a 2-D matrix, got {array.ndim} dimensions')
+    if array.size == 0:
+        raise MatrixFormatError('The input contains no values')
+
+    try:
+        return convert(np.atleast_2d(array), promoted_dtype(array.dtype, np.dtype(dtype)))
+    except ValueError as error:
+        raise MatrixFormatError(str(error)) from error
+
+def _sniff_delimiter(line):
+    """
+    Guesses the column delimiter from the first line of text input.
+
+    Args:
+        line (str): The first non-empty line.
+
+    Returns:
+        str: The delimiter, or None for runs of whitespace.
+    """
+    for delimiter in ('\t', ',', ';'):
+        if delimiter in line:
+            return delimiter
+    return None
+
+@timed('import_text')
+def parse_text(text, dtype=np.float64):
+    """
+    Parses a matrix from delimited text.
+
+    Accepts CSV, TSV, semicolon or whitespace separated rows, as well
+    as bracketed row literals such as [[1, 2], [3, 4]]. Complex values
+    are written as 1+2j, rationals also as fractions such as -3/4.
+
+    Args:
+        text (str): The text to parse.
+        dtype (numpy.dtype, optional): The element type. Defaults to float64.
+
+    Returns:
+        ndarray: A 2-D array.
+
+    Raises:
+        MatrixFormatError: If the text is not a rectangular numeric matrix.
+    """
+    text = text.strip()
+    if text.startswith('['):
+        text = '\n'.join(_BRACKETED_ROW.findall(text))
+
+    lines = text.splitlines()
+    if not lines:
+        raise MatrixFormatError('The input contains no values')
+
+    return _load_text(io.StringIO(text), _sniff_delimiter(lines[0]), dtype)
+
+def _load_text(stream, delimiter, dtype=np.float64):
+    """
+    Reads delimited rows from a text stream.
+
+    Complex and rational values are parsed by element_types.parse_value(),
+    so they are written as in the cells of the matrix, such as 1-2i or -3/4.
+
+    Args:
+        stream (file-like): The text stream.
+        delimiter (str): Column delimiter, or None for whitespace.
+        dtype (numpy.dtype, optional): The element type. Defaults to float64.
+
+    Returns:
+        ndarray: A 2-D array.
+    """
+    dtype = np.dtype(dtype)
+    if is_exact(dtype) or dtype.kind == 'c':
+        value_dtype = dtype if is_exact(dtype) else np.dtype(np.complex128)
+        options = {'dtype': value_dtype, 'converters': lambda text: parse_value(text, value_dtype)}
+    else:
+        options = {'dtype': np.float64}
+    try:
+        array = np.loadtxt(stream, delimiter=delimiter, ndmin=2, **options)
+    except ValueError as error:
+        raise MatrixFormatError(f'Could not parse matrix: {error}') from error
+    return _as_matrix(array, dtype)
+
+def load_npy(path, dtype=np.float64):
+    """
+    Loads a matrix from a NumPy .npy file.
+
+    The file is memory-mapped, so only the pages that are
+    copied into the matrix data are read from disk. Large files
+    of another dtype are converted into a file-backed copy
+    block by block rather than in memory.
+
+    Args:
+        path (str): Path to the file.
+        dtype (numpy.dtype, optional): The element type. Defaults to float64.
+
+    Returns:
+        ndarray: A 2-D array, possibly memory-mapped.
+    """
+    try:
+        array = np.load(path, mmap_mode='r', allow_pickle=False)
+    except ValueError as error:
+        raise MatrixFormatError(f'Could not read {os.path.basename(path)}: {error}') from error
+
+    dtype = promoted_dtype(array.dtype, np.dtype(dtype))
+    if array.ndim == 2 and array.dtype != dtype and array.size * dtype.itemsize > MEMORY_LIMIT:
+        if is_exact(dtype):
+            raise MatrixFormatError('Matrices this large cannot hold rational values')
+        converted = allocate(array.shape, file_backed=True, dtype=dtype)
+        copy_rows(converted, array)
+        array = converted
+    return _as_matrix(array, dtype)
+
+def load_mtx(path, dtype=np.float64):
+    """
+    Loads a matrix from a Matrix Market .mtx file.
+
+    Files in coordinate format are kept sparse, so they are
+    never densified on the way into the matrix data; rational
+    matrices are dense, so they are densified.
+
+    Args:
+        path (str): Path to the file.
+        dtype (numpy.dtype, optional): The element type. Defaults to float64.
+
+    Returns:
+        ndarray or scipy.sparse.csr_array: A 2-D matrix.
+    """
+    import scipy.io
+    import scipy.sparse
+
+    try:
+        matrix = scipy.io.mmread(path)
+    except ValueError as error:
+        raise MatrixFormatError(f'Could not read {os.path.basename(path)}: {error}') from error
+
+    if not scipy.sparse.issparse(matrix) or is_exact(np.dtype(dtype)):
+        matrix = matrix.toarray() if scipy.sparse.issparse(matrix) else matrix
+        return _as_matrix(np.asarray(matrix), dtype)
+
+    if min(matrix.shape) == 0:
+        raise MatrixFormatError('The input contains no values')
+    return scipy.sparse.csr_array(matrix, dtype=promoted_dtype(matrix.dtype, np.dtype(dtype)))
+
+def load_delimited(path, dtype=np.float64):
+    """
+    Loads a matrix from a delimited text file, reading it as a stream.
+
+    Args:
+        path (str): Path to the file.
+        dtype (numpy.dtype, optional): The element type. Defaults to float64.
+
+    Returns:
+        ndarray: A 2-D array.
+    """
+    with open(path, encoding='utf-8') as stream:
+        first_line = ''
+        for line in stream:
+            if line.strip():
+                first_line = line
+                break
+        stream.seek(0)
+        return _load_text(stream, _sniff_delimiter(first_line), dtype)
+
+LOADERS = {
+    '.npy': load_npy,
+    '.mtx': load_mtx,
+    '.csv': load_delimited,
+    '.tsv': load_delimited,
+    '.txt': load_delimited,
+}
+
+def load_file(path, dtype=np.float64):
+    """
+    Loads a matrix from a file, choosing the format by its extension.
+
+    Args:
+        path (str): Path to the file.
+        dtype (numpy.dtype, optional): The element type. Defaults to float64.
+
+    Returns:
+        ndarray or scipy.sparse.csr_array: A 2-D matrix.
+
+    Raises:
+        MatrixFormatError: If the file cannot be read or parsed.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    loader = LOADERS.get(extension, load_delimited)
+    try:
+        return loader(path, dtype)
+    except OSError as error:
+        raise MatrixFormatError(f'Could not open {os.path.basename(path)}: {error.strerror}') from error
+    except UnicodeDecodeError as error:
+        raise MatrixFormatError(f'{os.path.basename(path)} is not a text file') from error
+
+@timed('import_file')
+def read_file(path, dtype=np.float64):
+    """
+    Loads a matrix from a file and reads it fully into memory.
+
+    Memory-mapped input is copied, so the result does not depend on the
+    file any more; sparse input stays sparse. Input larger than the
+    memory limit is returned memory-mapped instead, to be copied block
+    by block into the matrix data.
+
+    Args:
+        path (str): Path to the file.
+        dtype (numpy.dtype, optional): The element type. Defaults to float64.
+
+    Returns:
+        ndarray or scipy.sparse.csr_array: A 2-D matrix.
+    """
+    matrix = load_file(path, dtype)
+    if is_sparse(matrix):
+        return matrix
+    if is_file_backed(matrix) and matrix.nbytes > MEMORY_LIMIT:
+        return matrix
+    return np.array(matrix)
@@ -0,0 +1,314 @@
+import os
+import tempfile
+
+import numpy as np
+
+# Largest dense array, in bytes, kept in memory. Larger matrices are
+# stored in memory-mapped files and decomposed with blocked algorithms
+# that only hold a few row blocks in memory at a time.
+MEMORY_LIMIT = 1 << 30
+
+# Size in bytes of the row blocks and tiles read at a time.
+BLOCK_BYTES = 64 << 20
+
+def cache_dir():
+    """
+    Returns the directory holding the files behind memory-mapped matrices.
+
+    The user cache directory is used rather than the system temporary
+    directory, which is often a RAM-backed tmpfs.
+
+    Returns:
+        str: Path of the directory.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'eigen', 'matrices')
+
+def is_file_backed(array):
+    """
+    Checks whether an array is memory-mapped from a file.
+
+    Args:
+        array (object): The value to check.
+
+    Returns:
+        bool: True for numpy.memmap arrays and views of them.
+    """
+    return isinstance(array, np.memmap)
+
+def allocate(shape, file_backed=None, dtype=np.float64):
+    """
+    Allocates a zero-filled array, in memory or in a file.
+
+    File-backed arrays live in an anonymous temporary file that is
+    removed as soon as the array is garbage collected. The file is
+    sparse, so untouched zeros take no disk space. Object arrays
+    cannot be memory-mapped and are always allocated in memory.
+
+    Args:
+        shape (tuple of int): Shape of the array.
+        file_backed (bool, optional): Whether to map the array from a file.
+                                      Defaults to doing so for arrays
+                                      larger than MEMORY_LIMIT.
+        dtype (numpy.dtype, optional): Element type. Defaults to float64.
+
+    Returns:
+        ndarray or numpy.memmap: The array.
+    """
+    dtype = np.dtype(dtype)
+    if file_backed is None:
+        file_backed = int(np.prod(shape)) * dtype.itemsize > MEMORY_LIMIT
+    if not file_backed or 0 in shape or dtype.hasobject:
+        return np.zeros(shape, dtype=dtype)
+
+    os.makedirs(cache_dir(), exist_ok=True)
+    with tempfile.TemporaryFile(dir=cache_dir(), prefix='eigen-') as stream:
+        # The mapping keeps the unlinked file alive after it is closed.
+        return np.memmap(stream, dtype=dtype, mode='w+', shape=shape)
+
+def block_rows(array, block_bytes=BLOCK_BYTES):
+    """
+    Returns the number of rows per block so that a block has about block_bytes.
+
+    Args:
+        array (ndarray or scipy.sparse array): A 2-D array.
+        block_bytes (int, optional): Target size of a block.
+
+    Returns:
+        int: Number of rows, at least one.
+    """
+    return max(1, block_bytes // max(1, array.shape[1] * array.dtype.itemsize))
+
+def iter_row_blocks(array, rows=None):
+    """
+    Reads a 2-D array in blocks of whole rows.
+
+    Args:
+        array (ndarray or scipy.sparse.csr_array): The array to read,
+                                                   possibly memory-mapped.
+        rows (int, optional): Rows per block. Defaults to block_rows().
+
+    Yields:
+        tuple: (start, stop, block); memory-mapped blocks are copied into
+               memory, other blocks are views or sparse slices.
+    """
+    step = rows or block_rows(array)
+    for start in range(0, array.shape[0], step):
+        stop = min(start + step, array.shape[0])
+        block = array[start:stop]
+        yield start, stop, np.array(block) if is_file_backed(block) else block
+
+def copy_rows(target, source):
+    """
+    Copies a 2-D array into another one block by block.
+
+    Args:
+        target (ndarray): Destination with the shape of source.
+        source (ndarray): The array to copy.
+
+    Returns:
+        int: Number of nonzero values copied.
+    """
+    nonzeros = 0
+    for start, stop, block in iter_row_blocks(source):
+        target[start:stop] = block
+        nonzeros += np.count_nonzero(block)
+    return nonzeros
+
+def all_finite(array):
+    """
+    Checks that an array holds no infinite or NaN values, block by block.
+
+    Args:
+        array (ndarray): A 2-D array, possibly memory-mapped.
+
+    Returns:
+        bool: True if every value is finite.
+    """
+    return all(np.all(np.isfinite(block)) for _, _, block in iter_row_blocks(array))
+
+def is_symmetric(array, tolerance=1e-12):
+    """
+    Checks whether a square array is symmetric, or Hermitian if it is
+    complex, comparing it tile by tile.
+
+    Each tile is compared with its transposed counterpart, so the file is
+    read about twice, in tiles that span few pages of a memory map.
+
+    Args:
+        array (ndarray): A square 2-D array, possibly memory-mapped.
+        tolerance (float, optional): Allowed asymmetry relative to the
+                                     largest magnitude.
+
+    Returns:
+        bool: True if the array is symmetric or Hermitian.
+    """
+    n = array.shape[0]
+    tile = max(1, int(np.sqrt(BLOCK_BYTES / 16)))
+    asymmetry = scale = 0.0
+    for row in range(0, n, tile):
+        for col in range(row, n, tile):
+            upper = np.asarray(array[row:row + tile, col:col + tile])
+            lower = np.asarray(array[col:col + tile, row:row + tile])
+            asymmetry = max(asymmetry, float(np.abs(upper - lower.T.conj()).max()))
+            scale = max(scale, float(np.abs(upper).max()), float(np.abs(lower).max()))
+    return asymmetry <= tolerance * scale
+
+def _adjoint(block):
+    """
+    Returns the conjugate transpose of a block, which is just the
+    transpose for real blocks.
+
+    Args:
+        block (ndarray or scipy.sparse array): A 2-D block.
+
+    Returns:
+        ndarray or scipy.sparse array: The adjoint.
+    """
+    return block.T.conj() if np.iscomplexobj(block) else block.T
+
+def _range_finder(a, rank, power_iterations, rng, k=None, tolerance=0.0):
+    """
+    Finds an orthonormal basis approximating the dominant range of a matrix.
+
+    Every product with the matrix or its transpose is one pass over
+    its row blocks.
+
+    Args:
+        a (ndarray or scipy.sparse array): A 2-D array, possibly memory-mapped.
+        rank (int): Number of basis vectors.
+        power_iterations (int): Largest number of power iterations, which
+                                sharpen the basis for slowly decaying spectra.
+        rng (numpy.random.Generator): Source of the random test matrix.
+        k (int, optional): Number of leading singular values whose
+                           convergence ends the power iterations early.
+                           Defaults to rank.
+        tolerance (float, optional): Largest change of those singular values
+                                     between iterations, relative to the
+                                     largest one, considered converged.
+
+    Returns:
+        ndarray: An (rows, rank) matrix with orthonormal columns.
+    """
+    rows, cols = a.shape
+    dtype = np.result_type(a.dtype, np.float64)
+    sketch = np.empty((rows, rank), dtype=dtype)
+    test = rng.standard_normal((cols, rank))
+    previous = None
+    for iteration in range(power_iterations + 1):
+        for start, stop, block in iter_row_blocks(a):
+            sketch[start:stop] = block @ test
+        basis = np.linalg.qr(sketch)[0]
+        if iteration == power_iterations:
+            return basis
+
+        test = np.zeros((cols, rank), dtype=dtype)
+        for start, stop, block in iter_row_blocks(a):
+            test += _adjoint(block) @ basis[start:stop]
+
+        # The singular values of aᴴ basis are the current estimates of
+        # the leading singular values of a.
+        estimates = np.linalg.svd(test, compute_uv=False)[:k]
+        if previous is not None and np.max(np.abs(estimates - previous)) <= tolerance * estimates[0]:
+            return basis
+        previous = estimates
+        test = np.linalg.qr(test)[0]
+
+def _project(a, basis):
+    """
+    Computes basisᴴ a in one pass over the row blocks.
+
+    Args:
+        a (ndarray or scipy.sparse array): A 2-D array, possibly memory-mapped.
+        basis (ndarray): A (rows, rank) matrix.
+
+    Returns:
+        ndarray: The (rank, cols) projection.
+    """
+    projection = np.zeros((basis.shape[1], a.shape[1]), dtype=np.result_type(a.dtype, basis.dtype))
+    for start, stop, block in iter_row_blocks(a):
+        projection += _adjoint(basis[start:stop]) @ block
+    return projection
+
+def randomized_svd(a, k, oversampling=10, power_iterations=2, tolerance=0.0, rng=None):
+    """
+    Approximates the k largest singular triplets over row blocks.
+
+    Uses the randomized range finder of Halko, Martinsson and Tropp;
+    the matrix is read at most 2 * power_iterations + 2 times.
+
+    Args:
+        a (ndarray or scipy.sparse array): A 2-D array, possibly memory-mapped.
+        k (int): Number of singular triplets.
+        oversampling (int, optional): Extra basis vectors improving accuracy.
+        power_iterations (int, optional): Largest number of power iterations.
+        tolerance (float, optional): Relative change of the k singular values
+                                     below which the power iterations stop.
+        rng (numpy.random.Generator, optional): Random number generator.
+
+    Returns:
+        tuple of ndarray: (U, s, Vt) with singular values in descending order.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    rank = min(k + oversampling, *a.shape)
+    basis = _range_finder(a, rank, power_iterations, rng, k, tolerance)
+    u, s, vt = np.linalg.svd(_project(a, basis), full_matrices=False)
+    return (basis @ u)[:, :k], s[:k], vt[:k]
+
+def randomized_eigh(a, k, oversampling=10, power_iterations=2, rng=None):
+    """
+    Approximates the k eigenpairs of largest magnitude of a symmetric
+    or Hermitian matrix.
+
+    Args:
+        a (ndarray): A symmetric or Hermitian 2-D array, possibly memory-mapped.
+        k (int): Number of eigenpairs.
+        oversampling (int, optional): Extra basis vectors improving accuracy.
+        power_iterations (int, optional): Number of power iterations.
+        rng (numpy.random.Generator, optional): Random number generator.
+
+    Returns:
+        tuple of ndarray: (eigenvalues, eigenvectors), ordered by
+                          decreasing magnitude.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    rank = min(k + oversampling, a.shape[0])
+    basis = _range_finder(a, rank, power_iterations, rng)
+    eigenvalues, eigenvectors = np.linalg.eigh(_project(a, basis) @ basis)
+    order = np.argsort(-np.abs(eigenvalues))[:k]
+    return eigenvalues[order], basis @ eigenvectors[:, order]
+
+def tiled_qr(a):
+    """
+    Computes the reduced QR decomposition of a tall matrix over row blocks.
+
+    Implements TSQR: every row block is factored on its own, the stacked
+    R factors are factored once more, and the Q factor is assembled
+    block by block. Only R, a few row blocks and the stacked R factors
+    are held in memory; Q is file-backed if it is large.
+
+    Args:
+        a (ndarray): A 2-D array with at least as many rows as columns,
+                     possibly memory-mapped.
+
+    Returns:
+        tuple of ndarray: (Q, R) with Q of shape (rows, cols).
+    """
+    rows, cols = a.shape
+    step = max(cols, block_rows(a))
+    q = allocate((rows, cols), dtype=np.result_type(a.dtype, np.float64))
+
+    bounds = []
+    local_rs = []
+    for start, stop, block in iter_row_blocks(a, step):
+        local_q, local_r = np.linalg.qr(block)
+        q[start:stop, :local_q.shape[1]] = local_q
+        bounds.append((start, stop, local_r.shape[0]))
+        local_rs.append(local_r)
+
+    merge_q, r = np.linalg.qr(np.vstack(local_rs))
+    offset = 0
+    for start, stop, height in bounds:
+        q[start:stop] = q[start:stop, :height] @ merge_q[offset:offset + height]
+        offset += height
+    return q, r
@@ -0,0 +1,410 @@
+import contextlib
+import ctypes
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Smallest order of a matrix decomposed by the tiled algorithms; for
+# smaller matrices the tasks are too short to pay for their scheduling.
+PARALLEL_MIN_SIZE = 512
+
+# Order of the square tiles the matrix is split into.
+TILE_SIZE = 256
+
+# Environment variables that set the number of BLAS threads, in the
+# order the common BLAS libraries read them.
+_BLAS_THREAD_VARIABLES = ('OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'BLIS_NUM_THREADS', 'OMP_NUM_THREADS')
+
+# Prefixes and suffixes of the thread functions exported by OpenBLAS,
+# including the builds bundled with NumPy and SciPy wheels.
+_OPENBLAS_PREFIXES = ('openblas', 'scipy_openblas')
+_OPENBLAS_SUFFIXES = ('', '64_')
+
+# The BLAS environment the process started with, restored when the
+# thread count is reset to every core.
+_BLAS_ENVIRONMENT = {variable: os.environ.get(variable) for variable in _BLAS_THREAD_VARIABLES}
+
+_thread_count = 0
+_openblas_functions = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+def set_thread_count(count):
+    """
+    Sets the number of threads the decompositions may use.
+
+    Caps both the tiled decompositions and BLAS: libraries already
+    loaded are limited at once, libraries loaded later read the limit
+    from the environment.
+
+    Args:
+        count (int): Number of threads; 0 uses every core, or the BLAS
+                     thread count set in the environment at start.
+    """
+    global _thread_count
+    _thread_count = max(0, count)
+    for variable, value in _BLAS_ENVIRONMENT.items():
+        if _thread_count:
+            os.environ[variable] = str(_thread_count)
+        elif value is None:
+            os.environ.pop(variable, None)
+        else:
+            os.environ[variable] = value
+    _set_blas_threads(_blas_threads())
+
+def thread_count():
+    """
+    Returns the number of threads the tiled decompositions may use.
+
+    Returns:
+        int: The configured number of threads, or the number of cores if
+             none is configured.
+    """
+    return _thread_count or os.cpu_count() or 1
+
+def _blas_threads():
+    """
+    Returns the number of threads BLAS runs each call with.
+
+    Returns:
+        int: The number set in the environment, or the number of cores,
+             which is the default of the common BLAS libraries.
+    """
+    for variable in _BLAS_THREAD_VARIABLES:
+        try:
+            return max(1, int(os.environ[variable].split(',')[0]))
+        except (KeyError, ValueError):
+            continue
+    return os.cpu_count() or 1
+
+def _has_threadpoolctl():
+    """
+    Returns whether threadpoolctl is installed.
+
+    Returns:
+        bool: True if it can be imported.
+    """
+    try:
+        import threadpoolctl
+    except ImportError:
+        return False
+    return True
+
+def _openblas_threads():
+    """
+    Finds the thread functions of the OpenBLAS libraries loaded in this
+    process, for when threadpoolctl is not installed.
+
+    Libraries are found through /proc/self/maps, so on platforms other
+    than Linux none are.
+
+    Returns:
+        list of tuple: (get, set) functions of each library.
+    """
+    try:
+        with open('/proc/self/maps', encoding='utf-8') as stream:
+            paths = {line.split()[-1] for line in stream if 'openblas' in line.rsplit('/', 1)[-1]}
+    except OSError:
+        return []
+
+    for path in paths - _openblas_functions.keys():
+        functions = None
+        try:
+            library = ctypes.CDLL(path)
+        except OSError:
+            library = None
+        for prefix in _OPENBLAS_PREFIXES:
+            for suffix in _OPENBLAS_SUFFIXES:
+                get = getattr(library, f'{prefix}_get_num_threads{suffix}', None)
+                set_ = getattr(library, f'{prefix}_set_num_threads{suffix}', None)
+                if functions is None and get is not None and set_ is not None:
+                    get.restype = ctypes.c_int
+                    set_.argtypes = (ctypes.c_int,)
+                    set_.restype = None
+                    functions = (get, set_)
+        _openblas_functions[path] = functions
+    return [_openblas_functions[path] for path in sorted(paths) if _openblas_functions[path]]
+
+def _can_limit_blas():
+    """
+    Returns whether BLAS threads can be limited at run time.
+
+    Returns:
+        bool: True if threadpoolctl is installed or OpenBLAS is loaded.
+    """
+    return _has_threadpoolctl() or bool(_openblas_threads())
+
+def _set_blas_threads(count):
+    """
+    Sets the number of threads of the BLAS libraries loaded so far.
+
+    Args:
+        count (int): Number of threads.
+    """
+    if _has_threadpoolctl():
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(limits=count, user_api='blas')
+        return
+    for _, set_ in _openblas_threads():
+        set_(count)
+
+def workers(threads=None):
+    """
+    Returns the number of tile tasks run at a time.
+
+    Every task calls BLAS, so tasks times BLAS threads must not exceed
+    the thread count. BLAS is limited to one thread while tiled
+    decompositions run, through threadpoolctl if it is installed or the
+    thread functions of OpenBLAS otherwise; if neither is available,
+    the number of tasks is divided by the number of BLAS threads.
+
+    Args:
+        threads (int, optional): Number of threads. Defaults to thread_count().
+
+    Returns:
+        int: Number of concurrent tasks, at least one.
+    """
+    threads = threads or thread_count()
+    if _can_limit_blas():
+        return threads
+    return max(1, threads // _blas_threads())
+
+def is_worthwhile(a):
+    """
+    Returns whether a matrix is best decomposed by the tiled algorithms.
+
+    Args:
+        a (ndarray): The matrix.
+
+    Returns:
+        bool: True for real 2-D matrices of order at least PARALLEL_MIN_SIZE
+              when more than one task can run at a time.
+    """
+    return (a.ndim == 2 and min(a.shape) >= PARALLEL_MIN_SIZE
+            and a.dtype.kind == 'f' and workers() > 1)
+
+@contextlib.contextmanager
+def _single_threaded_blas():
+    """
+    Limits BLAS to one thread per call while the context is active.
+    """
+    if _has_threadpoolctl():
+        from threadpoolctl import threadpool_limits
+
+        with threadpool_limits(limits=1, user_api='blas'):
+            yield
+        return
+
+    functions = _openblas_threads()
+    previous = [get() for get, _ in functions]
+    for _, set_ in functions:
+        set_(1)
+    try:
+        yield
+    finally:
+        for (_, set_), count in zip(functions, previous):
+            set_(count)
+
+def _get_executor(count):
+    """
+    Returns the shared thread pool, recreating it if its size changed.
+
+    Args:
+        count (int): Number of threads.
+
+    Returns:
+        ThreadPoolExecutor: The pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None or _executor._max_workers != count:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix='eigen-tile')
+        return _executor
+
+@contextlib.contextmanager
+def _tasks(threads):
+    """
+    Provides a function running tasks concurrently on the shared pool.
+
+    Args:
+        threads (int): Number of threads, or None for thread_count().
+
+    Yields:
+        callable: run(func, items), which calls func on every item and
+                  returns once all calls are done, raising the first error.
+    """
+    count = workers(threads)
+    if count == 1:
+        yield lambda func, items: [func(item) for item in items]
+        return
+
+    executor = _get_executor(count)
+    with _single_threaded_blas():
+        yield lambda func, items: list(executor.map(func, items))
+
+def _tiles(start, stop, size):
+    """
+    Splits a range of indices into tiles.
+
+    Args:
+        start (int): First index.
+        stop (int): Index after the last one.
+        size (int): Tile size.
+
+    Returns:
+        list of slice: The tiles.
+    """
+    return [slice(begin, min(begin + size, stop)) for begin in range(start, stop, size)]
+
+def cholesky(a, threads=None, tile=TILE_SIZE):
+    """
+    Computes the lower Cholesky factor with a right-looking tiled algorithm.
+
+    Every step factors a diagonal tile, then solves the tiles below it
+    and updates the trailing tiles concurrently.
+
+    Args:
+        a (ndarray): A symmetric positive definite matrix.
+        threads (int, optional): Number of threads. Defaults to thread_count().
+        tile (int, optional): Tile size.
+
+    Returns:
+        ndarray: The lower triangular factor L with A = L Lᵀ.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the matrix is not positive definite.
+    """
+    import scipy.linalg
+
+    n = a.shape[0]
+    l = np.array(a, dtype=np.result_type(a.dtype, np.float32))
+    tiles = _tiles(0, n, tile)
+    with _tasks(threads) as run:
+        for step, kk in enumerate(tiles):
+            l[kk, kk] = np.linalg.cholesky(l[kk, kk])
+            below = tiles[step + 1:]
+
+            def solve(ii):
+                l[ii, kk] = scipy.linalg.solve_triangular(
+                    l[kk, kk], l[ii, kk].T, lower=True, check_finite=False
+                ).T
+
+            def update(pair):
+                ii, jj = pair
+                l[ii, jj] -= l[ii, kk] @ l[jj, kk].T
+
+            run(solve, below)
+            run(update, [(ii, jj) for index, jj in enumerate(below) for ii in below[index:]])
+    return np.tril(l)
+
+def lu(a, threads=None, tile=TILE_SIZE):
+    """
+    Computes the LU factorization with partial pivoting by a right-looking
+    blocked algorithm.
+
+    Every step factors a column panel with LAPACK, then swaps rows,
+    solves the block row of U and updates the trailing tiles concurrently.
+
+    Args:
+        a (ndarray): A 2-D matrix.
+        threads (int, optional): Number of threads. Defaults to thread_count().
+        tile (int, optional): Tile size.
+
+    Returns:
+        tuple of ndarray: (P, L, U) with A = P L U.
+    """
+    import scipy.linalg
+
+    rows, cols = a.shape
+    k = min(rows, cols)
+    lu = np.array(a, dtype=np.result_type(a.dtype, np.float32))
+    getrf, = scipy.linalg.get_lapack_funcs(('getrf',), (lu,))
+    permutation = np.arange(rows)
+    with _tasks(threads) as run:
+        for kk in _tiles(0, k, tile):
+            panel, pivots, info = getrf(lu[kk.start:, kk])
+            if info < 0:
+                raise np.linalg.LinAlgError(f'Illegal value in argument {-info} of getrf')
+            lu[kk.start:, kk] = panel
+
+            order = np.arange(rows - kk.start)
+            for index, pivot in enumerate(pivots):
+                order[[index, pivot]] = order[[pivot, index]]
+            lu[kk.start:, :kk.start] = lu[kk.start:, :kk.start][order]
+            permutation[kk.start:] = permutation[kk.start:][order]
+
+            trailing_rows = _tiles(kk.stop, rows, tile)
+            trailing_cols = _tiles(kk.stop, cols, tile)
+
+            def solve(jj):
+                lu[kk.start:, jj] = lu[kk.start:, jj][order]
+                lu[kk, jj] = scipy.linalg.solve_triangular(
+                    lu[kk, kk], lu[kk, jj], lower=True, unit_diagonal=True, check_finite=False
+                )
+
+            def update(pair):
+                ii, jj = pair
+                lu[ii, jj] -= lu[ii, kk] @ lu[kk, jj]
+
+            run(solve, trailing_cols)
+            run(update, [(ii, jj) for ii in trailing_rows for jj in trailing_cols])
+
+    l = np.tril(lu[:, :k], -1)
+    l[np.arange(k), np.arange(k)] = 1.0
+    p = np.zeros((rows, rows), dtype=lu.dtype)
+    p[permutation, np.arange(rows)] = 1.0
+    return p, l, np.triu(lu[:k])
+
+def qr(a, threads=None, tile=TILE_SIZE):
+    """
+    Computes the reduced QR factorization by a blocked Householder algorithm.
+
+    Every step factors a column panel with LAPACK and applies its
+    reflectors to the trailing column tiles concurrently; Q is formed
+    by applying the reflectors to the column tiles of the identity.
+
+    Args:
+        a (ndarray): A 2-D matrix.
+        threads (int, optional): Number of threads. Defaults to thread_count().
+        tile (int, optional): Tile size.
+
+    Returns:
+        tuple of ndarray: (Q, R) with Q of shape (rows, min(rows, cols)).
+    """
+    import scipy.linalg
+
+    rows, cols = a.shape
+    k = min(rows, cols)
+    r = np.array(a, dtype=np.result_type(a.dtype, np.float32), order='F')
+    geqrf, ormqr = scipy.linalg.get_lapack_funcs(('geqrf', 'ormqr'), (r,))
+    reflectors = []
+
+    def apply(target, panel, tau, trans):
+        def task(jj):
+            block = np.asfortranarray(target[:, jj])
+            result, _, info = ormqr('L', trans, panel, tau, block, lwork=max(1, block.shape[1]) * 64)
+            if info < 0:
+                raise np.linalg.LinAlgError(f'Illegal value in argument {-info} of ormqr')
+            target[:, jj] = result
+        return task
+
+    with _tasks(threads) as run:
+        for kk in _tiles(0, k, tile):
+            panel, tau, _, info = geqrf(r[kk.start:, kk])
+            if info < 0:
+                raise np.linalg.LinAlgError(f'Illegal value in argument {-info} of geqrf')
+            r[kk.start:, kk] = panel
+            reflectors.append((kk.start, panel, tau))
+            run(apply(r[kk.start:], panel, tau, 'T'), _tiles(kk.stop, cols, tile))
+
+        q = np.eye(rows, k, dtype=r.dtype, order='F')
+        for start, panel, tau in reversed(reflectors):
+            # Columns left of the panel are unit vectors the reflectors leave alone.
+            run(apply(q[start:], panel, tau, 'N'), _tiles(start, k, tile))
+
+    return q, np.triu(r[:k])
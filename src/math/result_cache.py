@@ -0,0 +1,93 @@
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    Least-recently-used cache of decomposition results.
+
+    Entries are keyed by (content hash, decomposition key, truncation) and evicted
+    oldest first once the total size of the cached factors exceeds
+    the memory budget.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Initializes a ResultCache object.
+
+        Args:
+            max_bytes (int, optional): Memory budget for cached factors in bytes.
+                                       Defaults to 64 MiB.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def make_key(matrix_data, key, truncation=None):
+        """
+        Builds a cache key for matrix data and a decomposition.
+
+        Args:
+            matrix_data (MatrixData): The matrix data.
+            key (int): Decomposition key.
+            truncation (tuple, optional): (k, tolerance) of a truncated decomposition.
+
+        Returns:
+            tuple: The cache key.
+        """
+        return matrix_data.content_hash(), key, truncation
+
+    def get(self, cache_key):
+        """
+        Looks up a result and marks it as most recently used.
+
+        Args:
+            cache_key (tuple): Key built by make_key().
+
+        Returns:
+            DecompositionResult: The cached result, if any, otherwise None.
+        """
+        result = self.entries.get(cache_key)
+        if result is not None:
+            self.entries.move_to_end(cache_key)
+        return result
+
+    def put(self, cache_key, result):
+        """
+        Stores a result, evicting least recently used entries to stay within budget.
+
+        Results larger than the whole budget are not cached.
+
+        Args:
+            cache_key (tuple): Key built by make_key().
+            result (DecompositionResult): The result to store.
+        """
+        if result.nbytes > self.max_bytes:
+            return
+
+        self.discard(cache_key)
+        self.entries[cache_key] = result
+        self.nbytes += result.nbytes
+
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def discard(self, cache_key):
+        """
+        Removes a single entry, if present.
+
+        Args:
+            cache_key (tuple): Key built by make_key().
+        """
+        result = self.entries.pop(cache_key, None)
+        if result is not None:
+            self.nbytes -= result.nbytes
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        self.entries.clear()
+        self.nbytes = 0
@@ -0,0 +1,18 @@
+import sys
+
+def is_sparse(value):
+    """
+    Returns whether a value is a SciPy sparse array or matrix.
+
+    A sparse value can only exist once scipy.sparse has been imported,
+    so this check never imports SciPy itself and costs nothing for
+    dense data, for example at startup.
+
+    Args:
+        value (object): The value to check.
+
+    Returns:
+        bool: True if the value is sparse.
+    """
+    sparse = sys.modules.get('scipy.sparse')
+    return sparse is not None and sparse.issparse(value)
@@ -0,0 +1,148 @@
+import numpy as np
+
+class MatrixStructure:
+    """
+    Represents the structural properties of a dense matrix that decide
+    which algorithm can decompose it most cheaply.
+
+    For complex matrices, symmetric stands for Hermitian: the algorithms
+    that exploit symmetry require the matrix to equal its conjugate
+    transpose.
+    """
+    def __init__(self, shape, symmetric, lower_bandwidth, upper_bandwidth,
+                 diagonally_dominant, positive_diagonal):
+        """
+        Initializes a MatrixStructure object.
+
+        Args:
+            shape (tuple of int): Shape of the matrix.
+            symmetric (bool): Whether the matrix equals its conjugate transpose.
+            lower_bandwidth (int): Number of nonzero subdiagonals.
+            upper_bandwidth (int): Number of nonzero superdiagonals.
+            diagonally_dominant (bool): Whether every diagonal entry dominates
+                                        the rest of its row in magnitude.
+            positive_diagonal (bool): Whether every diagonal entry is positive.
+        """
+        self.shape = shape
+        self.symmetric = symmetric
+        self.lower_bandwidth = lower_bandwidth
+        self.upper_bandwidth = upper_bandwidth
+        self.diagonally_dominant = diagonally_dominant
+        self.positive_diagonal = positive_diagonal
+
+    @property
+    def square(self):
+        """
+        Returns whether the matrix is square.
+
+        Returns:
+            bool: True for square matrices.
+        """
+        return self.shape[0] == self.shape[1]
+
+    @property
+    def diagonal(self):
+        """
+        Returns whether all entries off the main diagonal are zero.
+
+        Returns:
+            bool: True for diagonal matrices.
+        """
+        return self.lower_bandwidth == 0 and self.upper_bandwidth == 0
+
+    @property
+    def upper_triangular(self):
+        """
+        Returns whether all entries below the main diagonal are zero.
+
+        Returns:
+            bool: True for upper triangular matrices.
+        """
+        return self.lower_bandwidth == 0
+
+    @property
+    def lower_triangular(self):
+        """
+        Returns whether all entries above the main diagonal are zero.
+
+        Returns:
+            bool: True for lower triangular matrices.
+        """
+        return self.upper_bandwidth == 0
+
+    @property
+    def banded(self):
+        """
+        Returns whether the band is narrow enough for banded algorithms
+        to beat dense ones.
+
+        Returns:
+            bool: True if the band covers less than a quarter of the columns.
+        """
+        return self.square and 4 * (self.lower_bandwidth + self.upper_bandwidth + 1) <= self.shape[0]
+
+    @property
+    def positive_definite(self):
+        """
+        Returns whether the matrix is known to be positive definite.
+
+        A symmetric, diagonally dominant matrix with a positive diagonal
+        is positive definite by Gershgorin's theorem. Other symmetric
+        matrices may still be; only a Cholesky factorization can tell.
+
+        Returns:
+            bool: True if positive definiteness is guaranteed.
+        """
+        return self.symmetric and self.positive_diagonal and self.diagonally_dominant
+
+    @property
+    def maybe_positive_definite(self):
+        """
+        Returns whether the matrix passes the cheap necessary conditions
+        for positive definiteness.
+
+        Returns:
+            bool: False if the matrix is certainly not positive definite.
+        """
+        return self.square and self.symmetric and self.positive_diagonal
+
+def analyze(a, tolerance=1e-12):
+    """
+    Inspects a dense matrix in a single O(n²) pass.
+
+    Args:
+        a (ndarray): A 2-D matrix.
+        tolerance (float, optional): Largest asymmetry, relative to the
+                                     largest magnitude, still considered
+                                     symmetric.
+
+    Returns:
+        MatrixStructure: The structural properties of the matrix.
+    """
+    rows, cols = a.shape
+    magnitude = np.abs(a)
+    scale = magnitude.max() if a.size else 0.0
+
+    nonzero_rows, nonzero_cols = np.nonzero(a)
+    offsets = nonzero_rows - nonzero_cols
+    lower_bandwidth = int(max(offsets.max(initial=0), 0))
+    upper_bandwidth = int(max(-offsets.min(initial=0), 0))
+
+    symmetric = rows == cols
+    diagonally_dominant = positive_diagonal = False
+    if symmetric:
+        if lower_bandwidth != upper_bandwidth:
+            symmetric = False
+        else:
+            symmetric = bool(np.abs(a - a.T.conj()).max(initial=0.0) <= tolerance * scale)
+
+        diagonal = np.diagonal(a)
+        absolute_diagonal = np.abs(diagonal)
+        off_diagonal = magnitude.sum(axis=1) - absolute_diagonal
+        diagonally_dominant = bool(np.all(absolute_diagonal > off_diagonal))
+        positive_diagonal = bool(np.all(diagonal.real > 0.0) and not np.any(diagonal.imag))
+
+    return MatrixStructure(
+        a.shape, symmetric, lower_bandwidth, upper_bandwidth,
+        diagonally_dominant, positive_diagonal
+    )
@@ -1,5 +1,10 @@
 from gi.repository import Gio, GObject, Gtk
 
+# Keys of the truncated decompositions, which take k and tolerance parameters.
+TRUNCATED_KEYS = (5, 6)
+
+TOLERANCE_OPTIONS = [1e-3, 1e-6, 1e-9, 1e-12]
+
 class KeyValuePair(GObject.Object):
     key = GObject.Property(
         type=int,
@@ -41,6 +46,8 @@ class DecompositionHandler:
                 KeyValuePair(key=2, value="LU"),
                 KeyValuePair(key=3, value="QR"),
                 KeyValuePair(key=4, value="Cholesky"),
+                KeyValuePair(key=5, value="Truncated SVD"),
+                KeyValuePair(key=6, value="Truncated Eigen"),
             ],
         )
 
@@ -64,6 +71,15 @@ class DecompositionHandler:
         selected_item = self.dropdown.get_selected_item()
         return selected_item.key if selected_item else None
 
+    def is_truncated(self):
+        """
+        Returns whether the selected decomposition is a truncated one.
+
+        Returns:
+            bool: True if the selected decomposition takes k and tolerance parameters.
+        """
+        return self.get_selected_key() in TRUNCATED_KEYS
+
     def get_selected_value(self):
         """
         Returns the value of the selected item.
@@ -74,3 +90,46 @@ class DecompositionHandler:
         selected_item = self.dropdown.get_selected_item()
         return selected_item.value if selected_item else None
 
+class TruncationHandler:
+    def __init__(self, rank_spin, tolerance_dropdown, rank=6, selected=1):
+        """
+        Initializes the widgets for the parameters of truncated decompositions.
+
+        Args:
+            rank_spin (Gtk.SpinButton): The spin button for k.
+            tolerance_dropdown (Gtk.DropDown): The dropdown for the tolerance.
+            rank (int, optional): The default k. Defaults to 6.
+            selected (int, optional): The default tolerance index. Defaults to 1.
+        """
+        self.rank_spin = rank_spin
+        self.tolerance_dropdown = tolerance_dropdown
+
+        self.rank_spin.set_adjustment(Gtk.Adjustment(
+            value=rank, lower=1, upper=1000, step_increment=1, page_increment=10
+        ))
+        self.tolerance_dropdown.set_model(
+            Gtk.StringList.new([f'{tolerance:g}' for tolerance in TOLERANCE_OPTIONS])
+        )
+        self.tolerance_dropdown.set_selected(selected)
+
+    def get_truncation(self):
+        """
+        Returns the selected parameters.
+
+        Returns:
+            tuple: (k, tolerance) as (int, float).
+        """
+        return self.rank_spin.get_value_as_int(), TOLERANCE_OPTIONS[self.tolerance_dropdown.get_selected()]
+
+    def set_truncation(self, rank, tolerance):
+        """
+        Selects the given parameters.
+
+        Args:
+            rank (int): The k to select.
+            tolerance (float): The tolerance to select; ignored unless it is
+                               one of TOLERANCE_OPTIONS.
+        """
+        self.rank_spin.set_value(rank)
+        if tolerance in TOLERANCE_OPTIONS:
+            self.tolerance_dropdown.set_selected(TOLERANCE_OPTIONS.index(tolerance))
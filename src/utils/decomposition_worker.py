@@ -0,0 +1,203 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from gi.repository import GLib
+from .instrumentation import timed
+from .result_cache import ResultCache
+
+class DecompositionWorker:
+    """
+    Runs decompositions off the GTK main loop.
+
+    Jobs run on a thread pool (LAPACK releases the GIL while it works)
+    and their results are delivered back on the main loop through
+    GLib.idle_add. Every new submission or cancellation supersedes
+    the previous job, so results computed for stale matrix data are
+    discarded instead of delivered. Finished results are kept in a
+    ResultCache, so repeating a request on unchanged data returns
+    immediately, and the last factorization is kept in an
+    IncrementalDecomposer, so a request after a single-cell edit
+    costs a rank-one update rather than a full decomposition.
+    With a SessionStore, results are also persisted on disk and looked
+    up there before anything is computed, so a heavy decomposition is
+    computed once across sessions.
+
+    The numeric backend (SciPy's LAPACK wrappers) is imported on a worker
+    thread when the first decomposition runs, so it adds nothing to the
+    application's startup time and never blocks the main loop.
+    """
+    def __init__(self, max_workers=2, cache=None, store=None):
+        """
+        Initializes a DecompositionWorker object.
+
+        Args:
+            max_workers (int, optional): Number of worker threads. More than one
+                                         lets a new job start while a superseded
+                                         one is still finishing. Defaults to 2.
+            cache (ResultCache, optional): Cache for finished results.
+                                           Defaults to a new ResultCache.
+            store (SessionStore, optional): On-disk store for finished results.
+        """
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='eigen-decomposition'
+        )
+        self.cache = cache if cache is not None else ResultCache()
+        self.store = store
+        self.decomposer = None
+        self.decomposer_lock = threading.Lock()
+        self.generation = 0
+        self.future = None
+
+    @property
+    def busy(self):
+        """
+        Returns whether a job is pending delivery.
+
+        Returns:
+            bool: True if a submitted job has not been delivered yet.
+        """
+        return self.future is not None
+
+    def submit(self, matrix_data, key, callback, truncation=None):
+        """
+        Snapshots the matrix data and decomposes it in the background.
+
+        A cached result for the same content, key and truncation is
+        delivered synchronously without starting a job. Results of
+        file-backed matrices are not persisted, since their content
+        hash does not outlive the session.
+
+        Args:
+            matrix_data (MatrixData): The matrix data to decompose.
+            key (int): Decomposition key.
+            callback (callable): Called on the main loop as callback(result, error),
+                                 where exactly one of the two is None.
+            truncation (tuple, optional): (k, tolerance) of a truncated decomposition.
+        """
+        cache_key = self.cache.make_key(matrix_data, key, truncation)
+        result = self.cache.get(cache_key)
+        if result is not None:
+            self.cancel()
+            callback(result, None)
+            return
+
+        store = None if matrix_data.is_file_backed else self.store
+        self.submit_job(
+            partial(self._load_or_decompose, store, cache_key, matrix_data.snapshot(), key, truncation),
+            partial(self._store, store, cache_key, callback)
+        )
+
+    def submit_job(self, job, callback):
+        """
+        Runs an arbitrary callable in the background, superseding any previous job.
+
+        Args:
+            job (callable): Function without arguments to run on a worker thread.
+            callback (callable): Called on the main loop as callback(result, error).
+        """
+        self.cancel()
+        generation = self.generation
+        self.future = self.executor.submit(job)
+        self.future.add_done_callback(
+            lambda future: GLib.idle_add(self._deliver, future, generation, callback)
+        )
+
+    def cancel(self):
+        """
+        Supersedes the current job so its result is never delivered.
+
+        A job that has not started yet is removed from the queue; a job that
+        is already running finishes in the background and is dropped.
+        """
+        self.generation += 1
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
+
+    def shutdown(self):
+        """
+        Cancels pending work and releases the worker threads.
+        """
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load_or_decompose(self, store, cache_key, a, key, truncation):
+        """
+        Reads a result persisted in a previous session, or computes it.
+
+        Args:
+            store (SessionStore): Store to look the result up in, or None.
+            cache_key (tuple): Key the result is stored under.
+            a (ndarray or scipy.sparse.csr_array): Snapshot of the matrix.
+            key (int): Decomposition key.
+            truncation (tuple): (k, tolerance) of a truncated decomposition, or None.
+
+        Returns:
+            DecompositionResult: The stored or computed factors.
+        """
+        if store is not None:
+            result = store.load_result(cache_key)
+            if result is not None:
+                return result
+        return self._decompose(a, key, truncation)
+
+    @timed('decomposition')
+    def _decompose(self, a, key, truncation):
+        """
+        Decomposes a matrix on a worker thread, loading the numeric backend
+        the first time it is needed.
+
+        Args:
+            a (ndarray or scipy.sparse.csr_array): Snapshot of the matrix.
+            key (int): Decomposition key.
+            truncation (tuple): (k, tolerance) of a truncated decomposition, or None.
+
+        Returns:
+            DecompositionResult: The computed factors.
+        """
+        with self.decomposer_lock:
+            if self.decomposer is None:
+                from .incremental import IncrementalDecomposer
+
+                self.decomposer = IncrementalDecomposer()
+        return self.decomposer.update(a, key, truncation)
+
+    def _store(self, store, cache_key, callback, result, error):
+        """
+        Caches a successful result before passing it on to the callback,
+        and persists it in the background.
+
+        Args:
+            store (SessionStore): Store to persist the result in, or None.
+            cache_key (tuple): Key the result is stored under.
+            callback (callable): The result callback.
+            result (DecompositionResult): The computed result, or None on failure.
+            error (Exception): The raised error, or None on success.
+        """
+        if error is None:
+            self.cache.put(cache_key, result)
+            if store is not None:
+                store.submit(store.save_result, cache_key, result)
+        callback(result, error)
+
+    def _deliver(self, future, generation, callback):
+        """
+        Delivers a finished job on the main loop unless it was superseded.
+
+        Args:
+            future (Future): The finished job.
+            generation (int): Generation the job was submitted in.
+            callback (callable): The result callback.
+
+        Returns:
+            bool: False, to remove the idle source.
+        """
+        if generation != self.generation or future.cancelled():
+            return False
+
+        self.future = None
+        error = future.exception()
+        callback(None if error else future.result(), error)
+        return False
@@ -0,0 +1,34 @@
+from gi.repository import Gtk
+from .element_types import DEFAULT_ELEMENT_TYPE, ELEMENT_TYPES, element_type_name
+
+class ElementTypeHandler:
+    def __init__(self, dropdown, selected=DEFAULT_ELEMENT_TYPE):
+        """
+        Initializes the ElementTypeHandler for selecting the element type of the matrix.
+
+        Args:
+            dropdown (Gtk.DropDown): The dropdown widget.
+            selected (str, optional): Name of the default element type. Defaults to float64.
+        """
+        self.dropdown = dropdown
+        self.names = list(ELEMENT_TYPES)
+        self.dropdown.set_model(Gtk.StringList.new(self.names))
+        self.dropdown.set_selected(self.names.index(selected))
+
+    def get_selected_dtype(self):
+        """
+        Returns the dtype of the selected element type.
+
+        Returns:
+            numpy.dtype: The selected dtype.
+        """
+        return ELEMENT_TYPES[self.names[self.dropdown.get_selected()]]
+
+    def set_selected_dtype(self, dtype):
+        """
+        Selects the element type with the given dtype.
+
+        Args:
+            dtype (numpy.dtype): One of the dtypes of ELEMENT_TYPES.
+        """
+        self.dropdown.set_selected(self.names.index(element_type_name(dtype)))
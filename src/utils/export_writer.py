@@ -0,0 +1,131 @@
+import time
+
+from gi.repository import Gio, GLib
+from .instrumentation import instrumentation
+from .matrix_export import MatrixExportError
+
+class ExportWriter:
+    """
+    Writes a stream of byte chunks to a file without blocking the main loop.
+
+    The file is replaced through Gio's asynchronous API, and the next
+    chunk is only produced once the previous one has been written, so
+    an export never has to be held in memory as a whole.
+    """
+    def __init__(self, file, chunks, callback):
+        """
+        Initializes an ExportWriter object.
+
+        Args:
+            file (Gio.File): The file to write.
+            chunks (iterable of bytes): The content to write.
+            callback (callable): Called as callback(writer, error) once writing
+                                 finished, with error being None on success.
+        """
+        self.file = file
+        self.chunks = iter(chunks)
+        self.callback = callback
+        self.stream = None
+        self.cancellable = Gio.Cancellable()
+        self.started = None
+
+    def start(self):
+        """
+        Starts writing the file.
+        """
+        self.started = time.perf_counter()
+        self.file.replace_async(
+            None, False, Gio.FileCreateFlags.NONE,
+            GLib.PRIORITY_DEFAULT, self.cancellable, self.on_replaced
+        )
+
+    def cancel(self):
+        """
+        Aborts the export; the original file, if any, is left untouched.
+        """
+        self.cancellable.cancel()
+
+    def on_replaced(self, file, result):
+        """
+        Handles the opened output stream.
+
+        Args:
+            file (Gio.File): The file being written.
+            result (Gio.AsyncResult): The result of the replace operation.
+        """
+        try:
+            self.stream = file.replace_finish(result)
+        except GLib.Error as error:
+            self.callback(self, error)
+            return
+
+        self.write_next()
+
+    def write_next(self):
+        """
+        Produces the next chunk and writes it, or closes the stream at the end.
+        """
+        try:
+            with instrumentation.measure('export_chunk'):
+                chunk = next(self.chunks, None)
+        except MatrixExportError as error:
+            # Closing with a cancelled cancellable discards the partial file.
+            self.cancellable.cancel()
+            self.stream.close_async(GLib.PRIORITY_DEFAULT, self.cancellable, None)
+            self.callback(self, error)
+            return
+
+        if chunk is None:
+            self.stream.close_async(GLib.PRIORITY_DEFAULT, self.cancellable, self.on_closed)
+            return
+
+        self.write_bytes(GLib.Bytes.new(chunk))
+
+    def write_bytes(self, data):
+        """
+        Writes a chunk, which may take several partial writes.
+
+        Args:
+            data (GLib.Bytes): The data to write.
+        """
+        self.stream.write_bytes_async(
+            data, GLib.PRIORITY_LOW, self.cancellable, self.on_written, data
+        )
+
+    def on_written(self, stream, result, data):
+        """
+        Continues with the rest of a chunk or with the next chunk.
+
+        Args:
+            stream (Gio.OutputStream): The output stream.
+            result (Gio.AsyncResult): The result of the write operation.
+            data (GLib.Bytes): The chunk being written.
+        """
+        try:
+            written = stream.write_bytes_finish(result)
+        except GLib.Error as error:
+            self.callback(self, error)
+            return
+
+        if written < data.get_size():
+            self.write_bytes(GLib.Bytes.new(data.get_data()[written:]))
+        else:
+            self.write_next()
+
+    def on_closed(self, stream, result):
+        """
+        Reports the end of the export.
+
+        Args:
+            stream (Gio.OutputStream): The output stream.
+            result (Gio.AsyncResult): The result of the close operation.
+        """
+        try:
+            stream.close_finish(result)
+        except GLib.Error as error:
+            self.callback(self, error)
+            return
+
+        if instrumentation.enabled:
+            instrumentation.record('export_file', time.perf_counter() - self.started, path=self.file.get_path())
+        self.callback(self, None)
@@ -0,0 +1,282 @@
+import cProfile
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+logger = logging.getLogger('eigen.instrumentation')
+
+# Environment variable enabling instrumentation at startup. It holds a
+# comma-separated list of modes: 'timing' records stage latencies,
+# 'cprofile' and 'tracemalloc' additionally capture a profile until the
+# application exits. Any mode implies 'timing'.
+ENVIRONMENT_VARIABLE = 'EIGEN_INSTRUMENT'
+
+_NULL_CONTEXT = nullcontext()
+
+class StageStats:
+    """
+    Represents the accumulated latencies of one instrumented stage.
+    """
+    __slots__ = ('count', 'total', 'maximum', 'last')
+
+    def __init__(self):
+        """
+        Initializes an empty StageStats object.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.last = 0.0
+
+    @property
+    def mean(self):
+        """
+        Returns the mean latency.
+
+        Returns:
+            float: Mean duration in seconds, 0 if the stage never ran.
+        """
+        return self.total / self.count if self.count else 0.0
+
+class _StageTimer:
+    """
+    Context manager that records the duration of its block.
+    """
+    __slots__ = ('instrumentation', 'stage', 'fields', 'start')
+
+    def __init__(self, instrumentation, stage, fields):
+        self.instrumentation = instrumentation
+        self.stage = stage
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.record(self.stage, time.perf_counter() - self.start, **self.fields)
+        return False
+
+class Instrumentation:
+    """
+    Collects per-stage latencies and optional profiles.
+
+    Stages are timed with measure() or the timed() decorator. While
+    instrumentation is disabled both reduce to a single attribute check,
+    so instrumented code paths cost next to nothing in normal use. When
+    enabled, every measurement updates the per-stage statistics shown in
+    the debug overlay and is logged as a JSON object on the
+    'eigen.instrumentation' logger.
+
+    Profiles are captured with cProfile, for the main thread, and
+    tracemalloc, for all threads, and written to the user cache directory
+    when the capture stops.
+    """
+    def __init__(self, modes=()):
+        """
+        Initializes an Instrumentation object.
+
+        Args:
+            modes (iterable of str, optional): Modes to start with, see
+                                               ENVIRONMENT_VARIABLE.
+        """
+        self.modes = frozenset(modes)
+        self.enabled = bool(self.modes)
+        self.viewers = 0
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.profile_dir = os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'eigen', 'profiles'
+        )
+
+        if self.enabled and not logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+
+    @classmethod
+    def from_environment(cls):
+        """
+        Creates an Instrumentation object configured by ENVIRONMENT_VARIABLE.
+
+        Returns:
+            Instrumentation: The configured object.
+        """
+        value = os.environ.get(ENVIRONMENT_VARIABLE, '')
+        return cls(mode.strip() for mode in value.split(',') if mode.strip())
+
+    @property
+    def profiling(self):
+        """
+        Returns whether a profile is being captured.
+
+        Returns:
+            bool: True between start_profiling() and stop_profiling().
+        """
+        return self.profiler is not None
+
+    def add_viewer(self):
+        """
+        Enables timing on behalf of a consumer of the statistics, such as
+        the debug overlay, until remove_viewer() is called.
+        """
+        self.viewers += 1
+        self.update_enabled()
+
+    def remove_viewer(self):
+        """
+        Withdraws a consumer added with add_viewer().
+        """
+        self.viewers -= 1
+        self.update_enabled()
+
+    def update_enabled(self):
+        """
+        Enables timing while a startup mode, a viewer or a profile capture needs it.
+        """
+        self.enabled = bool(self.modes) or self.viewers > 0 or self.profiler is not None
+
+    def measure(self, stage, **fields):
+        """
+        Returns a context manager that times its block as a stage.
+
+        Args:
+            stage (str): Name of the stage.
+            **fields: Additional values logged with the measurement.
+
+        Returns:
+            context manager: A timer, or a shared no-op context while disabled.
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return _StageTimer(self, stage, fields)
+
+    def record(self, stage, seconds, **fields):
+        """
+        Adds a measurement to the statistics of a stage and logs it.
+
+        Safe to call from worker threads.
+
+        Args:
+            stage (str): Name of the stage.
+            seconds (float): Duration of the stage.
+            **fields: Additional values logged with the measurement.
+        """
+        with self.lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.maximum = max(stats.maximum, seconds)
+            stats.last = seconds
+
+        if logger.isEnabledFor(logging.INFO):
+            record = {'stage': stage, 'ms': round(seconds * 1000, 3),
+                      'thread': threading.current_thread().name, **fields}
+            logger.info(json.dumps(record, default=str))
+
+    def snapshot(self):
+        """
+        Returns a copy of the statistics of every stage.
+
+        Returns:
+            list of tuple: (stage, StageStats) pairs sorted by stage name.
+        """
+        with self.lock:
+            stages = []
+            for stage, stats in sorted(self.stages.items()):
+                copy = StageStats()
+                copy.count, copy.total, copy.maximum, copy.last = (
+                    stats.count, stats.total, stats.maximum, stats.last
+                )
+                stages.append((stage, copy))
+            return stages
+
+    def reset(self):
+        """
+        Forgets all recorded statistics.
+        """
+        with self.lock:
+            self.stages.clear()
+
+    def start_profiling(self, tracemalloc_enabled=True):
+        """
+        Starts capturing a profile of the calling thread.
+
+        Args:
+            tracemalloc_enabled (bool, optional): Also trace memory allocations.
+        """
+        if self.profiler is not None:
+            return
+        if tracemalloc_enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        self.update_enabled()
+
+    def stop_profiling(self):
+        """
+        Stops the capture and writes the profile to the profile directory.
+
+        The cProfile statistics are written as a .prof file for pstats
+        or snakeviz; the largest allocation sites, if memory was traced,
+        as a .txt file next to it.
+
+        Returns:
+            str: Path of the written .prof file, or None if no capture was running.
+        """
+        if self.profiler is None:
+            return None
+
+        self.profiler.disable()
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir, time.strftime('eigen-%Y%m%d-%H%M%S'))
+        self.profiler.dump_stats(base + '.prof')
+        self.profiler = None
+
+        if tracemalloc.is_tracing():
+            statistics = tracemalloc.take_snapshot().statistics('lineno')
+            tracemalloc.stop()
+            with open(base + '.txt', 'w', encoding='utf-8') as stream:
+                stream.write('\n'.join(str(stat) for stat in statistics[:50]) + '\n')
+
+        self.update_enabled()
+        logger.info(json.dumps({'profile': base + '.prof'}))
+        return base + '.prof'
+
+    def start(self):
+        """
+        Starts the profile capture requested by the startup modes, if any.
+        """
+        if self.modes & {'cprofile', 'tracemalloc'}:
+            self.start_profiling(tracemalloc_enabled='tracemalloc' in self.modes)
+
+instrumentation = Instrumentation.from_environment()
+
+def timed(stage):
+    """
+    Decorator that times every call of a function as a stage.
+
+    Args:
+        stage (str): Name of the stage.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+            with _StageTimer(instrumentation, stage, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
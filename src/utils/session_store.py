@@ -0,0 +1,402 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from gi.repository import GLib
+from .element_types import ELEMENT_TYPES, convert
+from .matrix_export import result_arrays
+from .sparse_utils import is_sparse
+
+INDEX_VERSION = 1
+
+def default_path():
+    """
+    Returns the directory of the session store.
+
+    Returns:
+        str: Path of the directory in the user data directory.
+    """
+    base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    return os.path.join(base, 'eigen', 'session')
+
+def _result_id(cache_key):
+    """
+    Returns the name a decomposition result is stored under.
+
+    Args:
+        cache_key (tuple): (content hash, decomposition key, truncation)
+                           as built by ResultCache.make_key().
+
+    Returns:
+        str: The identifier, which is also used in file names.
+    """
+    digest, key, truncation = cache_key
+    if truncation is None:
+        return f'{digest.hex()}-{key}'
+    k, tolerance = truncation
+    return f'{digest.hex()}-{key}-{k}-{tolerance:g}'
+
+def _from_strings(array):
+    """
+    Restores rationals stored as strings.
+
+    Args:
+        array (ndarray): A stored array.
+
+    Returns:
+        ndarray: Fraction objects for string arrays, otherwise array itself.
+    """
+    if array.dtype.kind == 'U':
+        return convert(array, ELEMENT_TYPES['rational'])
+    return array
+
+def _write_npz(path, arrays):
+    """
+    Writes arrays into an .npz file, replacing it atomically.
+
+    Args:
+        path (str): Path of the file.
+        arrays (dict): Mapping of array names to ndarrays.
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as stream:
+        np.savez(stream, **arrays)
+    os.replace(temporary, path)
+
+class SessionStore:
+    """
+    Persists the current matrix, recently used matrices and their
+    decomposition results between sessions.
+
+    The store is a directory holding one .npz file per matrix and per
+    result, named by content hash, and an index.json that lists the
+    matrices, most recently used first, with their results and the
+    state of the window. Only the index is read on startup; matrices
+    and results are read when they are needed.
+
+    Writes run on a single background thread, so they never block the
+    main loop and are applied in order. Every file is replaced
+    atomically, so an interrupted write never corrupts the store.
+    """
+    # Number of matrices kept; older ones are removed with their results.
+    max_matrices = 10
+
+    # Largest matrix or result stored, in bytes.
+    max_bytes = 256 * 1024 * 1024
+
+    def __init__(self, path=None):
+        """
+        Initializes a SessionStore object.
+
+        Args:
+            path (str, optional): Directory of the store. Defaults to default_path().
+        """
+        self.path = path or default_path()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='eigen-session')
+        self.lock = threading.Lock()
+        self.index = None
+
+    def submit(self, func, *args, callback=None):
+        """
+        Runs a store operation on the background thread.
+
+        Args:
+            func (callable): The operation, such as self.save_matrix.
+            *args: Arguments of the operation.
+            callback (callable, optional): Called on the main loop as
+                                           callback(result, error).
+        """
+        future = self.executor.submit(func, *args)
+        if callback is not None:
+            future.add_done_callback(
+                lambda future: GLib.idle_add(self._deliver, future, callback)
+            )
+
+    def _deliver(self, future, callback):
+        """
+        Delivers the outcome of an operation on the main loop.
+
+        Args:
+            future (Future): The finished operation.
+            callback (callable): The callback.
+
+        Returns:
+            bool: False, to remove the idle source.
+        """
+        error = future.exception()
+        callback(None if error else future.result(), error)
+        return False
+
+    def shutdown(self):
+        """
+        Waits for pending writes and releases the background thread.
+        """
+        self.executor.shutdown(wait=True)
+
+    def _file(self, name):
+        """
+        Returns the path of a file in the store.
+
+        Args:
+            name (str): Name of the file.
+
+        Returns:
+            str: The path.
+        """
+        return os.path.join(self.path, name)
+
+    def _load_index(self):
+        """
+        Reads the index on first use. Must be called with the lock held.
+
+        A missing or unreadable index starts an empty store.
+
+        Returns:
+            dict: The index.
+        """
+        if self.index is None:
+            try:
+                with open(self._file('index.json'), encoding='utf-8') as stream:
+                    index = json.load(stream)
+                if index.get('version') != INDEX_VERSION:
+                    raise ValueError('Unsupported session index version')
+            except (OSError, ValueError):
+                index = {'version': INDEX_VERSION, 'state': None, 'matrices': []}
+            self.index = index
+        return self.index
+
+    def _write_index(self):
+        """
+        Writes the index atomically. Must be called with the lock held.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        temporary = self._file('index.json.tmp')
+        with open(temporary, 'w', encoding='utf-8') as stream:
+            json.dump(self.index, stream)
+        os.replace(temporary, self._file('index.json'))
+
+    def _entry(self, digest, create=False):
+        """
+        Looks up the index entry of a matrix. Must be called with the lock held.
+
+        Args:
+            digest (str): Hex content hash of the matrix.
+            create (bool, optional): Whether to add a missing entry.
+
+        Returns:
+            dict: The entry, or None if it is missing and not created.
+        """
+        matrices = self._load_index()['matrices']
+        for entry in matrices:
+            if entry['digest'] == digest:
+                return entry
+        if not create:
+            return None
+
+        entry = {'digest': digest, 'stored': False, 'used': time.time(), 'results': {}}
+        matrices.insert(0, entry)
+        return entry
+
+    def _touch(self, entry):
+        """
+        Marks a matrix as the most recently used one and removes the
+        matrices beyond max_matrices. Must be called with the lock held.
+
+        Args:
+            entry (dict): The index entry of the matrix.
+        """
+        matrices = self._load_index()['matrices']
+        matrices.remove(entry)
+        matrices.insert(0, entry)
+        entry['used'] = time.time()
+
+        for stale in matrices[self.max_matrices:]:
+            names = [f'result-{result_id}.npz' for result_id in stale['results']]
+            names.append(f'matrix-{stale["digest"]}.npz')
+            for name in names:
+                try:
+                    os.remove(self._file(name))
+                except FileNotFoundError:
+                    pass
+        del matrices[self.max_matrices:]
+
+    def save_matrix(self, digest, values, state):
+        """
+        Stores a matrix as the current one, along with the window state.
+
+        Matrices that are already stored are not written again.
+
+        Args:
+            digest (bytes): Content hash of the matrix.
+            values (ndarray or scipy.sparse array): The matrix values.
+            state (dict): The window state to restore, such as the
+                          selected decomposition.
+        """
+        with self.lock:
+            entry = self._entry(digest.hex(), create=True)
+            if not entry['stored'] and self._nbytes(values) <= self.max_bytes:
+                os.makedirs(self.path, exist_ok=True)
+                if is_sparse(values):
+                    coo = values.tocoo()
+                    arrays = {'shape': np.array(coo.shape), 'row': coo.row, 'col': coo.col, 'data': coo.data}
+                else:
+                    # Rationals are stored as strings, which load without pickling.
+                    arrays = {'values': values.astype(str) if values.dtype.hasobject else values}
+                _write_npz(self._file(f'matrix-{entry["digest"]}.npz'), arrays)
+                entry['stored'] = True
+
+            self._touch(entry)
+            self.index['state'] = dict(state, digest=entry['digest'])
+            self._write_index()
+
+    def save_state(self, state):
+        """
+        Updates the window state stored with the current matrix.
+
+        Args:
+            state (dict): The window state.
+        """
+        with self.lock:
+            current = self._load_index()['state']
+            if current is None or current == dict(state, digest=current['digest']):
+                return
+            self.index['state'] = dict(state, digest=current['digest'])
+            self._write_index()
+
+    def load_current(self):
+        """
+        Reads the current matrix and the window state.
+
+        Returns:
+            tuple: (values, state), or None if no matrix is stored.
+        """
+        with self.lock:
+            state = self._load_index()['state']
+            entry = self._entry(state['digest']) if state is not None else None
+            if entry is None or not entry['stored']:
+                return None
+
+        with np.load(self._file(f'matrix-{entry["digest"]}.npz'), allow_pickle=False) as arrays:
+            if 'values' in arrays:
+                return _from_strings(arrays['values']), state
+
+            import scipy.sparse
+
+            values = scipy.sparse.csr_array(
+                (arrays['data'], (arrays['row'], arrays['col'])), shape=tuple(arrays['shape'])
+            )
+            return values, state
+
+    def save_result(self, cache_key, result):
+        """
+        Stores a decomposition result of a matrix.
+
+        Args:
+            cache_key (tuple): Key built by ResultCache.make_key().
+            result (DecompositionResult): The result to store.
+        """
+        if result.nbytes > self.max_bytes:
+            return
+
+        result_id = _result_id(cache_key)
+        with self.lock:
+            entry = self._entry(cache_key[0].hex(), create=True)
+            if result_id in entry['results']:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            _write_npz(self._file(f'result-{result_id}.npz'), result_arrays(result))
+            entry['results'][result_id] = result.name
+            self._touch(entry)
+            self._write_index()
+
+    def load_result(self, cache_key):
+        """
+        Reads a stored decomposition result.
+
+        Safe to call from any thread.
+
+        Args:
+            cache_key (tuple): Key built by ResultCache.make_key().
+
+        Returns:
+            DecompositionResult: The result, or None if it is not stored
+                                 or cannot be read.
+        """
+        result_id = _result_id(cache_key)
+        with self.lock:
+            entry = self._entry(cache_key[0].hex())
+            name = entry['results'].get(result_id) if entry is not None else None
+        if name is None:
+            return None
+
+        from .decomposition import DecompositionResult
+
+        try:
+            with np.load(self._file(f'result-{result_id}.npz'), allow_pickle=False) as arrays:
+                factors = [(str(label), self._factor(arrays, index))
+                           for index, label in enumerate(arrays['labels'])]
+                diagnostics = self._diagnostics(arrays)
+        except (OSError, ValueError, KeyError):
+            return None
+        return DecompositionResult(name, factors, diagnostics)
+
+    @staticmethod
+    def _factor(arrays, index):
+        """
+        Rebuilds a factor stored in the layout of result_arrays().
+
+        Args:
+            arrays (NpzFile): The stored arrays.
+            index (int): Index of the factor.
+
+        Returns:
+            ndarray or scipy.sparse.csr_array: The factor.
+        """
+        prefix = f'factor_{index}'
+        if prefix in arrays:
+            return _from_strings(arrays[prefix])
+
+        import scipy.sparse
+
+        return scipy.sparse.csr_array(
+            (arrays[f'{prefix}_data'], (arrays[f'{prefix}_row'], arrays[f'{prefix}_col'])),
+            shape=tuple(arrays[f'{prefix}_shape'])
+        )
+
+    @staticmethod
+    def _diagnostics(arrays):
+        """
+        Rebuilds the diagnostics stored in the layout of result_arrays().
+
+        Args:
+            arrays (NpzFile): The stored arrays.
+
+        Returns:
+            Diagnostics: The diagnostics, or None if none are stored.
+        """
+        if 'diagnostics_names' not in arrays:
+            return None
+
+        from .diagnostics import Diagnostics
+
+        names = (str(name) for name in arrays['diagnostics_names'])
+        values = (float(value) for value in arrays['diagnostics_values'])
+        return Diagnostics(float(arrays['diagnostics_eps']), **dict(zip(names, values)))
+
+    @staticmethod
+    def _nbytes(values):
+        """
+        Returns the memory used by matrix values.
+
+        Args:
+            values (ndarray or scipy.sparse array): The values.
+
+        Returns:
+            int: Size in bytes.
+        """
+        if is_sparse(values):
+            return values.data.nbytes * 2
+        return values.nbytes
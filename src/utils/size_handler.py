@@ -1,5 +1,7 @@
 from gi.repository import Gtk
 
+SIZE_OPTIONS = [1, 2, 3, 4, 5, 6, 7, 8, 10, 16, 32, 50, 64, 100, 128, 256, 500, 1000]
+
 class SizeHandler:
     def __init__(self, *dropdowns, selected=2):
         """
@@ -11,17 +13,17 @@ class SizeHandler:
         """
         self.dropdowns = dropdowns
         self.selected = selected
+        self.options = list(SIZE_OPTIONS)
         self._setup_dropdowns()
 
     def _setup_dropdowns(self):
         """
         Sets up the dropdowns for matrix size selection.
         """
-        options = [str(i) for i in range(1, 8)]
-        model = Gtk.StringList.new(options)
+        self.model = Gtk.StringList.new([str(size) for size in self.options])
 
         for dropdown in self.dropdowns:
-            dropdown.set_model(model)
+            dropdown.set_model(self.model)
             dropdown.set_selected(self.selected)
 
     def get_selected_size(self):
@@ -31,6 +33,22 @@ class SizeHandler:
         Returns:
             tuple of int: The selected values of each dropdown, if any, otherwise None.
         """
-        selected_size = tuple(dropdown.get_selected() + 1 for dropdown in self.dropdowns)
-        return tuple(item if item else None for item in selected_size)
+        selected_items = (dropdown.get_selected_item() for dropdown in self.dropdowns)
+        return tuple(int(item.get_string()) if item else None for item in selected_items)
+
+    def set_selected_size(self, *sizes):
+        """
+        Selects the given value in each dropdown, adding missing values
+        to the options in sorted order.
+
+        Args:
+            *sizes (int): The value to select in each dropdown.
+        """
+        for size in sizes:
+            if size not in self.options:
+                position = sum(option < size for option in self.options)
+                self.options.insert(position, size)
+                self.model.splice(position, 0, [str(size)])
 
+        for dropdown, size in zip(self.dropdowns, sizes):
+            dropdown.set_selected(self.options.index(size))
@@ -0,0 +1,83 @@
+from gi.repository import GLib
+
+class ValidationScheduler:
+    """
+    Coalesces edits of many entries into a single validation pass.
+
+    Edited entries are collected until no edit has happened for a short
+    delay, and are then handed to the callback together. However many
+    keystrokes or cells are involved, at most one timer source is
+    attached to the main loop at a time; new edits move its deadline
+    instead of adding sources.
+    """
+    def __init__(self, callback, delay=150):
+        """
+        Initializes a ValidationScheduler object.
+
+        Args:
+            callback (callable): Called as callback(entries) with the edited
+                                 entries, in the order they were first edited.
+            delay (int, optional): Quiet period in milliseconds before the
+                                   edits are validated. Defaults to 150.
+        """
+        self.callback = callback
+        self.delay = delay
+        self.pending = {}
+        self.source_id = None
+        self.last_edit = 0
+
+    def schedule(self, entry):
+        """
+        Queues an edited entry for validation.
+
+        Args:
+            entry (Gtk.Editable): The edited entry.
+        """
+        self.pending[entry] = None
+        self.last_edit = GLib.get_monotonic_time()
+        if self.source_id is None:
+            self.source_id = GLib.timeout_add(self.delay, self.on_timeout)
+
+    def on_timeout(self):
+        """
+        Validates the pending entries, or waits longer if the user is
+        still typing.
+
+        Returns:
+            bool: False, to remove the timer source.
+        """
+        quiet = (GLib.get_monotonic_time() - self.last_edit) // 1000
+        if quiet < self.delay:
+            self.source_id = GLib.timeout_add(self.delay - quiet, self.on_timeout)
+            return False
+
+        self.source_id = None
+        self.flush()
+        return False
+
+    def flush(self):
+        """
+        Validates the pending entries immediately.
+        """
+        self.stop_timer()
+        if not self.pending:
+            return
+
+        entries = list(self.pending)
+        self.pending.clear()
+        self.callback(entries)
+
+    def cancel(self):
+        """
+        Drops the pending entries without validating them.
+        """
+        self.stop_timer()
+        self.pending.clear()
+
+    def stop_timer(self):
+        """
+        Removes the timer source, if any.
+        """
+        if self.source_id is not None:
+            GLib.source_remove(self.source_id)
+            self.source_id = None
@@ -0,0 +1,363 @@
+import gi
+gi.require_version('Gtk', '4.0')
+from gi.repository import Gtk, Gdk, GLib
+
+import numpy as np
+from .numeric_entry import NumericEntry
+from .instrumentation import timed
+from .out_of_core import is_file_backed
+from .sparse_utils import is_sparse
+
+# Number of rows and columns of cells realized per factor. Larger
+# factors are scrolled through this window and get a heatmap overview.
+VISIBLE_CELLS = 7
+
+# Number of tiles per dimension of a heatmap, and its size in pixels.
+HEATMAP_BINS = 64
+HEATMAP_PIXELS = 192
+
+# Orders of magnitude below the largest value that a heatmap still shows.
+HEATMAP_DECADES = 12
+
+# Color of the heatmap tiles, whose opacity follows their magnitude.
+HEATMAP_COLOR = (53, 132, 228)
+
+def _as_2d(factor):
+    """
+    Returns a factor as 2-D, turning 1-D factors such as eigenvalues into a row.
+
+    Args:
+        factor (ndarray, numpy.memmap or scipy.sparse array): The factor.
+
+    Returns:
+        ndarray, numpy.memmap or scipy.sparse array: The 2-D factor.
+    """
+    return factor.reshape(1, -1) if factor.ndim == 1 else factor
+
+def _tile_magnitudes(factor, bins=HEATMAP_BINS):
+    """
+    Reduces a factor to the largest magnitude in each of at most
+    bins × bins tiles.
+
+    Sparse factors only visit their nonzeros; memory-mapped factors are
+    sampled at the first cell of each tile, so only a few pages are read.
+
+    Args:
+        factor (ndarray, numpy.memmap or scipy.sparse array): A 2-D factor.
+        bins (int, optional): Largest number of tiles per dimension.
+
+    Returns:
+        ndarray: The float64 magnitudes.
+    """
+    rows, cols = factor.shape
+    row_starts = np.linspace(0, rows, min(rows, bins), endpoint=False).astype(np.intp)
+    col_starts = np.linspace(0, cols, min(cols, bins), endpoint=False).astype(np.intp)
+
+    if is_sparse(factor):
+        coo = factor.tocoo()
+        image = np.zeros((len(row_starts), len(col_starts)))
+        tiles = (np.searchsorted(row_starts, coo.row, 'right') - 1,
+                 np.searchsorted(col_starts, coo.col, 'right') - 1)
+        np.maximum.at(image, tiles, np.abs(coo.data).astype(np.float64))
+        return image
+    if is_file_backed(factor):
+        return np.abs(np.asarray(factor[np.ix_(row_starts, col_starts)])).astype(np.float64)
+
+    magnitudes = np.abs(np.asarray(factor)).astype(np.float64)
+    return np.maximum.reduceat(np.maximum.reduceat(magnitudes, row_starts, axis=0), col_starts, axis=1)
+
+def _heatmap_pixels(magnitudes, pixels=HEATMAP_PIXELS):
+    """
+    Renders tile magnitudes as RGBA pixels on a logarithmic scale.
+
+    Zero tiles are transparent; the others are HEATMAP_COLOR with an
+    opacity that falls from the largest magnitude over HEATMAP_DECADES
+    orders of magnitude.
+
+    Args:
+        magnitudes (ndarray): Tile magnitudes, as from _tile_magnitudes().
+        pixels (int, optional): Size in pixels of the longer side.
+
+    Returns:
+        ndarray: A (height, width, 4) uint8 array.
+    """
+    alpha = np.zeros(magnitudes.shape)
+    nonzero = magnitudes > 0
+    if np.any(nonzero):
+        decades = np.log10(magnitudes[nonzero])
+        alpha[nonzero] = np.clip(1 + (decades - decades.max()) / HEATMAP_DECADES, 0.15, 1.0)
+
+    image = np.zeros(magnitudes.shape + (4,), dtype=np.uint8)
+    image[..., :3] = HEATMAP_COLOR
+    image[..., 3] = np.round(alpha * 255)
+
+    # Every tile becomes a square block of pixels, so edges stay sharp.
+    scale = max(1, pixels // max(magnitudes.shape))
+    return np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
+
+class FactorPanel(Gtk.Box):
+    """
+    Represents a read-only view of one factor of a decomposition result.
+
+    Shows the factor's label and shape and a window of at most
+    VISIBLE_CELLS × VISIBLE_CELLS cells. Factors larger than the window
+    are scrolled through it and get a heatmap of their magnitudes.
+
+    The cell labels are created on first use and kept: showing another
+    factor only rebinds their text, so repeated results of the same
+    shape do not create, destroy or reattach any widget.
+    """
+    def __init__(self):
+        """
+        Initializes a FactorPanel object.
+        """
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        self.factor = None
+        self.row_offset = 0
+        self.col_offset = 0
+        self.cells = {}
+        self.heatmap_source = None
+
+        self.title = Gtk.Label()
+        self.title.add_css_class('heading')
+        self.append(self.title)
+
+        self.grid = Gtk.Grid(row_spacing=4, column_spacing=4, halign=Gtk.Align.CENTER)
+        self.cell_grid = Gtk.Grid(row_spacing=4, column_spacing=12,
+                                  row_homogeneous=True, column_homogeneous=True)
+        self.cell_grid.add_css_class('monospace')
+        self.grid.attach(self.cell_grid, 1, 1, 1, 1)
+        self.append(self.grid)
+
+        self.row_headers = [self.create_header() for _ in range(VISIBLE_CELLS)]
+        self.col_headers = [self.create_header() for _ in range(VISIBLE_CELLS)]
+        self.row_header_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, homogeneous=True, spacing=4)
+        self.col_header_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, homogeneous=True, spacing=12)
+        for header in self.row_headers:
+            self.row_header_box.append(header)
+        for header in self.col_headers:
+            self.col_header_box.append(header)
+        self.grid.attach(self.col_header_box, 1, 0, 1, 1)
+        self.grid.attach(self.row_header_box, 0, 1, 1, 1)
+
+        self.vadjustment = Gtk.Adjustment(step_increment=1)
+        self.hadjustment = Gtk.Adjustment(step_increment=1)
+        self.vadjustment.connect('value-changed', self.on_scrolled)
+        self.hadjustment.connect('value-changed', self.on_scrolled)
+        self.vscrollbar = Gtk.Scrollbar(orientation=Gtk.Orientation.VERTICAL, adjustment=self.vadjustment)
+        self.hscrollbar = Gtk.Scrollbar(orientation=Gtk.Orientation.HORIZONTAL, adjustment=self.hadjustment)
+        self.grid.attach(self.vscrollbar, 2, 1, 1, 1)
+        self.grid.attach(self.hscrollbar, 1, 2, 1, 1)
+
+        scroll_controller = Gtk.EventControllerScroll.new(
+            Gtk.EventControllerScrollFlags.BOTH_AXES | Gtk.EventControllerScrollFlags.DISCRETE
+        )
+        scroll_controller.connect('scroll', self.on_scroll)
+        self.grid.add_controller(scroll_controller)
+
+        self.heatmap = Gtk.Picture(can_shrink=False, halign=Gtk.Align.CENTER)
+        self.heatmap.set_tooltip_text(_('Magnitude of the entries, on a logarithmic scale'))
+        self.append(self.heatmap)
+
+    @staticmethod
+    def create_header():
+        """
+        Creates an index label for a visible row or column.
+
+        Returns:
+            header (Gtk.Label): The created label.
+        """
+        header = Gtk.Label()
+        header.add_css_class('dim-label')
+        header.add_css_class('caption')
+        return header
+
+    def get_cell(self, row, col):
+        """
+        Returns the label of a cell slot, creating it on first use.
+
+        Args:
+            row (int): Row of the slot within the visible window.
+            col (int): Column of the slot within the visible window.
+
+        Returns:
+            Gtk.Label: The label.
+        """
+        cell = self.cells.get((row, col))
+        if cell is None:
+            cell = Gtk.Label(xalign=1.0, selectable=True, width_chars=10)
+            self.cells[(row, col)] = cell
+            self.cell_grid.attach(cell, col, row, 1, 1)
+        return cell
+
+    @timed('show_factor')
+    def set_factor(self, label, factor):
+        """
+        Shows a factor, rebinding the cell labels in place.
+
+        Args:
+            label (str): Label of the factor, such as 'L'.
+            factor (ndarray, numpy.memmap or scipy.sparse array): The factor.
+        """
+        shape = '×'.join(map(str, factor.shape))
+        self.title.set_label(f'{label}  ({shape})')
+
+        self.factor = _as_2d(factor)
+        if is_sparse(self.factor):
+            # Row slices of CSR arrays are cheap.
+            self.factor = self.factor.tocsr()
+        rows, cols = self.factor.shape
+        for adjustment, size, scrollbar in ((self.vadjustment, rows, self.vscrollbar),
+                                            (self.hadjustment, cols, self.hscrollbar)):
+            # Results of the same shape keep their scroll position.
+            page_size = min(size, VISIBLE_CELLS)
+            adjustment.configure(
+                min(adjustment.get_value(), size - page_size),
+                0, size, 1, page_size, page_size
+            )
+            scrollbar.set_visible(size > VISIBLE_CELLS)
+        self.bind_visible_cells()
+        self.schedule_heatmap(max(rows, cols) > VISIBLE_CELLS)
+
+    def bind_visible_cells(self):
+        """
+        Shows the values of the cells in the visible window.
+        """
+        rows, cols = self.factor.shape
+        self.row_offset = int(self.vadjustment.get_value())
+        self.col_offset = int(self.hadjustment.get_value())
+        window = self.factor[self.row_offset:self.row_offset + VISIBLE_CELLS,
+                             self.col_offset:self.col_offset + VISIBLE_CELLS]
+        window = window.toarray() if is_sparse(window) else np.asarray(window)
+
+        shown_rows, shown_cols = window.shape
+        for row in range(max(shown_rows, self.cell_rows())):
+            for col in range(max(shown_cols, self.cell_cols())):
+                visible = row < shown_rows and col < shown_cols
+                if not visible and (row, col) not in self.cells:
+                    continue
+                cell = self.get_cell(row, col)
+                cell.set_visible(visible)
+                if visible:
+                    text = NumericEntry.format_value(window[row, col]) or '0'
+                    if cell.get_label() != text:
+                        cell.set_label(text)
+
+        for index, header in enumerate(self.row_headers):
+            header.set_visible(index < shown_rows)
+            header.set_label(str(self.row_offset + index + 1))
+        for index, header in enumerate(self.col_headers):
+            header.set_visible(index < shown_cols)
+            header.set_label(str(self.col_offset + index + 1))
+
+    def cell_rows(self):
+        """
+        Returns the number of rows of cell labels created so far.
+
+        Returns:
+            int: Number of rows.
+        """
+        return max((row + 1 for row, _ in self.cells), default=0)
+
+    def cell_cols(self):
+        """
+        Returns the number of columns of cell labels created so far.
+
+        Returns:
+            int: Number of columns.
+        """
+        return max((col + 1 for _, col in self.cells), default=0)
+
+    def schedule_heatmap(self, visible):
+        """
+        Renders the heatmap of the factor once the main loop is idle, so
+        the cells of every factor are shown first.
+
+        Args:
+            visible (bool): Whether the factor gets a heatmap.
+        """
+        if self.heatmap_source is not None:
+            GLib.source_remove(self.heatmap_source)
+            self.heatmap_source = None
+        self.heatmap.set_visible(visible)
+        if visible:
+            self.heatmap_source = GLib.idle_add(self.render_heatmap)
+
+    @timed('render_heatmap')
+    def render_heatmap(self):
+        """
+        Renders the magnitudes of the factor into the heatmap.
+
+        Returns:
+            bool: False, to remove the idle source.
+        """
+        self.heatmap_source = None
+        factor = self.factor
+        if factor.dtype.hasobject:
+            factor = factor.astype(np.float64)
+        pixels = _heatmap_pixels(_tile_magnitudes(factor))
+        height, width = pixels.shape[:2]
+        texture = Gdk.MemoryTexture.new(
+            width, height, Gdk.MemoryFormat.R8G8B8A8, GLib.Bytes.new(pixels.tobytes()), width * 4
+        )
+        self.heatmap.set_paintable(texture)
+        self.heatmap.set_size_request(width, height)
+        return False
+
+    def on_scrolled(self, adjustment):
+        """
+        Handles a change of the visible window.
+
+        Args:
+            adjustment (Gtk.Adjustment): The adjustment that changed.
+        """
+        if self.factor is not None:
+            self.bind_visible_cells()
+
+    def on_scroll(self, controller, dx, dy):
+        """
+        Scrolls the visible window with the mouse wheel or touchpad.
+
+        Args:
+            controller (Gtk.EventControllerScroll): The scroll controller.
+            dx (float): Horizontal scroll delta.
+            dy (float): Vertical scroll delta.
+
+        Returns:
+            bool: True, as the scroll event is always handled.
+        """
+        self.hadjustment.set_value(self.hadjustment.get_value() + dx)
+        self.vadjustment.set_value(self.vadjustment.get_value() + dy)
+        return True
+
+class FactorView(Gtk.Box):
+    """
+    Represents the read-only view of the factors of a decomposition result.
+
+    Holds one FactorPanel per factor. Panels are kept when a result has
+    fewer factors than the previous one and reused by the next result,
+    so re-running a decomposition never rebuilds the widget tree.
+    """
+    def __init__(self):
+        """
+        Initializes a FactorView object.
+        """
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=18)
+        self.panels = []
+
+    def set_result(self, result):
+        """
+        Shows the factors of a decomposition result.
+
+        Args:
+            result (DecompositionResult): The result to show.
+        """
+        for index, (label, factor) in enumerate(result.factors):
+            if index == len(self.panels):
+                self.panels.append(FactorPanel())
+                self.append(self.panels[index])
+            self.panels[index].set_factor(label, factor)
+            self.panels[index].set_visible(True)
+
+        for panel in self.panels[len(result.factors):]:
+            panel.set_visible(False)
@@ -1,42 +1,92 @@
 import gi
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, GLib
+from gi.repository import Gtk
 from .numeric_entry import NumericEntry
+from .instrumentation import timed
+from .validation_scheduler import ValidationScheduler
 
 class MatrixView(Gtk.Grid):
     """
     Represents the matrix view in the interface.
 
     Handles the visual representation of the matrix,
-    using a grid to display cells.
+    using a grid to display cells. Edits are written to the matrix data
+    in batches by a ValidationScheduler once typing pauses.
     """
-    def __init__(self):
+    def __init__(self, on_cells_changed=None, animation_limit=64):
         """
         Initializes a MatrixView object.
+
+        Args:
+            on_cells_changed (callable, optional): Called as on_cells_changed(cells)
+                                                   with a list of (row, col) pairs
+                                                   after edited values are written.
+            animation_limit (int, optional): Largest number of cells for which
+                                             new entries fade in. Defaults to 64.
         """
         super().__init__()
         self.matrix_data = None
         self.entries = {}
+        self.entry_pool = []
+        self.shown_rows = 0
+        self.shown_cols = 0
+        self.on_cells_changed = on_cells_changed
+        self.animation_limit = animation_limit
+        self.validation = ValidationScheduler(self.on_entries_edited)
 
     def set_matrix(self, matrix_data):
         """
-        Sets the matrix data and refreshes the view.
+        Sets the matrix data and refreshes the view, including the values
+        of cells that are already shown.
 
         Args:
             matrix_data (MatrixData): The matrix data.
         """
         self.matrix_data = matrix_data
         self.refresh_matrix()
+        self.update_values()
 
+    @timed('refresh_matrix')
     def refresh_matrix(self):
         """
-        Updates the MatrixView to match the current matrix data.
+        Updates the MatrixView to match the current matrix size.
+
+        Only the row and column bands that were added or removed since the
+        last refresh are touched; cells inside both sizes stay attached.
         """
+        self.flush_edits()
         rows, cols = self.matrix_data.rows, self.matrix_data.cols
         self.set_margins(cols)
-        self.remove_old_entries(rows, cols)
-        self.update_existing_entries(rows, cols)
-        self.add_new_entries(rows, cols)
+
+        animate = rows * cols <= self.animation_limit
+        for row, col in self.band_cells(self.shown_rows, self.shown_cols, rows, cols):
+            self.release_entry(row, col)
+        for row, col in self.band_cells(rows, cols, self.shown_rows, self.shown_cols):
+            self.place_entry(row, col, animate)
+
+        self.shown_rows, self.shown_cols = rows, cols
+
+    @staticmethod
+    def band_cells(rows, cols, other_rows, other_cols):
+        """
+        Yields the cells of a rows x cols matrix that lie outside
+        an other_rows x other_cols matrix.
+
+        Args:
+            rows (int): Number of rows of the larger extent.
+            cols (int): Number of columns of the larger extent.
+            other_rows (int): Number of rows of the extent to exclude.
+            other_cols (int): Number of columns of the extent to exclude.
+
+        Yields:
+            tuple of int: (row, col) of each cell in the row and column bands.
+        """
+        for row in range(min(rows, other_rows)):
+            for col in range(other_cols, cols):
+                yield row, col
+        for row in range(other_rows, rows):
+            for col in range(cols):
+                yield row, col
 
     def set_margins(self, cols, window_width=420, element_width=58):
         """
@@ -47,64 +97,58 @@ class MatrixView(Gtk.Grid):
         window_width (int, optional): Total width of the window.
         element_width (int, optional): Fixed width of each MatrixView element.
         """
-        margin = (window_width - cols * element_width) / 2
+        margin = max(0, (window_width - cols * element_width) // 2)
         self.set_margin_start(margin)
         self.set_margin_end(margin)
 
-    def remove_old_entries(self, rows, cols):
+    def release_entry(self, row, col):
         """
-        Removes entries from the MatrixView that are no longer needed with animation.
+        Detaches the entry of a removed cell and returns it to the pool.
 
         Args:
-            rows (int): Number of rows.
-            cols (int): Number of columns.
+            row (int): Row index.
+            col (int): Column index.
         """
-        entries_to_remove = [key for key in self.entries if key[0] >= rows or key[1] >= cols]
-        for key in entries_to_remove:
-            entry = self.entries.pop(key)
-            if self.get_child_at(key[1], key[0]) is entry:
-                self.remove(entry)
+        revealed_entry = self.entries.pop((row, col))
+        self.remove(revealed_entry)
+        revealed_entry.set_reveal_child(False)
+        self.entry_pool.append(revealed_entry)
 
-    def update_existing_entries(self, rows, cols):
+    def place_entry(self, row, col, animate):
         """
-        Reattaches existing entries if they are not already in the correct position.
+        Attaches an entry for a new cell, reusing a pooled one when available.
 
         Args:
-            rows (int): Number of rows.
-            cols (int): Number of columns.
+            row (int): Row index.
+            col (int): Column index.
+            animate (bool): Whether the entry fades in.
         """
-        for row in range(rows):
-            for col in range(cols):
-                current_entry = self.entries.get((row, col))
-                if current_entry and self.get_child_at(col, row) != current_entry:
-                    self.attach(current_entry, col, row, 1, 1)
+        if self.entry_pool:
+            revealed_entry = self.entry_pool.pop()
+        else:
+            revealed_entry = self.create_entry()
 
-    def add_new_entries(self, rows, cols):
-        """
-        Adds new entries with animation to the MatrixView for any new matrix cells.
+        entry = revealed_entry.get_child()
+        entry.cell = (row, col)
+        entry.set_dtype(self.matrix_data.dtype)
+        self.set_entry_text(entry, NumericEntry.format_value(self.matrix_data.get_value(row, col)))
 
-        Args:
-            rows (int): Number of rows.
-            cols (int): Number of columns.
-        """
-        for row in range(rows):
-            for col in range(cols):
-                if (row, col) not in self.entries:
-                    entry = self.create_entry(row, col)
-                    self.entries[(row, col)] = entry
-                    entry.set_transition_type(Gtk.RevealerTransitionType.CROSSFADE)
-                    entry.set_transition_duration(500)
-                    self.entries[(row, col)] = entry
-                    self.attach(entry, col, row, 1, 1)
-                    entry.set_reveal_child(True)
+        if animate:
+            revealed_entry.set_transition_type(Gtk.RevealerTransitionType.CROSSFADE)
+            revealed_entry.set_transition_duration(500)
+        else:
+            revealed_entry.set_transition_type(Gtk.RevealerTransitionType.NONE)
 
-    def create_entry(self, row, col):
+        self.entries[(row, col)] = revealed_entry
+        self.attach(revealed_entry, col, row, 1, 1)
+        revealed_entry.set_reveal_child(True)
+
+    def create_entry(self):
         """
-        Creates an input widget (NumericEntry) inside Gtk.Revealer container for a cell.
+        Creates an input widget (NumericEntry) inside Gtk.Revealer container.
 
-        Args:
-            row (int): Row index.
-            col (int): Column index.
+        The cell the entry edits is stored in its cell attribute
+        and set whenever the entry is placed.
 
         Returns:
             revealed_entry (Gtk.Revealer): The created widget.
@@ -113,24 +157,73 @@ class MatrixView(Gtk.Grid):
         entry.set_max_length(10)
         entry.set_placeholder_text('0')
         entry.set_alignment(0.5)
-        entry.connect('changed', self.on_entry_changed, row, col)
+        entry.connect('changed', self.on_entry_changed)
         entry.set_size_request(40, 40)
 
         revealed_entry = Gtk.Revealer()
         revealed_entry.set_child(entry)
         return revealed_entry
 
-    def on_entry_changed(self, entry, row, col):
+    def set_entry_text(self, entry, text):
         """
-        Handles changes in text within a cell.
-        Updates the matrix data and calls the callback.
+        Sets the text of an entry without writing it back to the matrix data.
+
+        Args:
+            entry (NumericEntry): The entry to update.
+            text (str): The new text.
+        """
+        if entry.get_text() == text:
+            return
+        entry.handler_block_by_func(self.on_entry_changed)
+        entry.set_value_text(text)
+        entry.handler_unblock_by_func(self.on_entry_changed)
+
+    def update_values(self):
+        """
+        Shows the current matrix data in every attached entry in one pass,
+        without emitting per-cell updates. Edits that have not been
+        validated yet are discarded in favour of the data.
+        """
+        self.validation.cancel()
+        for (row, col), revealed_entry in self.entries.items():
+            entry = revealed_entry.get_child()
+            entry.set_dtype(self.matrix_data.dtype)
+            self.set_entry_text(entry, NumericEntry.format_value(self.matrix_data.get_value(row, col)))
+
+    def on_entry_changed(self, entry):
+        """
+        Handles changes in text within a cell by queueing the entry
+        for validation.
 
         Args:
             entry (NumericEntry): The input widget.
-            row (int): Row index.
-            col (int): Column index.
         """
-        self.matrix_data.update_value(row, col, entry.get_text())
+        self.validation.schedule(entry)
+
+    @timed('validate_edits')
+    def on_entries_edited(self, entries):
+        """
+        Validates edited entries, writes their values to the matrix data
+        and calls the callback once for all of them.
+
+        Args:
+            entries (list of NumericEntry): The edited entries.
+        """
+        cells = []
+        with self.matrix_data.history.group():
+            for entry in entries:
+                entry.update_error_style()
+                self.matrix_data.update_value(*entry.cell, entry.get_text())
+                cells.append(entry.cell)
+
+        if self.on_cells_changed:
+            self.on_cells_changed(cells)
+
+    def flush_edits(self):
+        """
+        Writes edits that are still waiting for validation to the matrix data.
+        """
+        self.validation.flush()
 
     def clear_matrix(self, rows, cols):
         """
@@ -140,9 +233,5 @@ class MatrixView(Gtk.Grid):
             rows (int): Number of rows.
             cols (int): Number of columns.
         """
-        for row in range(rows):
-            for col in range(cols):
-                entry = self.get_child_at(col, row).get_child()
-                if entry is not None:
-                    entry.delete_text(0, -1)
-
+        self.matrix_data.clear()
+        self.update_values()
@@ -1,157 +1,165 @@
+import re
+from fractions import Fraction
+
 import gi
+import numpy as np
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, GLib
+from gi.repository import Gtk
+from .instrumentation import timed
+
+_PARTIAL_REAL = r'[0-9]*\.?[0-9]*(?:[eE][-+]?[0-9]*)?'
+_COMPLETE_REAL = r'(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?'
+
+# Text accepted while typing: an optional leading minus sign, digits,
+# at most one decimal point and an optional exponent.
+PARTIAL_NUMBER = re.compile(rf'-?{_PARTIAL_REAL}')
+
+# Text that denotes a number. An empty entry stands for zero; anything
+# else PARTIAL_NUMBER accepts, such as '-' or '1e', is still being typed.
+COMPLETE_NUMBER = re.compile(rf'(?:-?{_COMPLETE_REAL})?')
+
+# Complex numbers: a real part, an imaginary part ending in i or j, or both.
+PARTIAL_COMPLEX = re.compile(rf'-?{_PARTIAL_REAL}(?:[-+]{_PARTIAL_REAL})?[ij]?')
+COMPLETE_COMPLEX = re.compile(
+    rf'(?:-?{_COMPLETE_REAL}|-?(?:{_COMPLETE_REAL})?[ij]|-?{_COMPLETE_REAL}[-+](?:{_COMPLETE_REAL})?[ij])?'
+)
+
+# Rationals: a number, or a fraction of integers with a nonzero denominator.
+PARTIAL_RATIONAL = re.compile(rf'-?(?:{_PARTIAL_REAL}|[0-9]+/[0-9]*)')
+COMPLETE_RATIONAL = re.compile(rf'(?:-?{_COMPLETE_REAL}|-?[0-9]+/0*[1-9][0-9]*)?')
+
+# (partial, complete) patterns by dtype kind.
+PATTERNS = {
+    'f': (PARTIAL_NUMBER, COMPLETE_NUMBER),
+    'c': (PARTIAL_COMPLEX, COMPLETE_COMPLEX),
+    'O': (PARTIAL_RATIONAL, COMPLETE_RATIONAL),
+}
 
 class NumericEntry(Gtk.Entry):
     """
     Represents a text entry widget with built-in numeric input filtering.
+
+    Insertions that would not leave a (partial) number in the entry are
+    rejected synchronously in the insert-text handler, so filtering never
+    schedules main loop sources. Whether the text is a complete number is
+    checked separately by update_error_style(), which matrix views call
+    from their ValidationScheduler once typing pauses. The accepted
+    syntax follows the element type set with set_dtype().
     """
     def __init__(self):
         """
         Initializes a NumericEntry object.
         """
         super().__init__()
+        self.partial, self.complete = PATTERNS['f']
         self.set_input_purpose(Gtk.InputPurpose.NUMBER)
-        self.prev_input = ''
-        self.connect('changed', self.filter_input)
+        self.get_delegate().connect('insert-text', self.on_insert_text)
 
-    def split_input(self, user_input, cursor_position, deleting):
+    def set_dtype(self, dtype):
         """
-        Splits the input string into three parts: before the change,
-        the change itself, and after the change.
+        Selects the syntax accepted for an element type.
 
         Args:
-            user_input (str): The input string.
-            cursor_position (int): The current cursor position.
-            deleting (bool): True if the user is deleting, False if inserting.
-
-        Returns:
-            tuple: A tuple containing (before_change, change, after_change).
+            dtype (numpy.dtype): Element type of the matrix.
         """
-        delta_length = len(user_input) - len(self.prev_input)
-        change_index = cursor_position - (0 if deleting else delta_length)
-
-        before_change = self.prev_input[:change_index]
-        change = '' if deleting else user_input[change_index:cursor_position]
-        after_change = self.prev_input[change_index - (delta_length if deleting else 0):]
-
-        return before_change, change, after_change
+        self.partial, self.complete = PATTERNS[dtype.kind]
 
-    def is_change_allowed(self, before_change, change):
+    @timed('entry_filter')
+    def on_insert_text(self, editable, text, length, position):
         """
-        Checks if a change is allowed in the current input.
+        Rejects insertions that would make the text non-numeric.
 
-        Args:
-            before_change (str): The portion of the input before the change.
-            change (str): The change itself.
-
-        Returns:
-            bool: True if change is allowed, False otherwise.
-        """
-
-        dot_allowed = '.' not in self.prev_input
-        minus_allowed = '-' not in self.prev_input and before_change == ''
-
-        return (change.isdigit() or
-               (change == '.' and dot_allowed) or
-               (change == '-' and minus_allowed))
-
-    def numeric_filter(self, user_input):
-        """
-        Ensures that the entry's text only contains digits, a
-        single decimal point (.), and optionally a minus sign (-) at the
-        beginning.
+        Pasted text surrounded by whitespace, such as a cell copied from a
+        spreadsheet, is inserted without the whitespace.
 
         Args:
-            user_input (str): The input to filter.
-        """
-        cursor_position = self.get_position()
-        deleting = len(user_input) < len(self.prev_input)
-
-        before_change, change, after_change = self.split_input(user_input, cursor_position, deleting)
-
-        change_allowed = self.is_change_allowed(before_change, change)
-
-        if '-' in after_change:
-            filtered_input = after_change
-        elif change_allowed:
-            filtered_input = before_change + change + after_change
+            editable (Gtk.Editable): The editable the text is inserted into.
+            text (str): The inserted text.
+            length (int): Length of the inserted text in bytes.
+            position (int): Position of the insertion.
+        """
+        current = editable.get_text()
+        if self.partial.fullmatch(current[:position] + text + current[position:]):
+            return
+
+        editable.stop_emission_by_name('insert-text')
+        stripped = text.strip()
+        if stripped and self.partial.fullmatch(current[:position] + stripped + current[position:]):
+            editable.handler_block_by_func(self.on_insert_text)
+            editable.insert_text(stripped, position)
+            editable.handler_unblock_by_func(self.on_insert_text)
+            editable.set_position(position + len(stripped))
         else:
-            filtered_input = before_change + after_change
-
-        if filtered_input != user_input:
-            self.update_input_and_cursor(filtered_input, cursor_position, user_input)
-
-        self.prev_input = filtered_input
+            self.error_bell()
 
-    def update_input_and_cursor(self, filtered_input, cursor_position, user_input):
+    def update_error_style(self):
         """
-        Updates the entry text and cursor position.
+        Adds the 'error' class if the text is not a complete number
+        and removes it otherwise.
 
-        Args:
-            filtered_input (str): The new filtered input.
-            cursor_position (int): The current cursor position.
-            user_input (str): The old input before filtering.
+        Returns:
+            bool: True if the text is a complete number.
         """
-        self.handler_block_by_func(self.filter_input)
-        self.set_text(filtered_input)
-        self.set_position(max(0, cursor_position - (len(user_input) - len(filtered_input))))
-        self.handler_unblock_by_func(self.filter_input)
+        complete = self.complete.fullmatch(self.get_text()) is not None
+        if complete:
+            self.remove_css_class('error')
+        else:
+            self.add_css_class('error')
+        return complete
 
-    @staticmethod
-    def is_incorrect(user_input):
+    def set_value_text(self, text):
         """
-        Checks if the user's input is incorrect.
+        Replaces the entry text without running the input filter.
 
-        Args:
-            user_input (str): The input to check.
+        Used when the text comes from matrix data rather than from the user.
 
-        Returns:
-            True if input is incorrect, False otherwise.
+        Args:
+            text (str): The new text.
         """
-        return (user_input.count('.') > 1 or
-               ('-' in user_input and not user_input.startswith('-') or
-               user_input.count('-') > 1) or
-               not all(char.isdigit() or char in '.-' for char in user_input))
+        delegate = self.get_delegate()
+        delegate.handler_block_by_func(self.on_insert_text)
+        self.set_text(text)
+        delegate.handler_unblock_by_func(self.on_insert_text)
+        self.remove_css_class('error')
 
     @staticmethod
-    def error_style(func):
-        """
-        Decorator to add/remove the 'error' class when incorrect data is entered.
-
-        Args:
-            func: The function to which the decorator is applied.
-
-        Returns:
-            wrapper: A wrapper function that checks the entered data
-                     and adds/removes the 'error' class.
+    def format_value(value, max_length=10):
         """
-        def wrapper(self, *args, **kwargs):
-            user_input = self.get_text()
-            unwritten_floats = ['.', '-', '-.']
-
-            if self.is_incorrect(user_input) or user_input in unwritten_floats:
-                self.add_css_class('error')
-
-            func(*args, **kwargs)
+        Formats a matrix value as entry text.
 
-            def check_and_remove_error():
-                filtered_input = self.get_text()
-                if not self.is_incorrect(filtered_input) and filtered_input not in unwritten_floats:
-                    self.remove_css_class('error')
-                return False
-
-            GLib.timeout_add(300, check_and_remove_error)
-        return wrapper
-
-    @error_style
-    def filter_input(self, *args):
-        """
-        Delays the filtering logic until after the user has finished typing.
+        Zeros are shown as an empty entry so the placeholder remains visible.
+        Rationals are shown as fractions while they fit, complex values as
+        a real and an imaginary part.
 
         Args:
-            *args: Additional arguments passed to the 'changed' signal.
-        """
+            value (float, complex or Fraction): The value to format.
+            max_length (int, optional): Maximum length of the text.
 
-        user_input = self.get_text()
-        GLib.idle_add(self.numeric_filter, user_input)
+        Returns:
+            str: The formatted value.
+        """
+        if value == 0:
+            return ''
+        if isinstance(value, Fraction):
+            text = str(value)
+            if len(text) <= max_length:
+                return text
+            value = float(value)
+        elif isinstance(value, (complex, np.complexfloating)):
+            if value.imag == 0:
+                return NumericEntry.format_value(value.real, max_length)
+            imag = NumericEntry.format_value(value.imag, max_length // 2 - 1) + 'i'
+            if value.real == 0:
+                return imag
+            real = NumericEntry.format_value(value.real, max_length - len(imag) - 1)
+            return real + ('' if imag.startswith('-') else '+') + imag
+
+        for precision in range(max_length, -1, -1):
+            text = f'{value:.{precision}f}'
+            if '.' in text:
+                text = text.rstrip('0').rstrip('.')
+            if text in ('0', '-0'):
+                break
+            if len(text) <= max_length:
+                return text
+        return f'{value:.{max(0, max_length - 7)}e}'
@@ -0,0 +1,276 @@
+import gi
+gi.require_version('Gtk', '4.0')
+from gi.repository import Gtk
+from .numeric_entry import NumericEntry
+from .instrumentation import timed
+from .validation_scheduler import ValidationScheduler
+
+class VirtualMatrixView(Gtk.Grid):
+    """
+    Represents a scrollable view of a large matrix.
+
+    Only a fixed window of cells is realized as widgets. Scrolling
+    moves that window over the matrix data and rebinds the pooled
+    entries to the newly visible cells, so the number of widgets
+    stays constant however large the matrix gets. Edits are written to
+    the matrix data in batches by a ValidationScheduler once typing
+    pauses, and before the entries are rebound.
+    """
+    def __init__(self, visible_rows=7, visible_cols=7, on_cells_changed=None):
+        """
+        Initializes a VirtualMatrixView object.
+
+        Args:
+            visible_rows (int, optional): Number of realized rows.
+            visible_cols (int, optional): Number of realized columns.
+            on_cells_changed (callable, optional): Called as on_cells_changed(cells)
+                                                   with a list of (row, col) pairs
+                                                   after edited values are written.
+        """
+        super().__init__()
+        self.matrix_data = None
+        self.on_cells_changed = on_cells_changed
+        self.validation = ValidationScheduler(self.on_entries_edited)
+        self.visible_rows = visible_rows
+        self.visible_cols = visible_cols
+        self.row_offset = 0
+        self.col_offset = 0
+
+        self.set_row_spacing(5)
+        self.set_column_spacing(5)
+        self.set_halign(Gtk.Align.CENTER)
+
+        self.cell_grid = Gtk.Grid()
+        self.cell_grid.set_row_homogeneous(True)
+        self.cell_grid.set_column_homogeneous(True)
+        self.cell_grid.set_row_spacing(5)
+        self.cell_grid.set_column_spacing(5)
+        self.attach(self.cell_grid, 1, 1, 1, 1)
+
+        self.entries = {}
+        for row in range(visible_rows):
+            for col in range(visible_cols):
+                entry = self.create_entry(row, col)
+                self.entries[(row, col)] = entry
+                self.cell_grid.attach(entry, col, row, 1, 1)
+
+        self.row_headers = [self.create_header() for _ in range(visible_rows)]
+        self.col_headers = [self.create_header() for _ in range(visible_cols)]
+        self.row_header_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, homogeneous=True, spacing=5)
+        self.col_header_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, homogeneous=True, spacing=5)
+        for header in self.row_headers:
+            self.row_header_box.append(header)
+        for header in self.col_headers:
+            self.col_header_box.append(header)
+        self.attach(self.col_header_box, 1, 0, 1, 1)
+        self.attach(self.row_header_box, 0, 1, 1, 1)
+
+        self.vadjustment = Gtk.Adjustment(step_increment=1)
+        self.hadjustment = Gtk.Adjustment(step_increment=1)
+        self.vadjustment.connect('value-changed', self.on_scrolled)
+        self.hadjustment.connect('value-changed', self.on_scrolled)
+        self.attach(Gtk.Scrollbar(orientation=Gtk.Orientation.VERTICAL, adjustment=self.vadjustment), 2, 1, 1, 1)
+        self.attach(Gtk.Scrollbar(orientation=Gtk.Orientation.HORIZONTAL, adjustment=self.hadjustment), 1, 2, 1, 1)
+
+        scroll_controller = Gtk.EventControllerScroll.new(
+            Gtk.EventControllerScrollFlags.BOTH_AXES | Gtk.EventControllerScrollFlags.DISCRETE
+        )
+        scroll_controller.connect('scroll', self.on_scroll)
+        self.add_controller(scroll_controller)
+
+    def create_entry(self, row, col):
+        """
+        Creates a pooled input widget for a visible cell slot.
+
+        Args:
+            row (int): Row of the slot within the visible window.
+            col (int): Column of the slot within the visible window.
+
+        Returns:
+            entry (NumericEntry): The created widget, with the slot stored
+                                  in its slot attribute.
+        """
+        entry = NumericEntry()
+        entry.slot = (row, col)
+        entry.set_max_length(10)
+        entry.set_placeholder_text('0')
+        entry.set_alignment(0.5)
+        entry.set_size_request(40, 40)
+        entry.connect('changed', self.on_entry_changed)
+        return entry
+
+    @staticmethod
+    def create_header():
+        """
+        Creates an index label for a visible row or column.
+
+        Returns:
+            header (Gtk.Label): The created label.
+        """
+        header = Gtk.Label()
+        header.add_css_class('dim-label')
+        header.add_css_class('caption')
+        return header
+
+    def set_matrix(self, matrix_data):
+        """
+        Sets the matrix data and refreshes the view.
+
+        Args:
+            matrix_data (MatrixData): The matrix data.
+        """
+        self.matrix_data = matrix_data
+        self.refresh_matrix()
+
+    @timed('refresh_matrix')
+    def refresh_matrix(self):
+        """
+        Updates the scroll range and the visible cells to match the matrix data.
+        """
+        self.flush_edits()
+        rows, cols = self.matrix_data.rows, self.matrix_data.cols
+        self.configure_adjustment(self.vadjustment, rows, self.visible_rows)
+        self.configure_adjustment(self.hadjustment, cols, self.visible_cols)
+        self.bind_visible_cells()
+
+    @staticmethod
+    def configure_adjustment(adjustment, size, page_size):
+        """
+        Configures a scroll adjustment for a matrix dimension.
+
+        Args:
+            adjustment (Gtk.Adjustment): The adjustment to configure.
+            size (int): Number of rows or columns in the matrix.
+            page_size (int): Number of realized rows or columns.
+        """
+        page_size = min(size, page_size)
+        adjustment.configure(
+            min(adjustment.get_value(), size - page_size),
+            0, size, 1, page_size, page_size
+        )
+
+    def bind_visible_cells(self):
+        """
+        Rebinds every pooled entry and header to the cell it currently shows.
+        """
+        rows, cols = self.matrix_data.rows, self.matrix_data.cols
+        self.row_offset = int(self.vadjustment.get_value())
+        self.col_offset = int(self.hadjustment.get_value())
+        window = self.matrix_data.get_block(
+            self.row_offset, self.row_offset + self.visible_rows,
+            self.col_offset, self.col_offset + self.visible_cols
+        )
+
+        for (row, col), entry in self.entries.items():
+            visible = row < window.shape[0] and col < window.shape[1]
+            entry.set_visible(visible)
+            if visible:
+                entry.set_dtype(self.matrix_data.dtype)
+                self.set_entry_text(entry, NumericEntry.format_value(window[row, col]))
+
+        for index, header in enumerate(self.row_headers):
+            header.set_visible(index < min(rows, self.visible_rows))
+            header.set_label(str(self.row_offset + index + 1))
+        for index, header in enumerate(self.col_headers):
+            header.set_visible(index < min(cols, self.visible_cols))
+            header.set_label(str(self.col_offset + index + 1))
+
+    def update_values(self):
+        """
+        Shows the current matrix data in the visible cells in one pass,
+        without emitting per-cell updates. Edits that have not been
+        validated yet are discarded in favour of the data.
+        """
+        self.validation.cancel()
+        self.bind_visible_cells()
+
+    def set_entry_text(self, entry, text):
+        """
+        Sets the text of a pooled entry without writing it back to the matrix data.
+
+        Args:
+            entry (NumericEntry): The entry to update.
+            text (str): The new text.
+        """
+        if entry.get_text() == text:
+            return
+        entry.handler_block_by_func(self.on_entry_changed)
+        entry.set_value_text(text)
+        entry.handler_unblock_by_func(self.on_entry_changed)
+
+    def on_scrolled(self, adjustment):
+        """
+        Handles a change of the visible window.
+
+        Args:
+            adjustment (Gtk.Adjustment): The adjustment that changed.
+        """
+        if self.matrix_data is not None:
+            # Pending edits still refer to the old offsets.
+            self.flush_edits()
+            self.bind_visible_cells()
+
+    def flush_edits(self):
+        """
+        Writes edits that are still waiting for validation to the matrix data.
+        """
+        self.validation.flush()
+
+    def on_scroll(self, controller, dx, dy):
+        """
+        Scrolls the visible window with the mouse wheel or touchpad.
+
+        Args:
+            controller (Gtk.EventControllerScroll): The scroll controller.
+            dx (float): Horizontal scroll delta.
+            dy (float): Vertical scroll delta.
+
+        Returns:
+            bool: True, as the scroll event is always handled.
+        """
+        self.hadjustment.set_value(self.hadjustment.get_value() + dx)
+        self.vadjustment.set_value(self.vadjustment.get_value() + dy)
+        return True
+
+    def on_entry_changed(self, entry):
+        """
+        Handles changes in text within a visible cell by queueing the
+        entry for validation.
+
+        Args:
+            entry (NumericEntry): The input widget.
+        """
+        self.validation.schedule(entry)
+
+    @timed('validate_edits')
+    def on_entries_edited(self, entries):
+        """
+        Validates edited entries, writes their values to the cells they
+        show and calls the callback once for all of them.
+
+        Args:
+            entries (list of NumericEntry): The edited entries.
+        """
+        cells = []
+        with self.matrix_data.history.group():
+            for entry in entries:
+                row, col = entry.slot
+                cell = (row + self.row_offset, col + self.col_offset)
+                entry.update_error_style()
+                self.matrix_data.update_value(*cell, entry.get_text())
+                cells.append(cell)
+
+        if self.on_cells_changed:
+            self.on_cells_changed(cells)
+
+    def clear_matrix(self, rows, cols):
+        """
+        Clears the whole matrix, including cells that are not realized.
+
+        Args:
+            rows (int): Number of rows.
+            cols (int): Number of columns.
+        """
+        self.validation.cancel()
+        self.matrix_data.clear()
+        self.bind_visible_cells()
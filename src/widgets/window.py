@@ -1,8 +1,22 @@
-from gi.repository import Gtk, Gdk, Adw, Gio
+from functools import partial
+
+import numpy as np
+from gi.repository import Gtk, Gdk, Adw, Gio, GLib
 from .matrix_view import MatrixView
+from .virtual_matrix_view import VirtualMatrixView
+from .factor_view import FactorView
 from .matrix_data import MatrixData
-from .decomposition_handler import DecompositionHandler
+from .decomposition_worker import DecompositionWorker
+from .matrix_import import parse_text, read_file, MatrixFormatError
+from .matrix_export import export_text, iter_export, file_extension
+from .export_writer import ExportWriter
+from .session_store import SessionStore
+from .instrumentation import instrumentation
+from .decomposition_handler import DecompositionHandler, TruncationHandler
 from .size_handler import SizeHandler
+from .element_type_handler import ElementTypeHandler
+from .element_types import element_dtype, element_type_name
+from . import parallel
 
 @Gtk.Template(resource_path='/com/github/elahpeca/Eigen/gtk/window.ui')
 class EigenWindow(Adw.ApplicationWindow):
@@ -13,13 +27,35 @@ class EigenWindow(Adw.ApplicationWindow):
     """
     __gtype_name__ = 'EigenWindow'
 
+    # Largest matrix dimension shown as a plain grid; larger matrices
+    # use a virtualized view with a fixed number of cell widgets.
+    max_grid_size = 7
+
+    # Largest number of values copied to the clipboard; larger exports
+    # are streamed to a file instead.
+    clipboard_limit = 100_000
+
+    # Delay in milliseconds between the last change and saving the session.
+    session_save_delay = 1000
+
+    toast_overlay = Gtk.Template.Child()
     main_content = Gtk.Template.Child()
     decomposition_dropdown = Gtk.Template.Child()
+    truncation_box = Gtk.Template.Child()
+    rank_spin = Gtk.Template.Child()
+    tolerance_dropdown = Gtk.Template.Child()
     rows_dropdown = Gtk.Template.Child()
     cols_dropdown = Gtk.Template.Child()
+    element_type_dropdown = Gtk.Template.Child()
     matrix_copy_button = Gtk.Template.Child()
     matrix_cleanup_button = Gtk.Template.Child()
+    matrix_paste_button = Gtk.Template.Child()
+    matrix_open_button = Gtk.Template.Child()
+    matrix_export_button = Gtk.Template.Child()
     decompose_button = Gtk.Template.Child()
+    result_box = Gtk.Template.Child()
+    diagnostics_label = Gtk.Template.Child()
+    debug_label = Gtk.Template.Child()
 
     def __init__(self, **kwargs):
         """
@@ -30,18 +66,45 @@ class EigenWindow(Adw.ApplicationWindow):
         """
         super().__init__(**kwargs)
         self.settings = Gio.Settings.new('com.github.elahpeca.Eigen')
+        self.settings.connect('changed::thread-count', self.on_thread_count_changed)
+        self.on_thread_count_changed(self.settings, 'thread-count')
         self.connect('unrealize', self.save_window_properties)
+        self.connect('unrealize', self.on_unrealize)
+
+        self.session_store = SessionStore()
+        self.session_source = None
+        self.session_digest = None
+        self.session_pending = True
+        self.decomposition_worker = DecompositionWorker(store=self.session_store)
+        self.result = None
+        self.factor_view = None
+        self.export_writers = set()
+        self.debug_source = None
 
         self.decomposition_handler = DecompositionHandler(self.decomposition_dropdown)
+        self.truncation_handler = TruncationHandler(self.rank_spin, self.tolerance_dropdown)
         self.size_handler = SizeHandler(self.rows_dropdown, self.cols_dropdown)
+        self.element_type_handler = ElementTypeHandler(self.element_type_dropdown)
 
         self.update_matrix_size()
         self.setup_matrix_view()
+        self.setup_export_actions()
+        self.setup_history_actions()
+        self.setup_debug_actions()
+        self.connect('map', self.on_first_map)
+        instrumentation.start()
 
+        self.decomposition_dropdown.connect('notify::selected', self.on_decomposition_changed)
+        self.rank_spin.connect('value-changed', self.on_decomposition_changed)
+        self.tolerance_dropdown.connect('notify::selected', self.on_decomposition_changed)
         self.rows_dropdown.connect('notify::selected', self.on_size_changed)
         self.cols_dropdown.connect('notify::selected', self.on_size_changed)
+        self.element_type_dropdown.connect('notify::selected', self.on_element_type_changed)
         self.matrix_cleanup_button.connect('clicked', self.on_matrix_cleanup_clicked)
         self.matrix_copy_button.connect('clicked', self.on_matrix_copy_clicked)
+        self.matrix_paste_button.connect('clicked', self.on_matrix_paste_clicked)
+        self.matrix_open_button.connect('clicked', self.on_matrix_open_clicked)
+        self.decompose_button.connect('clicked', self.on_decompose_clicked)
 
     def save_window_properties(self, *args):
         """
@@ -54,25 +117,432 @@ class EigenWindow(Adw.ApplicationWindow):
         self.settings.set_int('window-width', window_size.width)
         self.settings.set_int('window-height', window_size.height)
 
+    def on_thread_count_changed(self, settings, key):
+        """
+        Applies the thread count setting to the parallel decompositions.
+
+        Args:
+            settings (Gio.Settings): The settings.
+            key (str): The changed key.
+        """
+        parallel.set_thread_count(settings.get_int(key))
+
+    def on_unrealize(self, *args):
+        """
+        Stop background decompositions when the window is closed.
+
+        Args:
+            *args: Positional arguments passed by the signal.
+        """
+        self.decomposition_worker.shutdown()
+        if self.session_source is not None:
+            GLib.source_remove(self.session_source)
+            self.save_session()
+        self.session_store.shutdown()
+        for writer in self.export_writers:
+            writer.cancel()
+        if self.debug_source is not None:
+            GLib.source_remove(self.debug_source)
+            self.debug_source = None
+            instrumentation.remove_viewer()
+        instrumentation.stop_profiling()
+
+    def create_action(self, name, callback, parameter_type=None):
+        """
+        Creates a window action.
+
+        Args:
+            name (str): The name of the action.
+            callback (callable): The function to call when the action is activated.
+            parameter_type (GLib.VariantType, optional): Type of the action parameter.
+
+        Returns:
+            Gio.SimpleAction: The created action.
+        """
+        action = Gio.SimpleAction.new(name, parameter_type)
+        action.connect('activate', callback)
+        self.add_action(action)
+        return action
+
+    def setup_export_actions(self):
+        """
+        Creates the actions of the export menu. The result actions stay
+        disabled until a decomposition result is displayed.
+        """
+        format_type = GLib.VariantType.new('s')
+        self.create_action('copy-matrix', self.on_copy_matrix_action, format_type)
+        self.create_action('save-matrix', self.on_save_matrix_action, format_type)
+        self.result_actions = [
+            self.create_action('copy-result', self.on_copy_result_action, format_type),
+            self.create_action('save-result', self.on_save_result_action, format_type),
+        ]
+        for action in self.result_actions:
+            action.set_enabled(False)
+
+    def setup_history_actions(self):
+        """
+        Creates the actions that undo and redo edits of the matrix.
+        """
+        self.create_action('undo', self.on_undo_action)
+        self.create_action('redo', self.on_redo_action)
+
+    def on_undo_action(self, action, parameter):
+        """
+        Revert the last edit of the matrix. Edits still waiting for
+        validation are written first, so they are what gets reverted.
+
+        Args:
+            action (Gio.SimpleAction): The activated action.
+            parameter: Unused.
+        """
+        self.commit_edits()
+        if self.matrix_data.undo():
+            self.show_matrix_data()
+
+    def on_redo_action(self, action, parameter):
+        """
+        Reapply the last undone edit of the matrix.
+
+        Args:
+            action (Gio.SimpleAction): The activated action.
+            parameter: Unused.
+        """
+        self.commit_edits()
+        if self.matrix_data.redo():
+            self.show_matrix_data()
+
+    def show_matrix_data(self):
+        """
+        Bring the dropdowns, the view and the result up to date after the
+        matrix data changed its values, shape or element type.
+        """
+        self.show_element_type()
+        if (self.matrix_data.rows, self.matrix_data.cols) != (self.current_rows, self.current_cols):
+            self.set_matrix_size(self.matrix_data.rows, self.matrix_data.cols)
+        if self.matrix_view is not None:
+            self.matrix_view.update_values()
+        self.refresh_result()
+        self.schedule_session_save()
+
+    def setup_debug_actions(self):
+        """
+        Creates the actions that toggle the debug overlay and profiling.
+        """
+        self.create_action('toggle-debug-overlay', self.on_toggle_debug_overlay)
+        self.create_action('toggle-profiling', self.on_toggle_profiling)
+
+    def on_toggle_debug_overlay(self, action, parameter):
+        """
+        Show or hide the overlay with per-stage latencies. Stages are
+        only timed while the overlay is shown, unless instrumentation
+        was enabled from the environment.
+
+        Args:
+            action (Gio.SimpleAction): The activated action.
+            parameter (GLib.Variant): Unused.
+        """
+        if self.debug_source is None:
+            instrumentation.add_viewer()
+            self.debug_source = GLib.timeout_add(500, self.update_debug_overlay)
+            self.update_debug_overlay()
+            self.debug_label.set_visible(True)
+        else:
+            GLib.source_remove(self.debug_source)
+            self.debug_source = None
+            instrumentation.remove_viewer()
+            self.debug_label.set_visible(False)
+
+    def update_debug_overlay(self):
+        """
+        Show the current stage statistics in the debug overlay.
+
+        Returns:
+            bool: True, to keep refreshing while the overlay is shown.
+        """
+        lines = [f'{"stage":<16}{"count":>7}{"last":>9}{"mean":>9}{"max":>9}']
+        for stage, stats in instrumentation.snapshot():
+            lines.append(
+                f'{stage:<16}{stats.count:>7}{stats.last * 1000:>9.2f}'
+                f'{stats.mean * 1000:>9.2f}{stats.maximum * 1000:>9.2f}'
+            )
+        if instrumentation.profiling:
+            lines.append(_('Profiling…'))
+        self.debug_label.set_text('\n'.join(lines))
+        return True
+
+    def on_toggle_profiling(self, action, parameter):
+        """
+        Start capturing a cProfile and tracemalloc profile, or stop the
+        capture and save it.
+
+        Args:
+            action (Gio.SimpleAction): The activated action.
+            parameter (GLib.Variant): Unused.
+        """
+        if not instrumentation.profiling:
+            instrumentation.start_profiling()
+            self.show_toast(_('Profiling started'))
+            return
+
+        try:
+            path = instrumentation.stop_profiling()
+        except OSError as error:
+            self.show_error(error)
+            return
+        self.show_toast(_('Profile saved to {}').format(path))
+
     def setup_matrix_view(self):
         """
-        Creates a MatrixView instance, configures its appearance
-        and binds it to the matrix data.
+        Creates the matrix data. The view that displays it is built
+        once the window has been mapped, see on_first_map().
         """
-        self.matrix_view = MatrixView()
-        self.matrix_view.set_row_homogeneous(True)
-        self.matrix_view.set_column_homogeneous(True)
-        self.matrix_view.set_row_spacing(5)
-        self.matrix_view.set_column_spacing(5)
-        self.main_content.insert_child_after(self.matrix_view, self.decomposition_dropdown)
+        self.matrix_data = MatrixData(
+            self.current_rows, self.current_cols, self.element_type_handler.get_selected_dtype()
+        )
+        self.matrix_view = None
 
-        self.matrix_data = MatrixData(self.current_rows, self.current_cols)
-        self.matrix_view.set_matrix(self.matrix_data)
+    def on_first_map(self, *args):
+        """
+        Schedule building the matrix view once the window is first mapped.
+
+        The idle priority is lower than GTK's redraw priority, so the first
+        frame of the window is drawn before the cell widgets are created.
+
+        Args:
+            *args: Positional arguments passed by the signal.
+        """
+        self.disconnect_by_func(self.on_first_map)
+        GLib.idle_add(self.build_matrix_view)
+
+    def build_matrix_view(self):
+        """
+        Build the matrix view unless an earlier event already did.
+
+        Returns:
+            bool: False, to remove the idle source.
+        """
+        if self.matrix_view is None:
+            self.update_matrix_view()
+        self.session_store.submit(self.session_store.load_current, callback=self.on_session_loaded)
+        return False
+
+    def on_session_loaded(self, session, error):
+        """
+        Restore the matrix and decomposition of the previous session, unless
+        the user started working before it was read.
+
+        Args:
+            session (tuple): (values, state) as returned by
+                             SessionStore.load_current(), or None.
+            error (Exception): The error raised while reading, or None on success.
+        """
+        if not self.session_pending:
+            return
+        self.session_pending = False
+        if error is not None or session is None:
+            return
+
+        values, state = session
+        self.session_digest = state['digest']
+        self.element_type_handler.set_selected_dtype(element_dtype(state.get('element_type', 'float64')))
+        self.truncation_handler.set_truncation(*state['truncation'])
+        self.decomposition_dropdown.set_selected(state['decomposition'])
+        self.load_matrix(values)
+        # The restored matrix is where editing starts, not an edit to undo.
+        self.matrix_data.history.clear()
+        if state['show_result']:
+            self.submit_decomposition()
+
+    def get_session_state(self):
+        """
+        Returns the window state saved with the session.
+
+        Returns:
+            dict: The selected decomposition, its parameters and whether
+                  a result is displayed.
+        """
+        return {
+            'element_type': element_type_name(self.matrix_data.dtype),
+            'decomposition': self.decomposition_dropdown.get_selected(),
+            'truncation': list(self.truncation_handler.get_truncation()),
+            'show_result': self.result is not None or self.decomposition_worker.busy,
+        }
+
+    def schedule_session_save(self):
+        """
+        Save the session once changes have paused for session_save_delay.
+
+        A change made before the previous session was restored replaces it.
+        """
+        self.session_pending = False
+        if self.session_source is not None:
+            GLib.source_remove(self.session_source)
+        self.session_source = GLib.timeout_add(self.session_save_delay, self.on_session_timeout)
+
+    def on_session_timeout(self):
+        """
+        Save the session after changes have paused.
+
+        Returns:
+            bool: False, to remove the timeout source.
+        """
+        self.session_source = None
+        self.save_session()
+        return False
+
+    def save_session(self):
+        """
+        Write the matrix and window state to the session store in the background.
+
+        File-backed matrices and matrices larger than the store allows are
+        not saved; the content hash of the former does not outlive the session.
+        """
+        self.session_source = None
+        data = self.matrix_data
+        if data.is_file_backed or (not data.is_sparse and data.rows * data.cols * 8 > self.session_store.max_bytes):
+            return
+
+        self.commit_edits()
+        store = self.session_store
+        digest = data.content_hash()
+        state = self.get_session_state()
+        if digest.hex() == self.session_digest:
+            store.submit(store.save_state, state)
+            return
+
+        self.session_digest = digest.hex()
+        store.submit(store.save_matrix, digest, data.snapshot(), state)
+
+    def create_matrix_view(self, virtual):
+        """
+        Creates a matrix view and configures its appearance.
+
+        Args:
+            virtual (bool): Whether to create a virtualized view for large matrices.
+
+        Returns:
+            Gtk.Grid: The created MatrixView or VirtualMatrixView.
+        """
+        if virtual:
+            return VirtualMatrixView(on_cells_changed=self.on_cells_changed)
+
+        matrix_view = MatrixView(on_cells_changed=self.on_cells_changed)
+        matrix_view.set_row_homogeneous(True)
+        matrix_view.set_column_homogeneous(True)
+        matrix_view.set_row_spacing(5)
+        matrix_view.set_column_spacing(5)
+        return matrix_view
+
+    def update_matrix_view(self):
+        """
+        Binds the matrix data to a view suited to the current matrix size,
+        replacing the current view if it is of the wrong kind.
+        """
+        virtual = max(self.current_rows, self.current_cols) > self.max_grid_size
+        if self.matrix_view is None or isinstance(self.matrix_view, VirtualMatrixView) != virtual:
+            if self.matrix_view is not None:
+                self.main_content.remove(self.matrix_view)
+            self.matrix_view = self.create_matrix_view(virtual)
+            self.main_content.insert_child_after(self.matrix_view, self.truncation_box)
+            self.matrix_view.set_matrix(self.matrix_data)
+        else:
+            self.matrix_view.refresh_matrix()
 
     def update_matrix_size(self):
         """Update internal row and column counts based on dropdown selection."""
         self.current_rows, self.current_cols = self.size_handler.get_selected_size()
 
+    def set_matrix_size(self, rows, cols):
+        """
+        Select a matrix size in the dropdowns without resizing the matrix data,
+        then bring the view up to date.
+
+        Args:
+            rows (int): Number of rows.
+            cols (int): Number of columns.
+        """
+        for dropdown in (self.rows_dropdown, self.cols_dropdown):
+            dropdown.handler_block_by_func(self.on_size_changed)
+        self.size_handler.set_selected_size(rows, cols)
+        for dropdown in (self.rows_dropdown, self.cols_dropdown):
+            dropdown.handler_unblock_by_func(self.on_size_changed)
+
+        self.update_matrix_size()
+        self.update_matrix_view()
+
+    def load_matrix(self, values):
+        """
+        Replace the matrix with imported values and show them in one refresh.
+
+        The values are stored in the selected element type, except that
+        complex values make a real matrix complex.
+
+        Args:
+            values (ndarray or scipy.sparse.csr_array): A 2-D matrix.
+        """
+        try:
+            self.matrix_data.load(values)
+        except ValueError as error:
+            self.show_error(error)
+            return
+
+        self.show_element_type()
+        self.set_matrix_size(*values.shape)
+        self.matrix_view.update_values()
+        self.refresh_result()
+        self.schedule_session_save()
+
+    def show_element_type(self):
+        """
+        Select the element type of the matrix data in the dropdown
+        without converting the matrix data.
+        """
+        self.element_type_dropdown.handler_block_by_func(self.on_element_type_changed)
+        self.element_type_handler.set_selected_dtype(self.matrix_data.dtype)
+        self.element_type_dropdown.handler_unblock_by_func(self.on_element_type_changed)
+
+    def on_element_type_changed(self, *args):
+        """
+        Convert the matrix to the selected element type.
+
+        Conversions that would lose values, such as complex to real,
+        are refused and the previous element type is selected again.
+
+        Args:
+            *args: Positional arguments passed by the signal.
+        """
+        self.commit_edits()
+        self.decomposition_worker.cancel()
+        try:
+            self.matrix_data.set_dtype(self.element_type_handler.get_selected_dtype())
+        except ValueError as error:
+            self.show_element_type()
+            self.show_error(error)
+            return
+
+        if self.matrix_view is not None:
+            self.matrix_view.update_values()
+        self.refresh_result()
+        self.schedule_session_save()
+
+    def show_toast(self, message):
+        """
+        Show a short message to the user.
+
+        Args:
+            message (str): The message to show.
+        """
+        self.toast_overlay.add_toast(Adw.Toast.new(message))
+
+    def show_error(self, error):
+        """
+        Report an error to the user as a toast.
+
+        Args:
+            error (Exception): The error to report.
+        """
+        self.show_toast(str(error))
+
     def on_size_changed(self, *args):
         """
         Handle changes in matrix size dropdowns.
@@ -80,9 +550,63 @@ class EigenWindow(Adw.ApplicationWindow):
         Args:
             *args: Positional arguments passed by the signal.
         """
+        self.decomposition_worker.cancel()
         self.update_matrix_size()
         self.matrix_data.resize(self.current_rows, self.current_cols)
-        self.matrix_view.set_matrix(self.matrix_data)
+        self.update_matrix_view()
+        self.schedule_session_save()
+
+    def on_cells_changed(self, cells):
+        """
+        Handle edits of matrix cells, delivered in batches once typing pauses.
+
+        While a result is displayed, the decomposition is refreshed after
+        each batch; the worker turns single-cell edits into rank-one updates
+        of the previous factorization where possible.
+
+        Args:
+            cells (list of tuple): (row, col) of each edited cell.
+        """
+        self.refresh_result()
+        self.schedule_session_save()
+
+    def commit_edits(self):
+        """
+        Write cell edits that are still waiting for validation to the matrix data.
+        """
+        if self.matrix_view is not None:
+            self.matrix_view.flush_edits()
+
+    def refresh_result(self):
+        """
+        Bring the displayed result up to date after the matrix data changed,
+        or drop a pending decomposition of the old data if nothing is displayed.
+        """
+        if self.result is None:
+            self.decomposition_worker.cancel()
+            return
+
+        self.submit_decomposition()
+
+    def get_truncation(self):
+        """
+        Returns the parameters of the selected decomposition.
+
+        Returns:
+            tuple: (k, tolerance) for truncated decompositions, otherwise None.
+        """
+        if not self.decomposition_handler.is_truncated():
+            return None
+        return self.truncation_handler.get_truncation()
+
+    def submit_decomposition(self):
+        """
+        Decompose the matrix in the background with the selected decomposition.
+        """
+        key = self.decomposition_handler.get_selected_key()
+        self.decomposition_worker.submit(
+            self.matrix_data, key, self.on_decomposition_done, self.get_truncation()
+        )
 
     def on_matrix_copy_clicked(self, button):
         """
@@ -91,10 +615,200 @@ class EigenWindow(Adw.ApplicationWindow):
         Args:
             button: The button that triggered the event.
         """
-        display = Gdk.Display.get_default()
-        clipboard = display.get_clipboard()
-        content_provider = Gdk.ContentProvider.new_for_value(str(self.matrix_data.data))
-        clipboard.set_content(content_provider)
+        self.commit_edits()
+        self.copy_to_clipboard(self.matrix_data.snapshot(), 'numpy', 'matrix')
+
+    def on_copy_matrix_action(self, action, parameter):
+        """
+        Copy the matrix to the clipboard in the chosen format.
+
+        Args:
+            action (Gio.SimpleAction): The activated action.
+            parameter (GLib.Variant): The export format.
+        """
+        self.commit_edits()
+        self.copy_to_clipboard(self.matrix_data.snapshot(), parameter.get_string(), 'matrix')
+
+    def on_save_matrix_action(self, action, parameter):
+        """
+        Save the matrix to a file in the chosen format.
+
+        Args:
+            action (Gio.SimpleAction): The activated action.
+            parameter (GLib.Variant): The export format.
+        """
+        self.commit_edits()
+        self.save_to_file(self.matrix_data.snapshot(), parameter.get_string(), 'matrix')
+
+    def on_copy_result_action(self, action, parameter):
+        """
+        Copy the decomposition factors to the clipboard in the chosen format.
+
+        Args:
+            action (Gio.SimpleAction): The activated action.
+            parameter (GLib.Variant): The export format.
+        """
+        self.copy_to_clipboard(self.result, parameter.get_string(), self.result.name.lower())
+
+    def on_save_result_action(self, action, parameter):
+        """
+        Save the decomposition factors to a file in the chosen format.
+
+        Args:
+            action (Gio.SimpleAction): The activated action.
+            parameter (GLib.Variant): The export format.
+        """
+        self.save_to_file(self.result, parameter.get_string(), self.result.name.lower())
+
+    def copy_to_clipboard(self, source, fmt, name):
+        """
+        Copy a matrix or decomposition result to the clipboard as text.
+        Exports too large for the clipboard are offered as a file instead.
+
+        Args:
+            source (ndarray, sparse array or DecompositionResult): The data to copy.
+            fmt (str): Text export format.
+            name (str): Base name suggested if the data is saved to a file.
+        """
+        if hasattr(source, 'factors'):
+            size = sum(np.prod(factor.shape) for _, factor in source.factors)
+        else:
+            size = np.prod(source.shape)
+
+        if size > self.clipboard_limit:
+            self.show_toast(_('Too large for the clipboard, save it to a file instead'))
+            self.save_to_file(source, fmt, name)
+            return
+
+        precision = self.settings.get_int('export-precision')
+        text = export_text(source, fmt, precision)
+        clipboard = Gdk.Display.get_default().get_clipboard()
+        clipboard.set_content(Gdk.ContentProvider.new_for_value(text))
+
+    def save_to_file(self, source, fmt, name):
+        """
+        Ask for a file and stream a matrix or decomposition result into it.
+
+        Args:
+            source (ndarray or DecompositionResult): The data to save; must not
+                                                     change while it is written.
+            fmt (str): Export format.
+            name (str): Base name of the suggested file name.
+        """
+        extension = file_extension(fmt, multiple=hasattr(source, 'factors'))
+        dialog = Gtk.FileDialog(title=_('Export'), initial_name=name + extension)
+        dialog.save(self, None, self.on_save_dialog_done, source, fmt)
+
+    def on_save_dialog_done(self, dialog, result, source, fmt):
+        """
+        Start writing the export once a file has been chosen.
+
+        Args:
+            dialog (Gtk.FileDialog): The file dialog.
+            result (Gio.AsyncResult): The result of the dialog.
+            source (ndarray or DecompositionResult): The data to save.
+            fmt (str): Export format.
+        """
+        try:
+            file = dialog.save_finish(result)
+        except GLib.Error:
+            return
+
+        precision = self.settings.get_int('export-precision')
+        writer = ExportWriter(file, iter_export(source, fmt, precision), self.on_export_done)
+        self.export_writers.add(writer)
+        writer.start()
+
+    def on_export_done(self, writer, error):
+        """
+        Report the outcome of a file export.
+
+        Args:
+            writer (ExportWriter): The writer that finished.
+            error (Exception): The error that stopped the export, or None on success.
+        """
+        self.export_writers.discard(writer)
+        if error is not None:
+            self.show_error(error)
+            return
+
+        self.show_toast(_('Export finished'))
+
+    def on_matrix_paste_clicked(self, button):
+        """
+        Handle the event when the matrix paste button is clicked.
+
+        Args:
+            button: The button that triggered the event.
+        """
+        clipboard = Gdk.Display.get_default().get_clipboard()
+        clipboard.read_text_async(None, self.on_clipboard_text_read)
+
+    def on_clipboard_text_read(self, clipboard, result):
+        """
+        Parse clipboard text as a matrix once it has been read.
+
+        Args:
+            clipboard (Gdk.Clipboard): The clipboard that was read.
+            result (Gio.AsyncResult): The result of the read operation.
+        """
+        try:
+            text = clipboard.read_text_finish(result)
+            if not text:
+                raise MatrixFormatError(_('The clipboard does not contain text'))
+            values = parse_text(text, self.matrix_data.dtype)
+        except (GLib.Error, MatrixFormatError) as error:
+            self.show_error(error)
+            return
+
+        self.load_matrix(values)
+
+    def on_matrix_open_clicked(self, button):
+        """
+        Handle the event when the matrix open button is clicked.
+
+        Args:
+            button: The button that triggered the event.
+        """
+        matrix_filter = Gtk.FileFilter()
+        matrix_filter.set_name(_('Matrix Files'))
+        for pattern in ('*.csv', '*.tsv', '*.txt', '*.npy', '*.mtx'):
+            matrix_filter.add_pattern(pattern)
+        filters = Gio.ListStore.new(Gtk.FileFilter)
+        filters.append(matrix_filter)
+
+        dialog = Gtk.FileDialog(title=_('Open Matrix'), filters=filters)
+        dialog.open(self, None, self.on_open_dialog_done)
+
+    def on_open_dialog_done(self, dialog, result):
+        """
+        Load the chosen file in the background.
+
+        Args:
+            dialog (Gtk.FileDialog): The file dialog.
+            result (Gio.AsyncResult): The result of the dialog.
+        """
+        try:
+            file = dialog.open_finish(result)
+        except GLib.Error:
+            return
+
+        job = partial(read_file, file.get_path(), self.matrix_data.dtype)
+        self.decomposition_worker.submit_job(job, self.on_matrix_file_read)
+
+    def on_matrix_file_read(self, values, error):
+        """
+        Receive the values of a matrix file on the main loop.
+
+        Args:
+            values (ndarray or scipy.sparse.csr_array): The matrix values, or None on failure.
+            error (Exception): The error raised while reading, or None on success.
+        """
+        if error is not None:
+            self.show_error(error)
+            return
+
+        self.load_matrix(values)
 
     def on_matrix_cleanup_clicked(self, button):
         """
@@ -103,4 +817,114 @@ class EigenWindow(Adw.ApplicationWindow):
         Args:
             button: The button that triggered the event.
         """
-        self.matrix_view.clear_matrix(self.current_rows, self.current_cols)
+        if self.matrix_view is not None:
+            self.matrix_view.clear_matrix(self.current_rows, self.current_cols)
+        else:
+            # The grid is built once the window is mapped; clear the data alone.
+            self.matrix_data.clear()
+        self.refresh_result()
+        self.schedule_session_save()
+
+    def on_decomposition_changed(self, *args):
+        """
+        Handle a change of the selected decomposition or its parameters.
+
+        Shows the parameters of truncated decompositions, and the cached
+        result for the new selection if the current matrix has already been
+        decomposed that way, otherwise hides the output of the previous
+        decomposition.
+
+        Args:
+            *args: Positional arguments passed by the signal.
+        """
+        self.commit_edits()
+        self.decomposition_worker.cancel()
+        self.truncation_box.set_visible(self.decomposition_handler.is_truncated())
+        key = self.decomposition_handler.get_selected_key()
+        cache = self.decomposition_worker.cache
+        self.show_result(cache.get(cache.make_key(self.matrix_data, key, self.get_truncation())))
+        self.schedule_session_save()
+
+    def on_decompose_clicked(self, button):
+        """
+        Run the selected decomposition when the decompose button is clicked.
+
+        Args:
+            button: The button that triggered the event.
+        """
+        self.commit_edits()
+        self.submit_decomposition()
+        self.schedule_session_save()
+
+    def on_decomposition_done(self, result, error):
+        """
+        Receive a finished decomposition on the main loop.
+
+        Args:
+            result (DecompositionResult): The computed result, or None on failure.
+            error (Exception): The error raised by the decomposition, or None on success.
+        """
+        if error is not None:
+            self.show_result(None)
+            self.show_error(error)
+            return
+
+        self.show_result(result)
+
+    def show_result(self, result):
+        """
+        Display a decomposition result below the decompose button.
+
+        Args:
+            result (DecompositionResult): The result to display, or None to hide the output.
+        """
+        self.result = result
+        for action in self.result_actions:
+            action.set_enabled(result is not None)
+        if result is None:
+            self.result_box.set_visible(False)
+            self.diagnostics_label.set_visible(False)
+            return
+
+        if self.factor_view is None:
+            # Built on the first result and reused by every later one.
+            self.factor_view = FactorView()
+            self.result_box.append(self.factor_view)
+        self.factor_view.set_result(result)
+        self.result_box.set_visible(True)
+        self.show_diagnostics(result.diagnostics)
+
+    def show_diagnostics(self, diagnostics):
+        """
+        Display the accuracy measures of a result below it, highlighting
+        the measures that indicate an inaccurate result.
+
+        Args:
+            diagnostics (Diagnostics): The measures, or None to hide them.
+        """
+        if diagnostics is None:
+            self.diagnostics_label.set_visible(False)
+            return
+
+        names = {
+            'residual': _('Residual'),
+            'condition': _('Condition number'),
+            'orthogonality': _('Orthogonality error'),
+            'pivot_growth': _('Pivot growth'),
+        }
+        flagged = diagnostics.flagged()
+        lines = []
+        for name, value in diagnostics.values().items():
+            line = GLib.markup_escape_text(f'{names[name]}: {value:.3g}')
+            lines.append(f'<b>{line} ⚠</b>' if name in flagged else line)
+        if flagged:
+            lines.append(GLib.markup_escape_text(_('The result may be inaccurate')))
+
+        self.diagnostics_label.set_markup('\n'.join(lines))
+        if flagged:
+            self.diagnostics_label.remove_css_class('dim-label')
+            self.diagnostics_label.add_css_class('warning')
+        else:
+            self.diagnostics_label.remove_css_class('warning')
+            self.diagnostics_label.add_css_class('dim-label')
+        self.diagnostics_label.set_visible(True)